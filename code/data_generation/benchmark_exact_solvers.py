@@ -0,0 +1,90 @@
+"""
+Benchmark the exact solver methods of BinaryOptimizationProblem against each
+other on the shipped *_data.pkl instance sets.
+
+Every instance is solved with every method that applies to it, the ground
+energies, ground bitstrings and first excited energies are checked against
+the first method, and the average solve times are reported per qubit count.
+
+Usage (from code/data_generation):
+    python benchmark_exact_solvers.py --problem hamiltonian_path --methods diagonal branch_and_bound
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+import jax
+import numpy as np
+
+from src.algorithms.factory import get_problem_data
+from src.binary_optimization_problem import BinaryOptimizationProblem
+from src.data_classes import OptimizationProblemType
+from src.data_generator import build_problem
+
+jax.config.update("jax_enable_x64", True)
+
+
+def benchmark(problem, methods, limit, max_qubits):
+    graph_data = list(get_problem_data(problem))[:limit]
+    timings = defaultdict(lambda: defaultdict(list))
+    mismatches = 0
+
+    for i, instance in enumerate(graph_data):
+        _, qubo, _ = build_problem(problem, instance)
+        binary_problem = BinaryOptimizationProblem(
+            qubo.get_binary_polynomial(), description=problem
+        )
+        n_qubits = binary_problem.get_number_of_qubits()
+        if n_qubits > max_qubits:
+            continue
+
+        reference = None
+        for method in methods:
+            start_time = time.perf_counter()
+            energies, bitstrings, first_excited_energy, _ = (
+                binary_problem.solve_exactly(method=method)
+            )
+            timings[n_qubits][method].append(time.perf_counter() - start_time)
+
+            result = (energies[0], sorted(bitstrings), first_excited_energy)
+            if reference is None:
+                reference = result
+            elif not (
+                np.isclose(reference[0], result[0])
+                and reference[1] == result[1]
+                and np.isclose(reference[2], result[2])
+            ):
+                mismatches += 1
+                print(f"Instance {i}: {method} disagrees with {methods[0]}")
+
+    print(f"Problem: {problem}, instances: {len(graph_data)}, mismatches: {mismatches}")
+    print("qubits  instances  " + "  ".join(f"{m:>18}" for m in methods))
+    for n_qubits in sorted(timings):
+        row = timings[n_qubits]
+        count = len(row[methods[0]])
+        means = "  ".join(f"{np.mean(row[m]) * 1000:>15.2f} ms" for m in methods)
+        print(f"{n_qubits:>6}  {count:>9}  {means}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark exact solvers.")
+    parser.add_argument(
+        "--problem",
+        type=str,
+        required=True,
+        choices=list(OptimizationProblemType),
+    )
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        default=["diagonal", "branch_and_bound"],
+        help="Exact solver methods to compare, the first one is the reference",
+    )
+    parser.add_argument("--limit", type=int, default=100, help="Number of instances")
+    parser.add_argument(
+        "--max_qubits", type=int, default=22, help="Skip larger instances"
+    )
+    args = parser.parse_args()
+
+    benchmark(args.problem, args.methods, args.limit, args.max_qubits)
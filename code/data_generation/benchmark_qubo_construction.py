@@ -0,0 +1,220 @@
+"""
+Benchmark the array based QUBO construction against the previous dict based
+construction, one dimod.generators.combinations model per constraint merged
+with update, on the shipped *_data.pkl instance sets.
+
+For every instance the model is built both ways, the models are checked to
+be identical (variables and their order, biases and offset), and the
+average build times are reported per number of binary variables.
+
+Usage (from code/data_generation):
+    python benchmark_qubo_construction.py --problem max_flow
+    python benchmark_qubo_construction.py --problem hamiltonian_path
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+import dimod
+import numpy as np
+
+from src.algorithms.factory import get_problem_data
+from src.algorithms.graph_coloring.graph_coloring import GraphColoring
+from src.algorithms.hamiltonian_path.hamiltonian_path import HamiltonianPath
+from src.algorithms.kcliques.kclique import KClique
+from src.algorithms.matching.matching import Matching
+from src.data_classes import OptimizationProblemType
+from src.data_generator import build_problem
+
+
+def _multiply_polynomials(poly1, poly2):
+    result = {}
+    for var1, coef1 in poly1.items():
+        for var2, coef2 in poly2.items():
+            new_var = (var1,) if var1 == var2 else ((var1,), (var2,))
+            result[new_var] = result.get(new_var, 0) + coef1 * coef2
+    return {var: coef for var, coef in result.items() if coef != 0}
+
+
+def _integer_var_to_bin_vars(var, limit):
+    M = int(np.floor(np.log2(limit)))
+    linear = {(var, i): 2**i for i in range(M)}
+    linear[(var, M)] = limit + 1 - 2**M
+    return linear
+
+
+def legacy_max_flow_bqm(max_flow):
+    """Term by term binary expansion of the MaxFlow integer program, one BQM per term."""
+    bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
+    for (int_var1, int_var2), coeff in max_flow.get_integer_program().items():
+        term = dimod.BinaryQuadraticModel(dimod.BINARY)
+        linear = _multiply_polynomials(
+            _integer_var_to_bin_vars((int_var1[0], int_var1[1]), int_var1[2]),
+            _integer_var_to_bin_vars((int_var2[0], int_var2[1]), int_var2[2]),
+        )
+        for bin_var in linear:
+            if linear[bin_var] > 0:
+                if len(bin_var) == 2:
+                    term.add_interaction(bin_var[0], bin_var[1], linear[bin_var])
+                else:
+                    term.add_variable(bin_var, linear[bin_var])
+        term.scale(coeff)
+        bqm.update(term)
+    return bqm
+
+
+def legacy_graph_coloring_bqm(coloring):
+    bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
+    for node in coloring.graph.nodes():
+        variables = [(node, color) for color in range(coloring.colors)]
+        bqm.update(dimod.generators.combinations(variables, 1, strength=1))
+    quadratic = {}
+    for source, target in coloring.graph.edges():
+        for color in range(coloring.colors):
+            key = ((source, color), (target, color))
+            quadratic[key] = quadratic.get(key, 0) + 1
+    bqm.update(dimod.BinaryQuadraticModel({}, quadratic, 0, dimod.BINARY))
+    return bqm
+
+
+def legacy_kclique_bqm(kclique):
+    bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
+    Ha = dimod.generators.combinations(kclique.variables, kclique.k, strength=1.0)
+    Ha.scale(kclique.A)
+    bqm.update(Ha)
+    Hb = dimod.BinaryQuadraticModel(dimod.BINARY)
+    Hb.add_interactions_from((u, v, -1.0) for u, v in kclique.graph.edges)
+    Hb.scale(kclique.B)
+    Hb.offset = kclique.B * (kclique.k * (kclique.k - 1) / 2)
+    bqm.update(Hb)
+    return bqm
+
+
+def legacy_matching_bqm(matching):
+    B = 1
+    A = len(matching.graph.nodes) * B + 1
+    bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
+    for node in matching.graph.nodes:
+        adjacent_edges = set(tuple(sorted(edge)) for edge in matching.graph.edges(node))
+        if len(adjacent_edges) > 0:
+            bqm.update(dimod.generators.combinations(adjacent_edges, 1, strength=1.0))
+    bqm.scale(A)
+    Hb = dimod.BinaryQuadraticModel(dimod.BINARY)
+    for edge in matching.edges:
+        Hb.add_variable(edge, matching.graph.edges[edge].get("weight", 1))
+    Hb.scale(B)
+    bqm.update(Hb)
+    return bqm
+
+
+def legacy_hamiltonian_path_bqm(path):
+    """H_A of HamiltonianPath, the shipped instances are unweighted."""
+    bqm = dimod.BinaryQuadraticModel.empty(dimod.BINARY)
+    for u in path.nodes:
+        variables = [(u, j) for j in path.path_interval]
+        bqm.update(dimod.generators.combinations(variables, 1, strength=1.0))
+    for j in path.path_interval:
+        variables = [(u, j) for u in path.nodes]
+        bqm.update(dimod.generators.combinations(variables, 1, strength=1.0))
+    quadratic = {}
+    for u in path.nodes:
+        for v in path.nodes:
+            if u != v and (u, v) not in path.graph.edges:
+                for i in path.path_interval:
+                    quadratic[(u, i), (v, i + 1)] = 1
+    bqm.update(dimod.BinaryQuadraticModel.from_qubo(quadratic))
+    return bqm
+
+
+# Problem type -> (dict based reference, array based construction), both
+# building the model from the constructed problem object
+BUILDERS = {
+    OptimizationProblemType.MAX_FLOW: (
+        legacy_max_flow_bqm,
+        lambda max_flow: max_flow.integer_program_to_binary_quadratic(),
+    ),
+    OptimizationProblemType.GRAPH_COLORING: (
+        legacy_graph_coloring_bqm,
+        lambda coloring: GraphColoring(coloring.graph, coloring.colors).bqm,
+    ),
+    OptimizationProblemType.K_CLIQUE: (
+        legacy_kclique_bqm,
+        lambda kclique: KClique(kclique.graph, kclique.k, kclique.clique_result).qubo,
+    ),
+    OptimizationProblemType.MATCHING: (
+        legacy_matching_bqm,
+        lambda matching: Matching(matching.graph, matching.matching).qubo,
+    ),
+    OptimizationProblemType.HAMILTONIAN_PATH: (
+        legacy_hamiltonian_path_bqm,
+        lambda path: HamiltonianPath(
+            path.graph, path.hamiltonian_path, path.start_node, path.end_node, path.cycle
+        ).qubo,
+    ),
+}
+
+
+def model_items(bqm):
+    return (
+        list(bqm.variables),
+        list(bqm.linear.items()),
+        list(bqm.quadratic.items()),
+        bqm.offset,
+    )
+
+
+def benchmark(problem, limit, repeats):
+    legacy_builder, array_builder = BUILDERS[problem]
+    graph_data = list(get_problem_data(problem))[:limit]
+    timings = defaultdict(lambda: defaultdict(list))
+    mismatches = 0
+
+    for i, instance in enumerate(graph_data):
+        _, qubo, _ = build_problem(problem, instance)
+        for name, builder in (("legacy", legacy_builder), ("array", array_builder)):
+            start_time = time.perf_counter()
+            for _ in range(repeats):
+                bqm = builder(qubo)
+            timings[bqm.num_variables][name].append(
+                (time.perf_counter() - start_time) / repeats
+            )
+            if name == "legacy":
+                reference = model_items(bqm)
+            elif model_items(bqm) != reference:
+                mismatches += 1
+                print(f"Instance {i}: array based model differs")
+
+    print(f"Problem: {problem}, instances: {len(graph_data)}, mismatches: {mismatches}")
+    print(f"{'variables':>9}  {'instances':>9}  {'legacy':>12}  {'array':>12}  {'speedup':>7}")
+    total = defaultdict(float)
+    for n_variables in sorted(timings):
+        row = timings[n_variables]
+        legacy, array = np.mean(row["legacy"]), np.mean(row["array"])
+        total["legacy"] += np.sum(row["legacy"])
+        total["array"] += np.sum(row["array"])
+        print(
+            f"{n_variables:>9}  {len(row['legacy']):>9}  {legacy * 1000:>9.2f} ms"
+            f"  {array * 1000:>9.2f} ms  {legacy / array:>6.1f}x"
+        )
+    print(
+        f"{'total':>9}  {len(graph_data):>9}  {total['legacy'] * 1000:>9.2f} ms"
+        f"  {total['array'] * 1000:>9.2f} ms  {total['legacy'] / total['array']:>6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark QUBO construction.")
+    parser.add_argument(
+        "--problem",
+        type=str,
+        required=True,
+        choices=[problem.value for problem in BUILDERS],
+    )
+    parser.add_argument("--limit", type=int, default=1000, help="Number of instances")
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="Builds per instance and method"
+    )
+    args = parser.parse_args()
+
+    benchmark(args.problem, args.limit, args.repeats)
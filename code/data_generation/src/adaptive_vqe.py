@@ -0,0 +1,149 @@
+"""
+ADAPT-VQE on a statevector for diagonal cost Hamiltonians.
+
+Every pool operator is a rotation exp(-i theta G / 2) whose generator G is a
+Pauli X, Y or Z on a target wire, optionally projected onto |1> of a
+control wire. Appended at theta = 0 to a circuit preparing |psi>, its
+energy gradient is the commutator expectation value
+
+    d/dtheta <psi| U^dag H U |psi> = (i / 2) <psi| [G, H] |psi> = -Im <G psi| H psi>,
+
+and H psi is the energy vector times psi. The gradients of all single-qubit
+and controlled rotations therefore follow from one statevector with a few
+batched array operations, instead of one gradient circuit per operator.
+
+The selected rotation is optimized on the current state, so the state of
+the grown circuit is updated by applying that one gate rather than
+simulating the circuit again. Like qml.AdaptiveOptimizer.step_and_cost with
+drain_pool=True, a step considers the operators not yet in the circuit and
+optimizes only the new angle, by gradient descent starting from zero. The
+optimizer takes its gradients with the pool gates at their own angles, so
+the two compute the same gradients only for a pool built at angle 0, as in
+solve_with_adaptive_vqe. Operators with exactly tied gradients are told
+apart by rounding errors, which differ between the two, so they may pick
+different operators of a tie and grow different circuits from there.
+"""
+
+import numpy as np
+
+PAULIS = ("X", "Y", "Z")
+
+
+def _split_name(name):
+    """Pauli and controlled flag of a pool operator name, e.g. "CRY" -> ("Y", True)."""
+    return name[-1], name.startswith("C")
+
+
+class AdaptVQE:
+    """
+    Attributes:
+        energies: Energy of every computational basis state.
+        n_qubits (int): Number of qubits.
+        state: Current statevector, starting from the uniform superposition.
+        param_steps (int): Gradient descent steps on a newly added angle.
+        stepsize (float): Gradient descent step size.
+    """
+
+    def __init__(self, energies, n_qubits, param_steps=10, stepsize=0.5):
+        self.energies = np.asarray(energies, dtype=float)
+        self.n_qubits = n_qubits
+        self.param_steps = param_steps
+        self.stepsize = stepsize
+        self.state = np.full(2**n_qubits, 2 ** (-n_qubits / 2), dtype=complex)
+        self.applied = set()
+
+        indices = np.arange(2**n_qubits)
+        shifts = n_qubits - 1 - np.arange(n_qubits)
+        # bits[w, x] is the value of wire w in basis state x (wire 0 is the
+        # most significant bit), masks[w] flips wire w
+        self.bits = (indices[None, :] >> shifts[:, None]) & 1
+        self.masks = 1 << shifts
+        self.indices = indices
+
+    def energy(self, state=None):
+        state = self.state if state is None else state
+        return float(np.dot(np.abs(state) ** 2, self.energies))
+
+    def _pauli(self, pauli, state, wires):
+        """P_w psi for every wire w in wires, shape (len(wires), 2^n)."""
+        wires = np.asarray(wires)
+        bits = self.bits[wires]
+        if pauli == "Z":
+            return (1 - 2 * bits) * state[None, :]
+        flipped = state[self.indices[None, :] ^ self.masks[wires][:, None]]
+        if pauli == "X":
+            return flipped
+        return 1j * (2 * bits - 1) * flipped
+
+    def _generator(self, pauli, controlled, wires, state):
+        """G psi for a single operator."""
+        if controlled:
+            control, target = wires
+            return self.bits[control] * self._pauli(pauli, state, [target])[0]
+        return self._pauli(pauli, state, [wires[0]])[0]
+
+    def gradients(self):
+        """
+        Gradients at theta = 0 of every rotation, as a dict
+        (name, wires) -> gradient for RX, RY, RZ and CRX, CRY, CRZ.
+        """
+        wires = np.arange(self.n_qubits)
+        weighted = self.energies * self.state
+        gradients = {}
+        for pauli in PAULIS:
+            # overlaps[t, x] = conj((P_t psi)_x) (H psi)_x
+            overlaps = np.conj(self._pauli(pauli, self.state, wires)) * weighted[None, :]
+            single = -np.imag(overlaps.sum(axis=1))
+            controlled = -np.imag(overlaps @ self.bits.T)
+            for target in range(self.n_qubits):
+                gradients[("R" + pauli, (target,))] = single[target]
+                for control in range(self.n_qubits):
+                    if control != target:
+                        gradients[("CR" + pauli, (control, target))] = controlled[
+                            target, control
+                        ]
+        return gradients
+
+    def _rotate(self, pauli, controlled, wires, theta, state):
+        rotated = np.cos(theta / 2) * state - 1j * np.sin(theta / 2) * self._generator(
+            pauli, controlled, wires, state
+        )
+        if controlled:
+            # The rotation acts only where the control wire is |1>
+            return np.where(self.bits[wires[0]] == 1, rotated, state)
+        return rotated
+
+    def _optimize_angle(self, pauli, controlled, wires):
+        theta = 0.0
+        for _ in range(self.param_steps):
+            rotated = self._rotate(pauli, controlled, wires, theta, self.state)
+            generated = self._generator(pauli, controlled, wires, rotated)
+            gradient = -np.imag(np.vdot(generated, self.energies * rotated))
+            theta -= self.stepsize * gradient
+        return theta
+
+    def step(self, operator_pool):
+        """
+        Select the pool operator with the largest gradient, optimize its angle
+        and apply it to the state.
+
+        Returns (operator, angle, energy before the step, largest gradient).
+        """
+        energy = self.energy()
+        gradients = self.gradients()
+        pool = [
+            gate
+            for gate in operator_pool
+            if (gate.name, tuple(gate.wires)) not in self.applied
+        ]
+        pool_gradients = np.array(
+            [gradients[(gate.name, tuple(gate.wires))] for gate in pool]
+        )
+        selected = pool[int(np.argmax(np.abs(pool_gradients)))]
+
+        pauli, controlled = _split_name(selected.name)
+        wires = tuple(selected.wires)
+        theta = self._optimize_angle(pauli, controlled, wires)
+        self.state = self._rotate(pauli, controlled, wires, theta, self.state)
+        self.applied.add((selected.name, wires))
+        return selected, theta, energy, float(np.max(np.abs(pool_gradients)))
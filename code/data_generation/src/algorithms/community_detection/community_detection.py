@@ -1,6 +1,9 @@
-import dimod
+import itertools
+
 import networkx as nx
+import numpy as np
 
+from src.algorithms.qubo_builder import QuboBuilder
 from src.algorithms.qubo_problem import QuadradicUnconstrainedBinaryOptimization
 
 colors = ["gray", "blue", "red", "green", "magenta", "yellow", "purple", "black"]
@@ -18,40 +21,41 @@ class CommunityDetection(QuadradicUnconstrainedBinaryOptimization):
             if "weight" not in self.graph[e[0]][e[1]]:
                 self.graph[e[0]][e[1]]["weight"] = 1
             self.max_weight += self.graph[e[0]][e[1]]["weight"]
-        self.bqm = dimod.BinaryQuadraticModel(vartype=dimod.BINARY)
+        self.nodes = list(self.graph.nodes)
+        # Variables are keyed by (node, community), ids[i, c] is the id of
+        # the variable of the i-th node and community c
+        self.builder = QuboBuilder()
+        self.ids = self.builder.registry.ids(
+            itertools.product(self.nodes, range(self.number_of_communities))
+        ).reshape(len(self.nodes), self.number_of_communities)
 
         self.constraint_1()
         self.constraint_2()
+        self.bqm = self.builder.to_bqm()
         self.bqm.normalize()
 
     def constraint_1(self):
         # Each node belongs to exactly one community
-        for node in self.graph.nodes:
-            bqm = dimod.generators.combinations(
-                [(node, c) for c in range(self.number_of_communities)], 1, strength=10
-            )
-            self.bqm.update(bqm)
+        self.builder.add_row_combinations(self.ids, 1, strength=10)
 
     def constraint_2(self):
         # Maximize the number of edges within communities and
-        # minimize the number of edges between communities
-        bqm_dict = {}
-        A = nx.adjacency_matrix(self.graph).toarray()
-
-        for node1 in self.graph.nodes:
-            for node2 in self.graph.nodes:
-                for community in range(self.number_of_communities):
-                    if (node1, community) != (node2, community):
-                        g1 = self.graph.degree(node1, weight="weight")
-                        g2 = self.graph.degree(node2, weight="weight")
-                        bqm_dict[(node1, community), (node2, community)] = A[node1][
-                            node2
-                        ] - g1 * g2 / (2 * self.max_weight)
+        # minimize the number of edges between communities.
+        # Modularity matrix B = A - g g^T / 2m with the weighted degrees g,
+        # coupling (node1, c) and (node2, c) for every community c
+        A = nx.adjacency_matrix(self.graph, nodelist=self.nodes).toarray()
+        degrees = dict(self.graph.degree(weight="weight"))
+        g = np.array([degrees[node] for node in self.nodes])
+        B = A - np.outer(g, g) / (2 * self.max_weight)
 
-        bqm = dimod.BinaryQuadraticModel(vartype=dimod.BINARY)
-        bqm.add_quadratic_from(bqm_dict)
-        bqm.scale(-1 / (2 * self.max_weight))
-        self.bqm.update(bqm)
+        # Both orders of every node pair contribute
+        node1, node2 = np.triu_indices(len(self.nodes), k=1)
+        biases = (B[node1, node2] + B[node2, node1]) * (-1 / (2 * self.max_weight))
+        self.builder.add_quadratic(
+            self.ids[node1].ravel(),
+            self.ids[node2].ravel(),
+            np.repeat(biases, self.number_of_communities),
+        )
 
     def result_to_colors(self, sample):
         cs = ["white"] * len(self.graph.nodes)
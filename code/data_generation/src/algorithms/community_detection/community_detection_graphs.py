@@ -1,8 +1,10 @@
+import itertools
 import random
 import pickle
 from matplotlib import pyplot as plt
 import networkx as nx
-from networkx import weisfeiler_lehman_graph_hash
+
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
 
 random.seed(4)
 
@@ -50,42 +52,37 @@ def generate_community_graph(
     return G
 
 
-def generate_community_graphs(max_n_cliques=6, max_clique_size=6):
+def generate_community_graphs(max_n_cliques=6, max_clique_size=6, index=None):
     """
     Generate a set of community graphs.
 
     Parameters:
         max_n_cliques (int): Maximum number of cliques.
         max_clique_size (int): Maximum size of each clique.
+        index (GraphIndex): Graphs isomorphic to one in it are skipped, a new index by default.
 
     Returns:
         set: A set of generated community graphs. Set of tuples (graph, num_of_communities, size_of_communities).
     """
     graphs = set()
-    graph_already_generated = set()
+    index = GraphIndex() if index is None else index
 
     for l in range(2, max_n_cliques + 1):
         for k in range(2, max_clique_size + 1):
-            for graph_func in [
-                nx.connected_caveman_graph,
-                nx.ring_of_cliques,
-                nx.windmill_graph,
-            ]:
-                graph = graph_func(l, k)
-                graph_hash = weisfeiler_lehman_graph_hash(graph)
-
-                if graph_hash not in graph_already_generated and nx.is_connected(graph):
-                    graphs.add((graph, l, k))
-                    graph_already_generated.add(graph_hash)
-
-            for _ in range(100):
+            candidates = itertools.chain(
+                (
+                    graph_func(l, k)
+                    for graph_func in [
+                        nx.connected_caveman_graph,
+                        nx.ring_of_cliques,
+                        nx.windmill_graph,
+                    ]
+                ),
                 # Custom funcion to generate even more community graphs
-                graph = generate_community_graph(l, k)
-                graph_hash = weisfeiler_lehman_graph_hash(graph)
-
-                if graph_hash not in graph_already_generated and nx.is_connected(graph):
-                    graphs.add((graph, l, k))
-                    graph_already_generated.add(graph_hash)
+                (generate_community_graph(l, k) for _ in range(100)),
+            )
+            candidates = (graph for graph in candidates if nx.is_connected(graph))
+            graphs.update((graph, l, k) for graph in index.add_batched(candidates))
 
     return graphs
 
@@ -122,9 +119,15 @@ def plot_sample_graphs(
 
 if __name__ == "__main__":
     max_n_cliques, max_size = 5, 5
-    graphs = list(generate_community_graphs(max_n_cliques, max_size))
+    data_path = "algorithms/community_detection/community_detection_data.pkl"
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    graphs = list(generate_community_graphs(max_n_cliques, max_size, index=index))
 
     print("Number of graphs: ", len(graphs))
+    graphs = saved + graphs
 
-    save_graphs(graphs, "algorithms/community_detection/community_detection_data.pkl")
+    save_graphs(graphs, data_path)
+    index.save()
     plot_sample_graphs(graphs)
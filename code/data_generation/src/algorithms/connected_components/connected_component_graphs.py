@@ -1,10 +1,12 @@
 import pickle
 import random
+from operator import itemgetter
 import networkx as nx
 import numpy as np
-from networkx import weisfeiler_lehman_graph_hash
 import matplotlib.pyplot as plt
 
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
+
 random.seed(0)
 
 
@@ -37,24 +39,27 @@ def pick_random_node(components):
     return node
 
 
-def generate_graphs(max_nodes=18, min_components=2, max_components=8, iterations=100):
+def generate_graphs(
+    max_nodes=18, min_components=2, max_components=8, iterations=100, index=None
+):
     graphs = []
-    graph_hashes = []
+    index = GraphIndex() if index is None else index
 
     for n_components in range(min_components, max_components + 1):
         max_component_size = np.floor(max_nodes / n_components)
-        for _ in range(iterations):
-            G, components = generate_graph_with_components(
+        candidates = (
+            generate_graph_with_components(
                 n_components,
                 min_size=2,
                 max_size=int(max_component_size),
                 edge_prob=0.5,
             )
-            node = pick_random_node(components)
-            graph_hash = weisfeiler_lehman_graph_hash(G)
-            if graph_hash not in graph_hashes:
-                graphs.append((G, node, components))
-                graph_hashes.append(graph_hash)
+            for _ in range(iterations)
+        )
+        candidates = (
+            (G, pick_random_node(components), components) for G, components in candidates
+        )
+        graphs.extend(index.add_batched(candidates, graph=itemgetter(0)))
 
     return graphs
 
@@ -81,7 +86,13 @@ def visualize_graphs(
 
 if __name__ == "__main__":
     max_nodes, min_components, max_components, iterations = 18, 2, 6, 100
-    graphs = generate_graphs(max_nodes, min_components, max_components, iterations)
+    data_path = "algorithms/connected_components/connected_components_data.pkl"
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    graphs = generate_graphs(max_nodes, min_components, max_components, iterations, index=index)
     print(f"Generated {len(graphs)} unique graphs")
-    save_graphs(graphs, "algorithms/connected_components/connected_components_data.pkl")
+    graphs = saved + graphs
+    save_graphs(graphs, data_path)
+    index.save()
     visualize_graphs(graphs)
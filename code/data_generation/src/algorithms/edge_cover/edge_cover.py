@@ -5,6 +5,8 @@ from networkx.readwrite import json_graph
 import networkx as nx
 import numpy as np
 
+from src.product_form import ProductFormPolynomial
+
 class EdgeCover:
     
     def __init__(self, graph, edge_cover):
@@ -56,37 +58,24 @@ class EdgeCover:
             
     def build_hubo(self):
         A, B = 2, 1
-        
-        hubo = dict()
-        
-        # Every node must be covered by at least one edge in the edge cover
-        for node in self.nodes:
-            adjacent_edges = [edge for edge in self.edges if node in edge]
-            
-            for size in range(1, len(adjacent_edges) + 1):
-                for subset in itertools.combinations(adjacent_edges, size):
-                    v = tuple(sorted(subset))
-                    if len(subset) % 2 == 0:
-                        if v in hubo:
-                            hubo[v] += A
-                        else:
-                            hubo[v] = A
-                    else:
-                        if v in hubo:
-                            hubo[v] -= A
-                        else:
-                            hubo[v] = -A
-        
+
+        # Every node must be covered by at least one edge in the edge cover,
+        # A * (prod_{e adjacent} (1 - x_e) - 1) is A if no adjacent edge is selected.
+        # The products are kept in product form instead of expanding them into
+        # the 2^degree subsets of the adjacent edges, see src/product_form.py
+        adjacent_edges = {node: [] for node in self.nodes}
         for edge in self.edges:
-            v = (tuple(sorted(edge)),)
-            if v in hubo:
-                hubo[v] += B
-            else:
-                hubo[v] = B
-            
-        self.qubo = dimod.BinaryPolynomial(hubo, dimod.BINARY)
-        
-    
+            for node in dict.fromkeys(edge):
+                adjacent_edges[node].append(edge)
+        products = [(A, adjacent_edges[node]) for node in self.nodes]
+
+        linear = {}
+        for edge in self.edges:
+            v = tuple(sorted(edge))
+            linear[v] = linear.get(v, 0) + B
+
+        self.qubo = ProductFormPolynomial(linear, products, offset=-A * len(self.nodes))
+
     def get_binary_polynomial(self):
         return self.qubo
     
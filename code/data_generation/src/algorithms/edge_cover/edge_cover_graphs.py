@@ -2,10 +2,11 @@ import pickle
 import networkx as nx
 import random
 import matplotlib.pyplot as plt
-from networkx import weisfeiler_lehman_graph_hash
 import itertools
 from networkx.algorithms import approximation
 
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
+
 
 random.seed(0)
 
@@ -59,7 +60,7 @@ def find_minimum_edge_cover(G):
     edge_cover = nx.algorithms.min_edge_cover(G)
     return set(edge_cover), len(edge_cover)
 
-def generate_networks(max_nodes=14, num_networks=1000):
+def generate_networks(max_nodes=14, num_networks=1000, index=None):
     """
     Generate a collection of graphs with different properties.
     
@@ -67,24 +68,20 @@ def generate_networks(max_nodes=14, num_networks=1000):
     - The graph
     - Minimum edge cover
     - Size of the minimum edge cover
+
+    Graphs isomorphic to one in the GraphIndex are skipped, e.g. those of an
+    earlier run if its saved index is passed.
     """
     networks = []
-    generated_networks = set()
+    index = GraphIndex() if index is None else index
     
     for n_nodes in range(3, max_nodes + 1, 1):
-        for _ in range(num_networks):
-            edge_density = random.uniform(0.2, 0.5)
-            
-            G = generate_graph(n_nodes, edge_density)
-            
-            # Skip networks that have been generated before
-            h = weisfeiler_lehman_graph_hash(G)
-            
-            if h in generated_networks:
-                continue
-            
-            generated_networks.add(h)
-            
+        graphs = (
+            generate_graph(n_nodes, random.uniform(0.2, 0.5)) for _ in range(num_networks)
+        )
+
+        # Skip networks that have been generated before
+        for G in index.add_batched(graphs):
             # Find the minimum edge cover
             try:
                 edge_cover, cover_size = find_minimum_edge_cover(G)
@@ -207,8 +204,13 @@ def get_edge_cover_problem(networks, idx=None):
     return problem
 
 if __name__ == "__main__":
-    networks = generate_networks(max_nodes=10, num_networks=1000)
+    data_path = "algorithms/edge_cover/edge_cover_data.pkl"
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    networks = generate_networks(max_nodes=10, num_networks=1000, index=index)
     print(f"Generated {len(networks)} graphs for the edge cover problem")
+    networks = saved + networks
     
     # Verify the networks
     verification = verify_edge_covers(networks)
@@ -219,7 +221,8 @@ if __name__ == "__main__":
     print(f"Network analysis: {analysis}")
     
     # Save and visualize
-    save_networks(networks, "algorithms/edge_cover/edge_cover_data.pkl")
+    save_networks(networks, data_path)
+    index.save()
     visualize_networks(networks, "algorithms/edge_cover/figures")
     
     # Extract a sample edge cover problem
@@ -15,11 +15,14 @@ from src.algorithms.graph_coloring.graph_coloring_graphs import (
 from src.algorithms.graph_isomorphism.graph_isomorphism_graphs import (
     generate_graphs as generate_graph_isomorphism_graphs,
 )
+from src.algorithms.graph_index import GraphIndex
 from src.algorithms.hamiltonian_path.hamiltonian_path_graphs import (
     generate_graphs as generate_hamiltonian_path_graphs,
+    new_graph_index as new_hamiltonian_path_index,
 )
 from src.algorithms.hypermaxcut.hypermaxcut_graphs import (
     generate_hypergraphs,
+    new_graph_index as new_hypermaxcut_index,
 )
 from src.algorithms.kcliques.kclique_graphs import (
     generate_kclique_data_set as generate_k_clique_graphs,
@@ -29,9 +32,11 @@ from src.algorithms.matching.matching_graphs import (
 )
 from src.algorithms.max_flow.max_flow_graphs import (
     generate_networks as generate_max_flow_graphs,
+    new_graph_index as new_max_flow_index,
 )
 from src.algorithms.min_cut.min_cut_graphs import (
     generate_networks as generate_min_cut_graphs,
+    new_graph_index as new_min_cut_index,
 )
 from src.algorithms.steiner_tree.steiner_tree_graphs import (
     generate_steiner_dataset as generate_steiner_tree_graphs,
@@ -41,6 +46,17 @@ from src.algorithms.vertex_cover.vertex_cover_graphs import (
 )
 from src.data_classes import OptimizationProblemType
 
+# Problems whose package under src/algorithms is not named like the problem
+PROBLEM_DIRECTORIES = {OptimizationProblemType.K_CLIQUE: "kcliques"}
+
+# Problems whose GraphIndex has to preserve node attributes, a plain GraphIndex otherwise
+GRAPH_INDEXES = {
+    OptimizationProblemType.HAMILTONIAN_PATH: new_hamiltonian_path_index,
+    OptimizationProblemType.HYPERMAXCUT: new_hypermaxcut_index,
+    OptimizationProblemType.MAX_FLOW: new_max_flow_index,
+    OptimizationProblemType.MIN_CUT: new_min_cut_index,
+}
+
 
 def load_pickle(filename):
     with open(filename, "rb") as f:
@@ -48,62 +64,77 @@ def load_pickle(filename):
     return graphs
 
 
-def get_problem_data(problem: OptimizationProblemType, generate_data: bool = False):
+def get_problem_data(
+    problem: OptimizationProblemType, generate_data: bool = False, index_path: str = None
+):
     """Get the data for the optimization problem.
 
     Args:
         problem (OptimizationProblem): The optimization problem.
+        generate_data (bool): Generate the graphs instead of loading the saved data set.
+        index_path (str): Generation only, GraphIndex file of earlier runs. Graphs
+            isomorphic to one in it are not generated again, and the index is saved
+            there with the new graphs.
 
     Returns:
         DataGenerator: The data generator for the optimization problem.
     """
     if not generate_data:
-        return load_pickle(f"src/algorithms/{problem}/{problem}_data.pkl")
+        directory = PROBLEM_DIRECTORIES.get(OptimizationProblemType(problem), problem)
+        return load_pickle(f"src/algorithms/{directory}/{problem}_data.pkl")
 
     print("Generating data for problem: ", problem)
+    index = GRAPH_INDEXES.get(OptimizationProblemType(problem), GraphIndex)(index_path)
+    data = _generate_problem_data(problem, index)
+    if index_path is not None:
+        index.save()
+    return data
+
 
+def _generate_problem_data(problem: OptimizationProblemType, index: GraphIndex):
+    """Generate the graphs of the problem that are not isomorphic to one in the index."""
     if problem == OptimizationProblemType.HYPERMAXCUT:
         min_num_nodes, max_num_nodes = 3, 14
-        hypergraphs = generate_hypergraphs(min_num_nodes, max_num_nodes)
+        hypergraphs = generate_hypergraphs(min_num_nodes, max_num_nodes, index=index)
         return hypergraphs
     elif problem == OptimizationProblemType.COMMUNITY_DETECTION:
         max_n_cliques, max_size = 5, 5
-        return generate_community_graphs(max_n_cliques, max_size)
+        return generate_community_graphs(max_n_cliques, max_size, index=index)
     elif problem == OptimizationProblemType.CONNECTED_COMPONENTS:
         max_nodes, min_components, max_components, iterations = 16, 2, 8, 100
         return generate_connected_components_graphs(
-            max_nodes, min_components, max_components, iterations
+            max_nodes, min_components, max_components, iterations, index=index
         )
     elif problem == OptimizationProblemType.GRAPH_COLORING:
         max_colors = 6
         max_nodes = 16
-        return generate_graph_coloring_graphs(max_colors, max_nodes)
+        return generate_graph_coloring_graphs(max_colors, max_nodes, index=index)
     elif problem == OptimizationProblemType.GRAPH_ISOMORPHISM:
         max_nodes = 10
-        return generate_graph_isomorphism_graphs(max_nodes)
+        return generate_graph_isomorphism_graphs(max_nodes, index=index)
     elif problem == OptimizationProblemType.K_CLIQUE:
         max_k = 5
-        return generate_k_clique_graphs(5)
+        return generate_k_clique_graphs(5, index=index)
     elif problem == OptimizationProblemType.HAMILTONIAN_PATH:
         max_nodes = 10
-        return generate_hamiltonian_path_graphs(max_nodes=max_nodes)
+        return generate_hamiltonian_path_graphs(max_nodes=max_nodes, index=index)
     elif problem == OptimizationProblemType.MATCHING:
         max_nodes = 10
-        return generate_matching_graphs(max_nodes=max_nodes)
+        return generate_matching_graphs(max_nodes=max_nodes, index=index)
     elif problem == OptimizationProblemType.MAX_FLOW:
         max_nodes = 12
-        return generate_max_flow_graphs(max_nodes=max_nodes)
+        return generate_max_flow_graphs(max_nodes=max_nodes, index=index)
     elif problem == OptimizationProblemType.MIN_CUT:
         max_nodes = 12
-        return generate_min_cut_graphs(max_nodes=max_nodes)
+        return generate_min_cut_graphs(max_nodes=max_nodes, index=index)
     elif problem == OptimizationProblemType.STEINER_TREE:
         n_instances = 100
         return generate_steiner_tree_graphs(n_instances=n_instances)
     elif problem == OptimizationProblemType.VERTEX_COVER:
         max_nodes = 12
-        return generate_vertex_cover_graphs(max_nodes=max_nodes)
+        return generate_vertex_cover_graphs(max_nodes=max_nodes, index=index)
     elif problem == OptimizationProblemType.EDGE_COVER:
         max_nodes = 12
-        return generate_edge_cover_graphs(max_nodes=max_nodes)
+        return generate_edge_cover_graphs(max_nodes=max_nodes, index=index)
     else:
         raise ValueError("No graph generator for this problem.")
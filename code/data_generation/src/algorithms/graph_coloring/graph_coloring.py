@@ -1,5 +1,8 @@
-import dimod
+import itertools
 
+import numpy as np
+
+from src.algorithms.qubo_builder import QuboBuilder
 from src.algorithms.qubo_problem import QuadradicUnconstrainedBinaryOptimization
 
 
@@ -10,27 +13,32 @@ class GraphColoring(QuadradicUnconstrainedBinaryOptimization):
         self.graph = graph
         self.colors = colors
         self.coloring = {}
-        self.bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
+        self.nodes = list(self.graph.nodes())
+        # Variables are keyed by (node, color), ids[i, c] is the id of the
+        # variable of the i-th node and color c
+        self.builder = QuboBuilder()
+        self.ids = self.builder.registry.ids(
+            itertools.product(self.nodes, range(self.colors))
+        ).reshape(len(self.nodes), self.colors)
 
         # Add constraints
         self.one_color_per_node()
         self.adjacent_nodes_have_different_colors()
+        self.bqm = self.builder.to_bqm()
 
     def one_color_per_node(self):
-        for node in self.graph.nodes():
-            vars = [(node, colors) for colors in range(self.colors)]
-            constraint = dimod.generators.combinations(vars, 1, strength=1)
-            self.bqm.update(constraint)
+        self.builder.add_row_combinations(self.ids, 1, strength=1)
 
     def adjacent_nodes_have_different_colors(self):
-        quadratic = {}
-        for source, target in self.graph.edges():
-            for color in range(self.colors):
-                if ((source, color), (target, color)) in quadratic:
-                    quadratic[((source, color), (target, color))] += 1
-                else:
-                    quadratic[((source, color), (target, color))] = 1
-        self.bqm.update(dimod.BinaryQuadraticModel({}, quadratic, 0, dimod.BINARY))
+        # x_(source, c) x_(target, c) for every edge and color
+        position = {node: i for i, node in enumerate(self.nodes)}
+        edges = np.array(
+            [(position[source], position[target]) for source, target in self.graph.edges()],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        self.builder.add_quadratic(
+            self.ids[edges[:, 0]].ravel(), self.ids[edges[:, 1]].ravel(), 1
+        )
 
     def get_binary_polynomial(self):
         return self.bqm
@@ -1,8 +1,10 @@
 import pickle
 import random
+from operator import itemgetter
 import networkx as nx
 import matplotlib.pyplot as plt
-from networkx import weisfeiler_lehman_graph_hash
+
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
 
 random.seed(0)
 
@@ -71,33 +73,36 @@ def save_graphs_to_file(graphs, filename):
         pickle.dump(graphs, f)
 
 
-def generate_graphs(max_colors=10, max_nodes=18):
+def generate_graphs(max_colors=10, max_nodes=18, index=None):
     graphs = []
-    graph_hashes = []
+    index = GraphIndex() if index is None else index
     for n_colors in range(3, max_colors + 1):
         for n_nodes in range(n_colors, max_nodes + 1):
             if n_colors * n_nodes < 21:
-                for _ in range(2000):
-                    for prob in range(2, 10):
-                        inter_prob = prob / 10
-                        G, coloring = generate_k_colorable_graph(
-                            n=n_nodes, k=n_colors, inter_prob=inter_prob
-                        )
-                        hash_val = weisfeiler_lehman_graph_hash(G)
-                        if (
-                            len(G.nodes()) == n_nodes
-                            and nx.is_connected(G)
-                            and hash_val not in graph_hashes
-                        ):
-                            graphs.append((G, n_colors, coloring))
-                            graph_hashes.append(hash_val)
+                candidates = (
+                    generate_k_colorable_graph(n=n_nodes, k=n_colors, inter_prob=prob / 10)
+                    for _ in range(2000)
+                    for prob in range(2, 10)
+                )
+                candidates = (
+                    (G, n_colors, coloring)
+                    for G, coloring in candidates
+                    if len(G.nodes()) == n_nodes and nx.is_connected(G)
+                )
+                graphs.extend(index.add_batched(candidates, graph=itemgetter(0)))
     return graphs
 
 
 if __name__ == "__main__":
-    graphs = generate_graphs()
+    data_path = "algorithms/graph_coloring/graph_coloring_data.pkl"
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    graphs = generate_graphs(index=index)
 
     print(f"Generated {len(graphs)} unique graphs")
+    graphs = saved + graphs
 
-    save_graphs_to_file(graphs, "algorithms/graph_coloring/graph_coloring_data.pkl")
+    save_graphs_to_file(graphs, data_path)
+    index.save()
     visualize_graphs(graphs)
@@ -0,0 +1,273 @@
+"""
+Isomorphism aware deduplication of generated graph data sets.
+
+The *_graphs.py generators skipped a graph if its Weisfeiler-Lehman hash had
+been seen before. Non isomorphic graphs can share a WL hash, so some graphs
+were dropped wrongly. GraphIndex uses the WL hash, or another isomorphism
+invariant, together with an optional key only to pick a bucket. Each bucket
+keeps one representative of every isomorphism class in it, and a graph is
+new unless it is isomorphic (nx.is_isomorphic, VF2) to one of them. Almost
+every bucket holds a single graph, so a lookup is one hash and at most one
+isomorphism check on small graphs. Random generators of small graphs
+produce the same labelled graph many times, so the labelled edge sets of all
+graphs seen are kept too and a repeat is rejected without either.
+
+Special nodes, such as the source and sink of a flow network, are tagged
+with a node attribute by tag_nodes, and an index with that node_attr only
+maps them onto nodes with the same tag.
+
+The index can be saved next to the *_data.pkl file and loaded by a later,
+incremental run, which then skips all graphs that are already in the data
+set. add_many deduplicates a batch of graphs in a process pool, and
+add_batched a stream of generated items in such batches.
+"""
+
+import itertools
+import os
+import pickle
+from collections import defaultdict
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional
+
+import networkx as nx
+from networkx.algorithms.isomorphism import categorical_edge_match, categorical_node_match
+
+from src.parallel import atomic_open, pool_map
+
+
+def _wl_hash(graph, node_attr=None, edge_attr=None):
+    return nx.weisfeiler_lehman_graph_hash(graph, node_attr=node_attr, edge_attr=edge_attr)
+
+
+def _is_isomorphic(graph1, graph2, node_attr=None, edge_attr=None):
+    return nx.is_isomorphic(
+        graph1,
+        graph2,
+        node_match=categorical_node_match(node_attr, None) if node_attr else None,
+        edge_match=categorical_edge_match(edge_attr, None) if edge_attr else None,
+    )
+
+
+def _labelled(graph, node_attr=None, edge_attr=None):
+    edge = tuple if graph.is_directed() else frozenset
+    return (
+        frozenset(graph.nodes(data=node_attr)) if node_attr else frozenset(graph),
+        frozenset(
+            (edge((u, v)), value) for u, v, value in graph.edges(data=edge_attr)
+        )
+        if edge_attr
+        else frozenset(edge((u, v)) for u, v in graph.edges()),
+    )
+
+
+def tag_nodes(graph: nx.Graph, attr: str, tags: dict) -> nx.Graph:
+    """Copy of the graph whose nodes have the attribute attr, tags[node] or None for the untagged ones."""
+    graph = graph.copy()
+    nx.set_node_attributes(graph, None, attr)
+    nx.set_node_attributes(graph, tags, attr)
+    return graph
+
+
+def index_path(data_path: str) -> str:
+    """Path of the GraphIndex saved next to a *_data.pkl data set."""
+    return data_path.replace("_data.pkl", "_index.pkl")
+
+
+def load_data_set(data_path: str, index: "GraphIndex") -> list:
+    """
+    The data set saved at data_path together with the loaded index, which the
+    graphs of an incremental run extend. Empty if the index is new.
+    """
+    if not len(index) or not os.path.exists(data_path):
+        return []
+    with open(data_path, "rb") as f:
+        return list(pickle.load(f))
+
+
+def _hash_task(args):
+    graph_hash, graph, node_attr, edge_attr = args
+    return graph_hash(graph, node_attr, edge_attr)
+
+
+def _new_in_bucket(args):
+    """Indices of the candidates that are isomorphic neither to a representative nor to an earlier candidate."""
+    representatives, candidates, node_attr, edge_attr = args
+    representatives = list(representatives)
+    new = []
+    for i, graph in enumerate(candidates):
+        if not any(
+            _is_isomorphic(graph, other, node_attr, edge_attr) for other in representatives
+        ):
+            representatives.append(graph)
+            new.append(i)
+    return new
+
+
+class GraphIndex:
+    """
+    Representatives of the isomorphism classes of the graphs added so far.
+
+    Attributes:
+        path (str): File the index is loaded from and saved to, if any.
+        node_attr (str): Node attribute that isomorphisms have to preserve.
+        edge_attr (str): Edge attribute that isomorphisms have to preserve, e.g. "weight".
+        graph_hash: Isomorphism invariant graph_hash(graph, node_attr, edge_attr)
+            that picks the bucket, the WL hash by default. A module level
+            function, so that it can be pickled. A saved index stores its name
+            only and has to be loaded with the same graph_hash.
+        buckets (dict): (graph hash, key) -> representative graphs.
+        labelled (set): (labelled edge set, key) of every graph seen.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        node_attr: Optional[str] = None,
+        edge_attr: Optional[str] = None,
+        graph_hash: Optional[Callable] = None,
+    ):
+        self.path = path
+        self.node_attr = node_attr
+        self.edge_attr = edge_attr
+        self.graph_hash = _wl_hash if graph_hash is None else graph_hash
+        self.buckets = defaultdict(list)
+        self.labelled = set()
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            self.node_attr = state["node_attr"]
+            self.edge_attr = state["edge_attr"]
+            if state["graph_hash"] != self.graph_hash.__name__:
+                raise ValueError(
+                    f"{path} was built with the graph hash {state['graph_hash']}, "
+                    f"not {self.graph_hash.__name__}"
+                )
+            self.buckets.update(state["buckets"])
+            self.labelled = state["labelled"]
+
+    def __len__(self):
+        return sum(len(graphs) for graphs in self.buckets.values())
+
+    def _bucket(self, graph, key):
+        return (self.graph_hash(graph, self.node_attr, self.edge_attr), key)
+
+    def _in_bucket(self, graph, bucket):
+        return any(
+            _is_isomorphic(graph, other, self.node_attr, self.edge_attr)
+            for other in self.buckets.get(bucket, ())
+        )
+
+    def contains(self, graph: nx.Graph, key: Hashable = None) -> bool:
+        """If a graph isomorphic to the given one has been added with the same key."""
+        if (_labelled(graph, self.node_attr, self.edge_attr), key) in self.labelled:
+            return True
+        return self._in_bucket(graph, self._bucket(graph, key))
+
+    def add(self, graph: nx.Graph, key: Hashable = None) -> bool:
+        """Add a graph unless an isomorphic one with the same key is in the index. Returns if it was new."""
+        labelled = (_labelled(graph, self.node_attr, self.edge_attr), key)
+        if labelled in self.labelled:
+            return False
+        self.labelled.add(labelled)
+        bucket = self._bucket(graph, key)
+        if self._in_bucket(graph, bucket):
+            return False
+        self.buckets[bucket].append(graph)
+        return True
+
+    def add_many(
+        self,
+        graphs: Iterable[nx.Graph],
+        keys: Optional[Iterable[Hashable]] = None,
+        n_workers: Optional[int] = None,
+    ) -> List[bool]:
+        """
+        add for a batch of graphs, of which the first of every isomorphism
+        class is kept. The graph hashes, and the isomorphism checks of the
+        buckets with more than one graph, are computed with pool_map in
+        n_workers processes.
+        """
+        graphs = list(graphs)
+        keys = [None] * len(graphs) if keys is None else list(keys)
+        # Only the first of the graphs with the same labelled edge set is hashed
+        unseen = []
+        for i, (graph, key) in enumerate(zip(graphs, keys)):
+            labelled = (_labelled(graph, self.node_attr, self.edge_attr), key)
+            if labelled not in self.labelled:
+                self.labelled.add(labelled)
+                unseen.append(i)
+
+        hashes = pool_map(
+            _hash_task,
+            [(self.graph_hash, graphs[i], self.node_attr, self.edge_attr) for i in unseen],
+            n_workers,
+        )
+        candidates = defaultdict(list)
+        for i, graph_hash in zip(unseen, hashes):
+            candidates[(graph_hash, keys[i])].append(i)
+
+        # A single candidate for an empty bucket is new without any check
+        checks = [
+            (bucket, indices)
+            for bucket, indices in candidates.items()
+            if len(indices) > 1 or self.buckets.get(bucket)
+        ]
+        results = pool_map(
+            _new_in_bucket,
+            [
+                (
+                    self.buckets.get(bucket, []),
+                    [graphs[i] for i in indices],
+                    self.node_attr,
+                    self.edge_attr,
+                )
+                for bucket, indices in checks
+            ],
+            n_workers,
+        )
+
+        new = {bucket: indices[:1] for bucket, indices in candidates.items()}
+        for (bucket, indices), new_positions in zip(checks, results):
+            new[bucket] = [indices[position] for position in new_positions]
+
+        added = [False] * len(graphs)
+        for bucket, indices in new.items():
+            for i in indices:
+                self.buckets[bucket].append(graphs[i])
+                added[i] = True
+        return added
+
+    def add_batched(
+        self,
+        items: Iterable,
+        graph: Callable = lambda item: item,
+        key: Optional[Callable] = None,
+        batch_size: int = 1000,
+        n_workers: Optional[int] = None,
+    ) -> Iterator:
+        """
+        Yield the items whose graph(item), with key(item), is new, in order.
+        The items are added with add_many in batches of batch_size, so that a
+        generator can produce them lazily.
+        """
+        items = iter(items)
+        while batch := list(itertools.islice(items, batch_size)):
+            added = self.add_many(
+                [graph(item) for item in batch],
+                None if key is None else [key(item) for item in batch],
+                n_workers,
+            )
+            yield from itertools.compress(batch, added)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the index, to self.path by default."""
+        with atomic_open(path or self.path, "wb") as f:
+            pickle.dump(
+                {
+                    "node_attr": self.node_attr,
+                    "edge_attr": self.edge_attr,
+                    "graph_hash": self.graph_hash.__name__,
+                    "buckets": dict(self.buckets),
+                    "labelled": self.labelled,
+                },
+                f,
+            )
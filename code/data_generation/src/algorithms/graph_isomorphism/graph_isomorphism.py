@@ -1,14 +1,33 @@
-import dimod
-import networkx as nx
+import itertools
 
+import numpy as np
+
+from src.algorithms.qubo_builder import QuboBuilder
 from src.algorithms.qubo_problem import QuadradicUnconstrainedBinaryOptimization
 
 
-def append_dict(d, key, value):
-    if key not in d:
-        d[key] = value
-    else:
-        d[key] += value
+def non_edges(graph, nodes):
+    """
+    Node pairs (i, j), i < j, of the complete graph on range(len(nodes))
+    that are not edges of the graph, as two arrays of positions in nodes.
+    """
+    position = {node: k for k, node in enumerate(nodes)}
+    adjacency = np.zeros((len(nodes), len(nodes)), dtype=bool)
+    for u, v in graph.edges():
+        adjacency[position[u], position[v]] = adjacency[position[v], position[u]] = True
+    i, j = np.triu_indices(len(nodes), k=1)
+    positions = np.array([position[label] for label in range(len(nodes))], dtype=np.int64)
+    missing = ~adjacency[positions[i], positions[j]]
+    return positions[i[missing]], positions[j[missing]]
+
+
+def edges(graph, nodes):
+    """Edges (u, v) of the graph in iteration order, as two arrays of positions in nodes."""
+    position = {node: k for k, node in enumerate(nodes)}
+    positions = np.array(
+        [(position[u], position[v]) for u, v in graph.edges()], dtype=np.int64
+    ).reshape(-1, 2)
+    return positions[:, 0], positions[:, 1]
 
 
 class GraphIsomorphism(QuadradicUnconstrainedBinaryOptimization):
@@ -17,39 +36,39 @@ class GraphIsomorphism(QuadradicUnconstrainedBinaryOptimization):
         self.graph2 = graph2
         self.automorphism = automorphism
         assert len(graph1.nodes()) == len(graph2.nodes())
-        self.bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
+        self.nodes1 = list(self.graph1.nodes())
+        self.nodes2 = list(self.graph2.nodes())
+        # Variables are keyed by (node1, node2), ids[a, b] is the id of the
+        # variable of the a-th node of graph1 and the b-th node of graph2
+        self.builder = QuboBuilder()
+        self.ids = self.builder.registry.ids(
+            itertools.product(self.nodes1, self.nodes2)
+        ).reshape(len(self.nodes1), len(self.nodes2))
         self.isomorphism_is_bijective()
         self.isomorphism_respects_edges()
+        self.bqm = self.builder.to_bqm()
 
     def isomorphism_is_bijective(self):
         # For every node in graph1, there must be exactly one node in graph2
-        for node1 in self.graph1.nodes():
-            vars = [(node1, node2) for node2 in self.graph2.nodes()]
-            constraint = dimod.generators.combinations(vars, 1, strength=1)
-            self.bqm.update(constraint)
+        self.builder.add_row_combinations(self.ids, 1, strength=1)
         # For every node in graph2, there must be exactly one node in graph1
-        for node2 in self.graph2.nodes():
-            vars = [(node1, node2) for node1 in self.graph1.nodes()]
-            constraint = dimod.generators.combinations(vars, 1, strength=1)
-            self.bqm.update(constraint)
+        self.builder.add_row_combinations(self.ids.T, 1, strength=1)
 
     def isomorphism_respects_edges(self):
-        # If there is no edge (i, j) in graph1, then it must be so that there is no edge (u, v) in graph2
-        quadratic = {}
-        complete_graph = nx.complete_graph(len(self.graph1.nodes()))
-        for i, j in complete_graph.edges():
-            if (i, j) not in self.graph1.edges():
-                for u, v in self.graph2.edges():
-                    append_dict(quadratic, ((i, u), (j, v)), 1)
+        # If there is no edge (i, j) in graph1, then it must be so that there is no edge (u, v) in graph2,
+        # x_(i, u) x_(j, v) for every non-edge of graph1 and edge of graph2
+        i, j = non_edges(self.graph1, self.nodes1)
+        u, v = edges(self.graph2, self.nodes2)
+        self.builder.add_quadratic(
+            self.ids[i[:, None], u[None, :]].ravel(), self.ids[j[:, None], v[None, :]].ravel(), 1
+        )
 
         # If there is no edge (u, v) in graph2, then it must be so that there is no edge (i, j) in graph1
-        complete_graph = nx.complete_graph(len(self.graph2.nodes()))
-        for u, v in complete_graph.edges():
-            if (u, v) not in self.graph2.edges():
-                for i, j in self.graph1.edges():
-                    append_dict(quadratic, ((i, u), (j, v)), 1)
-
-        self.bqm.update(dimod.BinaryQuadraticModel({}, quadratic, 0, dimod.BINARY))
+        u, v = non_edges(self.graph2, self.nodes2)
+        i, j = edges(self.graph1, self.nodes1)
+        self.builder.add_quadratic(
+            self.ids[i[None, :], u[:, None]].ravel(), self.ids[j[None, :], v[:, None]].ravel(), 1
+        )
 
     def get_binary_polynomial(self):
         return self.bqm
@@ -1,9 +1,10 @@
 import pickle
 import networkx as nx
 import random
+from operator import itemgetter
 import matplotlib.pyplot as plt
 
-from networkx import weisfeiler_lehman_graph_hash
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
 
 random.seed(0)
 
@@ -33,25 +34,27 @@ def generate_graph_with_automorphism(n: int, p: float):
     return G, automorphism
 
 
-def generate_graphs(max_nodes=5):
+def generate_graphs(max_nodes=5, index=None):
     graphs = []
-    graph_hashes = []
+    index = GraphIndex() if index is None else index
     for n_nodes in range(3, max_nodes):
         for prob in range(4, 10):
             p = prob / 10
-            for _ in range(1000):
-                G, automorphism = generate_graph_with_automorphism(n_nodes, p)
-                graph_hash = weisfeiler_lehman_graph_hash(G)
-                if graph_hash not in graph_hashes:
-                    graph1 = G
-                    graph2 = nx.relabel_nodes(G, automorphism)
-                    graphs.append((graph1, graph2, automorphism))
-                    graph_hashes.append(graph_hash)
+            candidates = (
+                generate_graph_with_automorphism(n_nodes, p) for _ in range(1000)
+            )
+            for G, automorphism in index.add_batched(candidates, graph=itemgetter(0)):
+                graph1 = G
+                graph2 = nx.relabel_nodes(G, automorphism)
+                graphs.append((graph1, graph2, automorphism))
     return graphs
 
 
+DATA_PATH = "algorithms/graph_isomorphism/graph_isomorphism_data.pkl"
+
+
 def save_graphs(graphs):
-    with open("algorithms/graph_isomorphism/graph_isomorphism_data.pkl", "wb") as f:
+    with open(DATA_PATH, "wb") as f:
         pickle.dump(graphs, f)
 
 
@@ -70,9 +73,14 @@ def visualize_graphs(graphs):
 
 
 if __name__ == "__main__":
-    graphs = generate_graphs()
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(DATA_PATH))
+    saved = load_data_set(DATA_PATH, index)
+    graphs = generate_graphs(index=index)
 
     print(f"Generated {len(graphs)} unique graphs")
+    graphs = saved + graphs
 
     save_graphs(graphs)
+    index.save()
     visualize_graphs(graphs)
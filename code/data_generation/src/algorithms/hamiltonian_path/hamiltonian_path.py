@@ -1,7 +1,8 @@
-import dimod
+import numpy as np
 from networkx import weisfeiler_lehman_graph_hash
 from networkx.readwrite import json_graph
 
+from src.algorithms.qubo_builder import QuboBuilder, VariableRegistry
 from src.algorithms.qubo_problem import QuadradicUnconstrainedBinaryOptimization
 
 
@@ -41,34 +42,44 @@ class HamiltonianPath(QuadradicUnconstrainedBinaryOptimization):
             self.start_index = 1
 
         self.path_interval = range(self.start_index, self.end_index)
-        self.qubo = dimod.BinaryQuadraticModel.empty(dimod.BINARY)
+        # Variables are the (node, position) pairs, registered in the order
+        # in which the constraints use them
+        self.variables = VariableRegistry()
+        self.builder = QuboBuilder(self.variables)
         # These correspond to the constraints in paper https://arxiv.org/abs/1302.5843
         self.H_A()
         self.H_B()
+        self.qubo = self.builder.to_bqm()
 
     def H_A(self):
+        # Variable ids of x_(u, j), one row per node and one column per place in the path
+        ids = np.array(
+            [[self.variables.id((u, j)) for j in self.path_interval] for u in self.nodes],
+            dtype=np.int64,
+        ).reshape(len(self.nodes), len(self.path_interval))
+
         ## Every node must be visited exactly once except the start node in cycle
-        for u in self.nodes:
-            vars_i = [(u, j) for j in self.path_interval]
-            # print(vars_i)
-            bqm = dimod.generators.combinations(vars_i, 1, strength=1.0)
-            self.qubo.update(bqm)
+        self.builder.add_row_combinations(ids, 1, strength=1.0)
 
         ## Every place in the path/cycle must be occupied by exactly one node
-        for j in self.path_interval:
-            vars_j = [(u, j) for u in self.nodes]
-            # print(vars_j)
-            bqm = dimod.generators.combinations(vars_j, 1, strength=1.0)
-            self.qubo.update(bqm)
+        self.builder.add_row_combinations(ids.T, 1, strength=1.0)
 
         ## If x_(u,i) = 1 and x_(v, i + 1) = 1 then there must be an edge between u and v
-        quadratic = {}
-        for u in self.nodes:
-            for v in self.nodes:
-                if u != v and (u, v) not in self.graph.edges:
-                    for i in self.path_interval:
-                        quadratic[(u, i), (v, i + 1)] = 1
-        self.qubo.update(dimod.BinaryQuadraticModel.from_qubo(quadratic))
+        pairs = [
+            (a, b)
+            for a, u in enumerate(self.nodes)
+            for b, v in enumerate(self.nodes)
+            if u != v and (u, v) not in self.graph.edges
+        ]
+        if not pairs or len(self.path_interval) == 0:
+            return
+        # x_(v, i + 1) is the next column, except after the last place in the path
+        last_ids = np.zeros(len(self.nodes), dtype=np.int64)
+        for _, b in pairs:
+            last_ids[b] = self.variables.id((self.nodes[b], self.end_index))
+        next_ids = np.concatenate([ids[:, 1:], last_ids[:, None]], axis=1)
+        first, second = np.array(pairs, dtype=np.int64).T
+        self.builder.add_quadratic(ids[first].ravel(), next_ids[second].ravel(), 1)
 
     def H_B(self):
         # For a weighted graph, the total weight of the path/cycle should be minimal
@@ -89,7 +100,11 @@ class HamiltonianPath(QuadradicUnconstrainedBinaryOptimization):
                                 quadratic[(u, i), self.end_var] = self.graph.edges[
                                     (u, v)
                                 ]["weight"]
-            self.qubo.update(dimod.BinaryQuadraticModel.from_qubo(quadratic))
+            rows, cols = [], []
+            for first, second in quadratic:
+                rows.append(self.variables.id(first))
+                cols.append(self.variables.id(second))
+            self.builder.add_quadratic(rows, cols, list(quadratic.values()))
 
     def get_solution(self):
         solution = {}
@@ -2,10 +2,14 @@ import pickle
 import networkx as nx
 import random
 import matplotlib.pyplot as plt
-from networkx import weisfeiler_lehman_graph_hash
+
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set, tag_nodes
 
 random.seed(0)
 
+# Node attribute of the start and end node in the GraphIndex
+TERMINAL = "terminal"
+
 
 def generate_hamiltonian_graph(n: int, extra_edges: int):
     """
@@ -53,24 +57,33 @@ def generate_hamiltonian_graph(n: int, extra_edges: int):
     return G, hamiltonian_path, start_node, end_node
 
 
-def generate_graphs(max_nodes=10, extra_edges=3):
+def new_graph_index(path=None):
+    """GraphIndex of the graphs tagged by terminal_graph, loaded from path if it exists."""
+    return GraphIndex(path, node_attr=TERMINAL)
+
+
+def terminal_graph(graph_data):
+    """Graph of a (G, hamiltonian_path, start_node, end_node) tuple with the start and end tagged."""
+    G, _, start_node, end_node = graph_data
+    return tag_nodes(G, TERMINAL, {start_node: "start", end_node: "end"})
+
+
+def generate_graphs(max_nodes=10, extra_edges=3, index=None):
     graphs = []
-    generated_graphs = set()
+    index = new_graph_index() if index is None else index
     for n_nodes in range(3, max_nodes):
-        for _ in range(2000):
-            G, hamiltonian_path, start_node, end_node = generate_hamiltonian_graph(
-                n_nodes, extra_edges
-            )
-            h = (start_node, end_node, weisfeiler_lehman_graph_hash(G))
-            if h in generated_graphs:
-                continue
-            generated_graphs.add(h)
-            graphs.append((G, hamiltonian_path, start_node, end_node))
+        candidates = (
+            generate_hamiltonian_graph(n_nodes, extra_edges) for _ in range(2000)
+        )
+        graphs.extend(index.add_batched(candidates, graph=terminal_graph))
     return graphs
 
 
+DATA_PATH = "algorithms/hamiltonian_path/hamiltonian_path_data.pkl"
+
+
 def save_graphs(graphs):
-    with open("algorithms/hamiltonian_path/hamiltonian_path_data.pkl", "wb") as f:
+    with open(DATA_PATH, "wb") as f:
         pickle.dump(graphs, f)
 
 
@@ -104,7 +117,13 @@ def visualize_graphs(graphs):
 
 
 if __name__ == "__main__":
-    graphs = generate_graphs()
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = new_graph_index(index_path(DATA_PATH))
+    saved = load_data_set(DATA_PATH, index)
+    graphs = generate_graphs(index=index)
     print(f"Generated {len(graphs)} graphs with Hamiltonian paths")
+    graphs = saved + graphs
+    # The data set and its index are saved together
     # save_graphs(graphs)
+    # index.save()
     visualize_graphs(graphs)
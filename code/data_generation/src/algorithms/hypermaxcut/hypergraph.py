@@ -43,22 +43,46 @@ class Hypergraph:
         self.hyperedges = [set(edge) for edge in state["hyperedges"]]
         self.n_nodes = len(self.nodes)
 
-def generate_random_hypergraph(num_nodes: int, num_hyperedges: int, max_edge_size: int) -> Hypergraph:
+def mask_to_hyperedge(mask: int) -> Set[int]:
+    """Nodes of a hyperedge stored as a bitmask, bit v set for node v."""
+    return {node for node in range(mask.bit_length()) if mask >> node & 1}
+
+
+def generate_random_hyperedges(
+    num_nodes: int, num_hyperedges: int, max_edge_size: int, rng=random
+) -> List[int]:
+    """
+    Hyperedges of a random hypergraph on the nodes range(num_nodes) as
+    bitmasks, so that a subset test is a single and: mask & h == mask.
+    """
     nodes = list(range(num_nodes))
     hyperedges = []
 
     for _ in range(num_hyperedges):
-        edge_size = random.randint(2, max_edge_size)
-        hyperedge = set(random.sample(nodes, edge_size))
+        edge_size = rng.randint(2, max_edge_size)
+        hyperedge = 0
+        for node in rng.sample(nodes, edge_size):
+            hyperedge |= 1 << node
         # Check that the hyperedge is not a subset of any other hyperedge
-        if not any(hyperedge.issubset(h) or h.issubset(hyperedge) for h in hyperedges):
+        if not any(
+            hyperedge & h == hyperedge or hyperedge & h == h for h in hyperedges
+        ):
             hyperedges.append(hyperedge)
-    
+
     # Verify that every node is in at least one hyperedge
+    covered = 0
+    for h in hyperedges:
+        covered |= h
     for node in nodes:
-        if not any(node in h for h in hyperedges):
-            node2 = random.choice([n for n in nodes if n!=node])
-            hyperedge = set([node, node2])
+        if not covered >> node & 1:
+            node2 = rng.choice([n for n in nodes if n != node])
+            hyperedge = 1 << node | 1 << node2
             hyperedges.append(hyperedge)
+            covered |= hyperedge
+
+    return hyperedges
 
-    return Hypergraph(nodes, hyperedges)
\ No newline at end of file
+
+def generate_random_hypergraph(num_nodes: int, num_hyperedges: int, max_edge_size: int) -> Hypergraph:
+    hyperedges = generate_random_hyperedges(num_nodes, num_hyperedges, max_edge_size)
+    return Hypergraph(list(range(num_nodes)), [mask_to_hyperedge(h) for h in hyperedges])
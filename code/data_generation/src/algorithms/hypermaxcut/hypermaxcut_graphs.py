@@ -1,21 +1,104 @@
-import itertools
 import pickle
+import random
+
 import networkx as nx
-from src.algorithms.hypermaxcut.hypergraph import generate_random_hypergraph
 
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
+from src.algorithms.hypermaxcut.hypergraph import (
+    Hypergraph,
+    generate_random_hyperedges,
+    mask_to_hyperedge,
+)
+from src.parallel import pool_map
+
+
+def _generate_shard(args):
+    """
+    Signatures (n_nodes, sorted hyperedge bitmasks) and incidence graphs of
+    the random hypergraphs with n_nodes nodes and n_hyperedges hyperedges,
+    for every maximal edge size. Every grid point has its own random
+    generator seeded from the grid point, so the result does not depend on
+    the sharding.
+    """
+    seed, n_nodes, n_hyperedges = args
+    signatures = []
+    for max_edge_size in range(2, n_nodes):
+        rng = random.Random(f"{seed}_{n_nodes}_{n_hyperedges}_{max_edge_size}")
+        hyperedges = generate_random_hyperedges(n_nodes, n_hyperedges, max_edge_size, rng)
+        signature = (n_nodes, tuple(sorted(hyperedges)))
+        signatures.append((signature, incidence_graph(*signature)))
+    return signatures
+
+
+def incidence_graph(n_nodes, hyperedges):
+    """
+    Bipartite graph of the nodes and the hyperedges given as bitmasks, with
+    an edge from every hyperedge to each of its nodes. Two hypergraphs are
+    isomorphic exactly if their incidence graphs are isomorphic with an
+    isomorphism that preserves the "kind" of every vertex.
+    """
+    graph = nx.Graph()
+    graph.add_nodes_from(range(n_nodes), kind="node")
+    for i, mask in enumerate(hyperedges):
+        graph.add_node(n_nodes + i, kind="hyperedge")
+        graph.add_edges_from((n_nodes + i, node) for node in mask_to_hyperedge(mask))
+    return graph
+
+
+def incidence_invariant(graph, node_attr=None, edge_attr=None):
+    """
+    Degrees of the nodes, and of the nodes of every hyperedge, of an
+    incidence graph. A GraphIndex hash that is much cheaper than the WL hash
+    and separates almost all random hypergraphs as well.
+    """
+    degree = graph.degree
+    node_degrees = []
+    hyperedge_degrees = []
+    for vertex, kind in graph.nodes(data="kind"):
+        if kind == "node":
+            node_degrees.append(degree[vertex])
+        else:
+            hyperedge_degrees.append(tuple(sorted(degree[node] for node in graph[vertex])))
+    return tuple(sorted(node_degrees)), tuple(sorted(hyperedge_degrees))
+
+
+def new_graph_index(path=None):
+    """GraphIndex of incidence graphs, loaded from path if it exists."""
+    return GraphIndex(path, node_attr="kind", graph_hash=incidence_invariant)
+
+
+def generate_hypergraphs(
+    min_num_nodes=3, max_num_nodes=15, n_workers=None, seed=42, index=None
+):
+    """
+    Random hypergraphs over the grid of node counts, hyperedge counts and
+    maximal edge sizes, unique up to relabelling the nodes.
+
+    The grid is generated in shards of one node and hyperedge count with
+    pool_map in n_workers processes. Identical signatures are merged first, then hypergraphs
+    isomorphic to an earlier one or to one in the GraphIndex of their
+    incidence graphs are dropped.
+    """
+    shards = [
+        (seed, n_nodes, n_hyperedges)
+        for n_nodes in range(min_num_nodes, max_num_nodes)
+        for n_hyperedges in range(1, n_nodes * (n_nodes - 1) // 2)
+    ]
+    results = pool_map(_generate_shard, shards, n_workers)
 
-def generate_hypergraphs(min_num_nodes=3, max_num_nodes=15):
-    existing_hypergraphs = set()
-    for n_nodes in range(min_num_nodes, max_num_nodes):
-        max_num_hyperedges = n_nodes * (n_nodes - 1) // 2
-        for n_hyperedges in range(1, max_num_hyperedges):
-            for max_edge_size in range(2, n_nodes):
-                random_hypergraph = generate_random_hypergraph(
-                    n_nodes, n_hyperedges, max_edge_size
-                )
-                if random_hypergraph not in existing_hypergraphs:
-                    existing_hypergraphs.add(random_hypergraph)
-    return existing_hypergraphs
+    # Shards come back in grid order, the first hypergraph of every class is kept
+    graphs = {}
+    for shard in results:
+        for signature, graph in shard:
+            graphs.setdefault(signature, graph)
+    if index is None:
+        index = new_graph_index()
+    added = index.add_many(list(graphs.values()), n_workers=n_workers)
+    return {
+        Hypergraph(list(range(n_nodes)), [mask_to_hyperedge(h) for h in hyperedges])
+        for (n_nodes, hyperedges), new in zip(graphs, added)
+        if new
+    }
 
 
 def save_graphs(graphs, filename):
@@ -26,6 +109,12 @@ def save_graphs(graphs, filename):
 
 if __name__ == "__main__":
     min_num_nodes, max_num_nodes = 3, 18
-    graphs = generate_hypergraphs(min_num_nodes, max_num_nodes)
+    data_path = "algorithms/hypermaxcut/hypermaxcut_data.pkl"
+    # Hypergraphs of earlier runs are skipped, the new ones extend their data set
+    index = new_graph_index(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    graphs = generate_hypergraphs(min_num_nodes, max_num_nodes, index=index)
     print(f"Generated {len(graphs)} unique graphs")
-    save_graphs(graphs, "algorithms/hypermaxcut/hypermaxcut_data.pkl")
+    graphs = graphs.union(saved)
+    save_graphs(graphs, data_path)
+    index.save()
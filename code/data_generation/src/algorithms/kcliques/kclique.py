@@ -1,6 +1,6 @@
-import dimod
 import networkx as nx
 
+from src.algorithms.qubo_builder import QuboBuilder
 from src.algorithms.qubo_problem import QuadradicUnconstrainedBinaryOptimization
 
 
@@ -11,28 +11,28 @@ class KClique(QuadradicUnconstrainedBinaryOptimization):
         if coclique:
             self.graph = nx.complement(graph)
         self.k = k
-        self.qubo = dimod.BinaryQuadraticModel(dimod.BINARY)
         self.variables = list(self.graph.nodes)
+        builder = QuboBuilder()
+        ids = builder.registry.ids(self.variables)
 
         # Ensure A > K*B
         self.B = 1
         self.A = self.k * self.B + 1
 
         ## Aim to select k nodes
-        Ha = dimod.generators.combinations(self.variables, self.k, strength=1.0)
-        Ha.scale(self.A)
-        self.qubo.update(Ha)
+        builder.add_combinations(ids, self.k, strength=1.0)
+        builder.scale(self.A)
 
         ## Aim to select n(n - 1)/2 edges, i.e., all edges between the k nodes
         n_edges = self.B * (self.k * (self.k - 1) / 2)
-        edge_variable_pairs = [(edge[0], edge[1], -1.0) for edge in self.graph.edges]
-        Hb = dimod.BinaryQuadraticModel(dimod.BINARY)
-        Hb.add_interactions_from(edge_variable_pairs)
-        Hb.scale(self.B)
-        Hb.offset = n_edges
+        edges = builder.registry.ids(
+            node for edge in self.graph.edges for node in edge
+        ).reshape(-1, 2)
+        builder.add_quadratic(edges[:, 0], edges[:, 1], -1.0 * self.B)
+        builder.offset += n_edges
 
         # Final Hamiltonian
-        self.qubo.update(Hb)
+        self.qubo = builder.to_bqm()
 
     def get_binary_polynomial(self):
         return self.qubo
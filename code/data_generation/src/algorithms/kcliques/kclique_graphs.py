@@ -1,9 +1,10 @@
 import random
-from networkx import weisfeiler_lehman_graph_hash
 from matplotlib import pyplot as plt
 import networkx as nx
 import pickle
 
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
+
 random.seed(3)
 
 
@@ -58,43 +59,52 @@ def add_random_nodes_and_edges(graph, k, num_additional_nodes):
     return graph
 
 
-def generate_kclique_data_set(max_k=5):
+def generate_candidate_graphs(k, num_additional_nodes, n_rounds=1000):
+    """
+    Yield the connected graphs with a k-clique of n_rounds rounds, each of which
+    adds random nodes and edges to a k-clique and draws a random clique graph.
+
+    Parameters:
+        k (int): Size of the clique.
+        num_additional_nodes (int): Number of nodes besides the clique.
+        n_rounds (int): Number of rounds.
+    """
+    for _ in range(n_rounds):
+        # Add random nodes and edges to a complete graph of size k
+        graph = add_random_nodes_and_edges(nx.complete_graph(k), k, num_additional_nodes)
+
+        # Remove self-loops and check connectivity
+        if nx.is_connected(graph):
+            graph.remove_edges_from(nx.selfloop_edges(graph))
+            yield graph
+
+        # Generate another graph with random nodes and edges
+        graph2 = generate_clique_graph(k, k + num_additional_nodes, 0.1)
+        if nx.is_connected(graph2):
+            yield graph2
+
+
+def generate_kclique_data_set(max_k=5, index=None):
     """
     Generate a dataset of graphs with k-sized cliques.
 
     Parameters:
         max_k (int): Maximum size of the clique.
+        index (GraphIndex): Graphs isomorphic to one in it are skipped, a new index by default.
 
     Returns:
         set: A set of tuples containing the graph, the complete graph, and the size of the clique.
     """
     graphs = set()
-    graph_already_generated = set()
+    index = GraphIndex() if index is None else index
 
     for k in range(3, max_k + 1):
+        complete_graph = nx.complete_graph(k)
         for num_additional_nodes in range(2, 4):
-            for _ in range(1000):
-                # Create a complete graph of size k
-                complete_graph = nx.complete_graph(k)
-                graph = complete_graph.copy()
-
-                # Add random nodes and edges to the graph
-                graph = add_random_nodes_and_edges(graph, k, num_additional_nodes)
-
-                # Remove self-loops and check connectivity
-                if nx.is_connected(graph):
-                    graph.remove_edges_from(nx.selfloop_edges(graph))
-                    whash = weisfeiler_lehman_graph_hash(graph)
-                    if whash not in graph_already_generated:
-                        graph_already_generated.add(whash)
-                        graphs.add((graph, complete_graph, k))
-
-                # Generate another graph with random nodes and edges
-                graph2 = generate_clique_graph(k, k + num_additional_nodes, 0.1)
-                whash2 = weisfeiler_lehman_graph_hash(graph2)
-                if whash2 not in graph_already_generated and nx.is_connected(graph2):
-                    graph_already_generated.add(whash2)
-                    graphs.add((graph2, complete_graph, k))
+            candidates = generate_candidate_graphs(k, num_additional_nodes)
+            graphs.update(
+                (graph, complete_graph, k) for graph in index.add_batched(candidates)
+            )
 
     return graphs
 
@@ -130,9 +140,15 @@ def save_graph_figures(graphs, output_dir, num_samples=10):
 
 if __name__ == "__main__":
     max_k = 5
-    graphs = list(generate_kclique_data_set(max_k))
+    data_path = "algorithms/kcliques/kclique_data.pkl"
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    graphs = list(generate_kclique_data_set(max_k, index=index))
 
     print("Number of graphs: ", len(graphs))
+    graphs = saved + graphs
 
-    save_graphs_to_file(graphs, "algorithms/kcliques/kclique_data.pkl")
+    save_graphs_to_file(graphs, data_path)
+    index.save()
     save_graph_figures(graphs, "algorithms/kcliques/figures")
@@ -1,8 +1,11 @@
-import dimod
+from collections import defaultdict
+
 import networkx as nx
+import numpy as np
 from networkx import weisfeiler_lehman_graph_hash
 from networkx.readwrite import json_graph
 
+from src.algorithms.qubo_builder import QuboBuilder
 from src.algorithms.qubo_problem import QuadradicUnconstrainedBinaryOptimization
 
 
@@ -16,32 +19,33 @@ class Matching(QuadradicUnconstrainedBinaryOptimization):
         self.edges = set(tuple(sorted([edge[0], edge[1]])) for edge in graph.edges())
         self.nodes = set(graph.nodes())
         self.matching = matching
-        self.qubo = dimod.BinaryQuadraticModel(dimod.BINARY)
         self.build_qubo()
 
     def build_qubo(self):
         B = 1
         A = len(self.graph.nodes) * B + 1
+        # Variables are the edges as sorted node pairs
+        builder = QuboBuilder()
 
+        # Adjacent edge ids of every node, grouped by degree so that the
+        # constraints of all nodes of the same degree are added at once
+        adjacent_ids = defaultdict(list)
         for node in self.graph.nodes:
             adjacent_edges = self.graph.edges(node)
             adjacent_edges = set(
                 tuple(sorted([edge[0], edge[1]])) for edge in adjacent_edges
             )
-            # Select one edge from the adjacent edges
             if len(adjacent_edges) > 0:
-                bqm = dimod.generators.combinations(adjacent_edges, 1, strength=1.0)
-                self.qubo.update(bqm)
-        self.qubo.scale(A)
+                adjacent_ids[len(adjacent_edges)].append(builder.registry.ids(adjacent_edges))
+        # Select one edge from the adjacent edges
+        for ids in adjacent_ids.values():
+            builder.add_row_combinations(np.stack(ids), 1, strength=1.0)
+        builder.scale(A)
 
-        Hb = dimod.BinaryQuadraticModel(dimod.BINARY)
-        for edge in self.edges:
-            if "weight" in self.graph.edges[edge]:
-                Hb.add_variable(edge, self.graph.edges[edge]["weight"])
-            else:
-                Hb.add_variable(edge, 1)
-        Hb.scale(B)
-        self.qubo.update(Hb)
+        edges = list(self.edges)
+        weights = [self.graph.edges[edge].get("weight", 1) for edge in edges]
+        builder.add_linear(builder.registry.ids(edges), np.multiply(weights, B))
+        self.qubo = builder.to_bqm()
 
     def get_binary_polynomial(self):
         return self.qubo
@@ -1,9 +1,10 @@
 import pickle
 import networkx as nx
 import random
+from operator import itemgetter
 import matplotlib.pyplot as plt
-from networkx import weisfeiler_lehman_graph_hash
 
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
 from src.data_classes import MatchingType
 
 random.seed(0)
@@ -176,7 +177,7 @@ def generate_bipartite_graph_with_matching(
     return G, matching_edges, left_nodes, right_nodes
 
 
-def generate_graphs(max_nodes=10, extra_edges=5):
+def generate_graphs(max_nodes=10, extra_edges=5, index=None):
     """
     Generate a collection of graphs with different types of matchings.
 
@@ -185,87 +186,88 @@ def generate_graphs(max_nodes=10, extra_edges=5):
     - The matching edges
     - Type of matching
     - Additional info specific to the graph type
+
+    Graphs isomorphic to one already in the GraphIndex are left out.
     """
     graphs = []
-    generated_graphs = set()
+    index = GraphIndex() if index is None else index
 
     # Generate regular graphs with matchings
     for n_nodes in range(4, max_nodes + 1):
         # Generate perfect matchings for even n
         if n_nodes % 2 == 0:
-            for _ in range(50):
-                G, matching = generate_graph_with_matching(
-                    n_nodes, MatchingType.PERFECT, extra_edges
-                )
-                h = weisfeiler_lehman_graph_hash(G)
-                if h in generated_graphs:
-                    continue
-                generated_graphs.add(h)
-                graphs.append((G, matching, MatchingType.PERFECT, {"n": n_nodes}))
+            candidates = (
+                generate_graph_with_matching(n_nodes, MatchingType.PERFECT, extra_edges)
+                for _ in range(50)
+            )
+            graphs.extend(
+                (G, matching, MatchingType.PERFECT, {"n": n_nodes})
+                for G, matching in index.add_batched(candidates, graph=itemgetter(0))
+            )
 
         # Generate near-perfect matchings for odd n
         if n_nodes % 2 == 1 and n_nodes > 3:
-            for _ in range(50):
-                G, matching = generate_graph_with_matching(
-                    n_nodes, MatchingType.NEAR_PERFECT, extra_edges
-                )
-                h = weisfeiler_lehman_graph_hash(G)
-                if h in generated_graphs:
-                    continue
-                generated_graphs.add(h)
-                graphs.append((G, matching, MatchingType.NEAR_PERFECT, {"n": n_nodes}))
+            candidates = (
+                generate_graph_with_matching(n_nodes, MatchingType.NEAR_PERFECT, extra_edges)
+                for _ in range(50)
+            )
+            graphs.extend(
+                (G, matching, MatchingType.NEAR_PERFECT, {"n": n_nodes})
+                for G, matching in index.add_batched(candidates, graph=itemgetter(0))
+            )
 
         # Generate maximum matchings for all n
-        for _ in range(50):
-            G, matching = generate_graph_with_matching(
-                n_nodes, MatchingType.MAXIMUM, extra_edges
-            )
-            h = weisfeiler_lehman_graph_hash(G)
-            if h in generated_graphs:
-                continue
-            generated_graphs.add(h)
-            graphs.append((G, matching, MatchingType.MAXIMUM, {"n": n_nodes}))
+        candidates = (
+            generate_graph_with_matching(n_nodes, MatchingType.MAXIMUM, extra_edges)
+            for _ in range(50)
+        )
+        graphs.extend(
+            (G, matching, MatchingType.MAXIMUM, {"n": n_nodes})
+            for G, matching in index.add_batched(candidates, graph=itemgetter(0))
+        )
 
     # Generate bipartite graphs with matchings
     for n_left in range(3, max_nodes):
         for n_right in range(3, max_nodes):
             # Generate perfect matchings for bipartite graphs with equal partitions
             if n_left == n_right:
-                for _ in range(50):
-                    G, matching, left, right = generate_bipartite_graph_with_matching(
+                candidates = (
+                    generate_bipartite_graph_with_matching(
                         n_left, n_right, MatchingType.PERFECT, extra_edges
                     )
-                    h = weisfeiler_lehman_graph_hash(G)
-                    if h in generated_graphs:
-                        continue
-                    generated_graphs.add(h)
-                    graphs.append(
-                        (
-                            G,
-                            matching,
-                            "perfect_bipartite",
-                            {"left_nodes": left, "right_nodes": right},
-                        )
-                    )
-
-            # Generate maximum matchings for bipartite graphs
-            for _ in range(50):
-                G, matching, left, right = generate_bipartite_graph_with_matching(
-                    n_left, n_right, MatchingType.MAXIMUM, extra_edges
+                    for _ in range(50)
                 )
-                h = weisfeiler_lehman_graph_hash(G)
-                if h in generated_graphs:
-                    continue
-                generated_graphs.add(h)
-                graphs.append(
+                graphs.extend(
                     (
                         G,
                         matching,
-                        "maximum_bipartite",
+                        "perfect_bipartite",
                         {"left_nodes": left, "right_nodes": right},
                     )
+                    for G, matching, left, right in index.add_batched(
+                        candidates, graph=itemgetter(0)
+                    )
                 )
 
+            # Generate maximum matchings for bipartite graphs
+            candidates = (
+                generate_bipartite_graph_with_matching(
+                    n_left, n_right, MatchingType.MAXIMUM, extra_edges
+                )
+                for _ in range(50)
+            )
+            graphs.extend(
+                (
+                    G,
+                    matching,
+                    "maximum_bipartite",
+                    {"left_nodes": left, "right_nodes": right},
+                )
+                for G, matching, left, right in index.add_batched(
+                    candidates, graph=itemgetter(0)
+                )
+            )
+
     return graphs
 
 
@@ -378,13 +380,19 @@ def verify_matchings(graphs):
 
 
 if __name__ == "__main__":
-    graphs = generate_graphs(max_nodes=10, extra_edges=5)
+    data_path = "algorithms/matching/matching_graphs_data.pkl"
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    graphs = generate_graphs(max_nodes=10, extra_edges=5, index=index)
     print(f"Generated {len(graphs)} graphs with various matchings")
+    graphs = saved + graphs
 
     # Verify the matchings
     verification = verify_matchings(graphs)
     print(f"Verification results: {verification}")
 
     # Save and visualize
-    save_graphs(graphs, "algorithms/matching/matching_graphs_data.pkl")
+    save_graphs(graphs, data_path)
+    index.save()
     visualize_graphs(graphs, "algorithms/matching/figures")
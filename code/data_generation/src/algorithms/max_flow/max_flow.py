@@ -1,43 +1,37 @@
 import itertools
-import dimod
 from networkx import weisfeiler_lehman_graph_hash
 import numpy as np
 from networkx.readwrite import json_graph
 
+from src.algorithms.qubo_builder import QuboBuilder, VariableRegistry
+
 # https://ieeexplore.ieee.org/document/9224181
 
 
-def multiply_polynomials(poly1, poly2):
+def binary_expansion_weights(capacities):
     """
-    Multiply two polynomials represented as dictionaries.
+    Weights of the binary variables that encode an integer between 0 and the
+    capacity, for all capacities at once.
 
-    Parameters:
-    - poly1: Dictionary where keys are exponents and values are coefficients
-    - poly2: Dictionary where keys are exponents and values are coefficients
+    An integer up to c is encoded with M + 1 bits, M = floor(log2(c)), with
+    weights 2^0, ..., 2^(M - 1) and c + 1 - 2^M.
 
     Returns:
-    - Dictionary representing the product polynomial
+    - Array of shape (len(capacities), max(M) + 1), row e holds the weights of
+      the M_e + 1 bits of capacity e followed by zeros
+    - Array with the number of bits M_e + 1 of every capacity
     """
-    result = {}
-
-    for var1, coef1 in poly1.items():
-        for var2, coef2 in poly2.items():
-            if var1 == var2:
-                new_var = (var1,)
-            else:
-                new_var = ((var1,), (var2,))
-
-            new_coef = coef1 * coef2
-
-            if new_var in result:
-                result[new_var] = result[new_var] + new_coef
-            else:
-                result[new_var] = new_coef
+    capacities = np.asarray(capacities, dtype=np.int64)
+    M = np.floor(np.log2(capacities)).astype(np.int64)
+    bits = np.arange(M.max() + 1 if len(M) else 0)
+    weights = np.where(bits < M[:, None], 2.0**bits, 0.0)
+    weights[np.arange(len(M)), M] = capacities + 1 - 2**M
+    return weights, M + 1
 
-    # Remove terms with zero coefficients
-    result = {var: coef for var, coef in result.items() if coef != 0}
 
-    return result
+def _variable_label(key):
+    # Bit i of the flow on edge (u, v) is the variable (((u, v), i),)
+    return (key,)
 
 
 class MaxFlow:
@@ -51,9 +45,6 @@ class MaxFlow:
         # The integer programming program where the variables are integers
         self.integer_programming_program = {}
 
-        # The binary quadratic model where the variables are binary
-        self.bqm = dimod.BinaryQuadraticModel(dimod.BINARY)
-
         # Sum the capacities of all outgoing edges from the source node
         self.alpha_c = 1 / sum(
             [
@@ -64,77 +55,91 @@ class MaxFlow:
 
         self.constraint_of_nonaccumulation_integer()
         self.maximize_flow_integer()
-        self.integer_program_to_binary_quadratic()
+        # The binary quadratic model where the variables are binary
+        self.bqm = self.integer_program_to_binary_quadratic()
+
+    def _add_integer_term(self, int_var1, int_var2, coeff):
+        key = (int_var1, int_var2)
+        self.integer_programming_program[key] = (
+            self.integer_programming_program.get(key, 0) + coeff
+        )
 
     def constraint_of_nonaccumulation_integer(self):
         for node in self.graph.nodes():
             if node != self.source and node != self.sink:
                 # Every variable has the assigend capacity of the edge,
-                # then the integer variable encodes the fact how much of this capacity is used in the flow
-                incoming_edges = list(self.graph.in_edges(node, data=True))
-                outgoing_edges = list(self.graph.out_edges(node, data=True))
-                all_edges = incoming_edges + outgoing_edges
-                all_variables = list(itertools.combinations(all_edges, 2)) + [
-                    (x, x) for x in all_edges
+                # then the integer variable encodes the fact how much of this capacity is used in the flow.
+                # (sum_in f - sum_out f)^2, the sign is +1 for incoming and -1 for outgoing edges
+                int_vars = [
+                    (u, v, data["capacity"])
+                    for u, v, data in self.graph.in_edges(node, data=True)
                 ]
-                for var1, var2 in all_variables:
-                    int_var1 = (var1[0], var1[1], var1[2]["capacity"])
-                    int_var2 = (var2[0], var2[1], var2[2]["capacity"])
-
-                    if (int_var1, int_var2) not in self.integer_programming_program:
-                        self.integer_programming_program[(int_var1, int_var2)] = 0
-
-                    if int_var1 == int_var2:
-                        self.integer_programming_program[(int_var1, int_var2)] += 1
-                    elif var1 in incoming_edges and var2 in incoming_edges:
-                        self.integer_programming_program[(int_var1, int_var2)] += 2
-                    elif var1 in outgoing_edges and var2 in outgoing_edges:
-                        self.integer_programming_program[(int_var1, int_var2)] += 2
-                    else:
-                        self.integer_programming_program[(int_var1, int_var2)] -= 2
+                signs = [1] * len(int_vars)
+                int_vars += [
+                    (u, v, data["capacity"])
+                    for u, v, data in self.graph.out_edges(node, data=True)
+                ]
+                signs += [-1] * (len(int_vars) - len(signs))
+
+                for a, b in itertools.combinations(range(len(int_vars)), 2):
+                    self._add_integer_term(int_vars[a], int_vars[b], 2 * signs[a] * signs[b])
+                for int_var in int_vars:
+                    self._add_integer_term(int_var, int_var, 1)
 
     def maximize_flow_integer(self):
         for source, target, capacity in self.graph.out_edges(self.source, data=True):
             var = (source, target, capacity["capacity"])
-            if (var, var) not in self.integer_programming_program:
-                self.integer_programming_program[(var, var)] = 0
-            self.integer_programming_program[(var, var)] -= self.alpha_c
+            self._add_integer_term(var, var, -self.alpha_c)
 
     def get_integer_program(self):
         return self.integer_programming_program
 
-    def integer_var_to_bin_vars(self, var, limit):
-        M = int(np.floor(np.log2(limit)))
-        linear = {}
-        for i in range(M):
-            linear[(var, i)] = 2**i
-        linear[(var, M)] = limit + 1 - 2**M
-        return linear
-
     def integer_program_to_binary_quadratic(self):
+        """
+        Substitute the binary expansion of every integer variable into the
+        integer program. The product of two integer variables becomes the
+        outer product of their bit weights, which is computed for all terms
+        at once and emitted as a single BQM.
+        """
+        int_vars = list(
+            dict.fromkeys(itertools.chain.from_iterable(self.integer_programming_program))
+        )
+        index = {int_var: e for e, int_var in enumerate(int_vars)}
+        weights, n_bits = binary_expansion_weights([int_var[2] for int_var in int_vars])
+        edges = [(int_var[0], int_var[1]) for int_var in int_vars]
+
+        # Variables in the order in which the term by term expansion adds them:
+        # the first bit of the first integer, the bits of the second and then
+        # the remaining bits of the first
+        registry = VariableRegistry(_variable_label)
         for int_var1, int_var2 in self.integer_programming_program:
-            term = dimod.BinaryQuadraticModel(dimod.BINARY)
-            coeff = self.integer_programming_program[(int_var1, int_var2)]
-
-            var1 = (int_var1[0], int_var1[1])
-            capacity1 = int_var1[2]
-
-            var2 = (int_var2[0], int_var2[1])
-            capacity2 = int_var2[2]
-
-            linear1 = self.integer_var_to_bin_vars(var1, capacity1)
-            linear2 = self.integer_var_to_bin_vars(var2, capacity2)
-            linear = multiply_polynomials(linear1, linear2)
-
-            for bin_var in linear:
-                if linear[bin_var] > 0:
-                    if len(bin_var) == 2:
-                        term.add_interaction(bin_var[0], bin_var[1], linear[bin_var])
-                    else:
-                        term.add_variable(bin_var, linear[bin_var])
-
-            term.scale(coeff)
-            self.bqm.update(term)
+            e1, e2 = index[int_var1], index[int_var2]
+            registry.id((edges[e1], 0))
+            if e1 != e2:
+                registry.ids((edges[e2], i) for i in range(n_bits[e2]))
+            registry.ids((edges[e1], i) for i in range(1, n_bits[e1]))
+        ids = np.zeros(weights.shape, dtype=np.int64)
+        for e, edge in enumerate(edges):
+            ids[e, : n_bits[e]] = registry.ids((edge, i) for i in range(n_bits[e]))
+
+        first, second = (
+            np.array(
+                [[index[var1], index[var2]] for var1, var2 in self.integer_programming_program],
+                dtype=np.int64,
+            )
+            .reshape(-1, 2)
+            .T
+        )
+        coeffs = np.array(list(self.integer_programming_program.values()), dtype=float)
+        # (terms, bits, bits) coupling tensor, x * x = x for equal bits of the same integer
+        biases = (weights[first][:, :, None] * weights[second][:, None, :]) * coeffs[:, None, None]
+        used = (weights[first][:, :, None] > 0) & (weights[second][:, None, :] > 0)
+        rows = np.broadcast_to(ids[first][:, :, None], biases.shape)
+        cols = np.broadcast_to(ids[second][:, None, :], biases.shape)
+
+        builder = QuboBuilder(registry)
+        builder.add_quadratic(rows[used], cols[used], biases[used])
+        return builder.to_bqm()
 
     def get_binary_polynomial(self):
         return self.bqm
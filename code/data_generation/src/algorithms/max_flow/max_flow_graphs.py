@@ -2,10 +2,14 @@ import pickle
 import networkx as nx
 import random
 import matplotlib.pyplot as plt
-from networkx import weisfeiler_lehman_graph_hash
+
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set, tag_nodes
 
 random.seed(0)
 
+# Node attribute of the source and sink in the GraphIndex
+TERMINAL = "terminal"
+
 def generate_flow_network(n_nodes: int, edge_density: float = 0.3, max_capacity: int = 20):
     """
     Generates a flow network with specified properties.
@@ -74,7 +78,40 @@ def generate_flow_with_cuts(G, source, sink):
     
     return flow_dict, cut_value, cut_edges
 
-def generate_networks(max_nodes=10, num_networks=100):
+def new_graph_index(path=None):
+    """GraphIndex of the networks tagged by terminal_graph, loaded from path if it exists."""
+    return GraphIndex(path, node_attr=TERMINAL)
+
+def terminal_graph(network):
+    """Undirected graph of a (G, source, sink, ...) network with the source and sink tagged."""
+    G, source, sink = network[:3]
+    return tag_nodes(G.to_undirected(), TERMINAL, {source: "source", sink: "sink"})
+
+def generate_connected_networks(n_nodes, num_networks):
+    """
+    Yield up to num_networks connected flow networks with n_nodes nodes and a
+    positive maximum flow, as (G, source, sink, max_flow_value).
+    """
+    for _ in range(num_networks):
+        edge_density = random.uniform(0.2, 0.4)
+        max_capacity = random.randint(2, 7)
+        
+        max_flow_value = 0
+        i = 0
+        while max_flow_value == 0 and i < 10:
+            G, source, sink, max_flow_value = generate_flow_network(n_nodes, edge_density, max_capacity)
+            i += 1
+        
+        if max_flow_value == 0:
+            continue
+
+        # Skip networks that are not connected
+        if not nx.is_connected(G.to_undirected()):
+            continue
+
+        yield G, source, sink, max_flow_value
+
+def generate_networks(max_nodes=10, num_networks=100, index=None):
     """
     Generate a collection of flow networks with different properties.
     
@@ -87,35 +124,17 @@ def generate_networks(max_nodes=10, num_networks=100):
     - Cut value
     - Cut edges
     - Network type
+
+    Networks whose undirected graph is isomorphic to one in the GraphIndex,
+    by an isomorphism that maps the source onto the source and the sink onto
+    the sink, are skipped.
     """
     networks = []
-    generated_networks = set()
+    index = new_graph_index() if index is None else index
     
     for n_nodes in range(2, max_nodes + 1, 1):
-        for _ in range(num_networks):
-            edge_density = random.uniform(0.2, 0.4)
-            max_capacity = random.randint(2, 7)
-            
-            max_flow_value = 0
-            i = 0
-            while max_flow_value == 0 and i < 10:
-                G, source, sink, max_flow_value = generate_flow_network(n_nodes, edge_density, max_capacity)
-                i += 1
-            
-            if max_flow_value == 0:
-                continue
-
-            # Skip networks that are not connected
-            if not nx.is_connected(G.to_undirected()):
-                continue
-            
-            h = weisfeiler_lehman_graph_hash(G.to_undirected()) + f"_{source}_{sink}"
-            
-            if h in generated_networks:
-                continue
-            
-            generated_networks.add(h)
-            
+        candidates = generate_connected_networks(n_nodes, num_networks)
+        for G, source, sink, max_flow_value in index.add_batched(candidates, graph=terminal_graph):
             flow_dict, cut_value, cut_edges = generate_flow_with_cuts(G, source, sink)
             
             networks.append((
@@ -216,8 +235,13 @@ def analyze_networks(networks):
     return analysis
 
 if __name__ == "__main__":
-    networks = generate_networks(max_nodes=6, num_networks=100000)
+    data_path = "algorithms/max_flow/max_flow_data.pkl"
+    # Networks of earlier runs are skipped, the new ones extend their data set
+    index = new_graph_index(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    networks = generate_networks(max_nodes=6, num_networks=100000, index=index)
     print(f"Generated {len(networks)} flow networks with various properties")
+    networks = saved + networks
     
     # Verify the networks
     verification = verify_networks(networks)
@@ -228,5 +252,6 @@ if __name__ == "__main__":
     print(f"Network analysis: {analysis}")
     
     # Save and visualize
-    save_networks(networks, "algorithms/max_flow/max_flow_data.pkl")
+    save_networks(networks, data_path)
+    index.save()
     visualize_networks(networks, "algorithms/max_flow/figures")
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Array based construction of QUBO formulations.
+
+The formulations name their binary variables with readable labels, e.g.
+("edge((0, 1))", "level(2)"). Building the BinaryQuadraticModel term by term
+from dicts keyed by such labels creates and hashes the labels in every
+constraint and merges many small models. Instead, VariableRegistry maps the
+structured key of every variable to a dense integer id once, the constraint
+builders emit their terms as id and bias arrays into a QuboBuilder, and the
+model is created in one step with BinaryQuadraticModel.from_numpy_vectors.
+The readable labels are only kept as a side table and become the variables
+of the model, so the variable order (first registration) and the resulting
+variables_to_qubits mapping are the same as for the dict based construction.
+"""
+
+import dimod
+import numpy as np
+
+
+class VariableRegistry:
+    """
+    Dense integer ids of the variables of a formulation, in registration order.
+
+    Attributes:
+        labels (list): Readable label of every id, the variable names in the model.
+        label_function: Maps a key to its label when the key is registered, the key itself by default.
+    """
+
+    def __init__(self, label_function=None):
+        self.labels = []
+        self.label_function = label_function
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, key):
+        return key in self._ids
+
+    def id(self, key):
+        """Id of the variable with the given key, registered if new."""
+        variable_id = self._ids.get(key)
+        if variable_id is None:
+            variable_id = self._ids[key] = len(self.labels)
+            self.labels.append(key if self.label_function is None else self.label_function(key))
+        return variable_id
+
+    def ids(self, keys):
+        """Ids of several variables as an integer array."""
+        return np.array([self.id(key) for key in keys], dtype=np.int64)
+
+    def label(self, key):
+        return self.labels[self._ids[key]]
+
+
+class QuboBuilder:
+    """
+    Linear and quadratic terms of a binary model collected as index and bias
+    arrays. Repeated terms are summed when the model is built.
+
+    Attributes:
+        registry (VariableRegistry): Variables the ids refer to.
+        offset (float): Constant energy offset.
+    """
+
+    def __init__(self, registry=None):
+        self.registry = VariableRegistry() if registry is None else registry
+        self.offset = 0.0
+        self._linear = []
+        self._quadratic = []
+
+    def add_linear(self, ids, biases):
+        ids = np.asarray(ids, dtype=np.int64)
+        self._linear.append((ids, np.broadcast_to(np.asarray(biases, dtype=float), ids.shape)))
+
+    def add_quadratic(self, rows, cols, biases):
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        self._quadratic.append(
+            (rows, cols, np.broadcast_to(np.asarray(biases, dtype=float), rows.shape))
+        )
+
+    def add_combinations(self, ids, k=1, strength=1.0):
+        """
+        strength * (sum_i x_i - k)^2 over the given variables, the same
+        model as dimod.generators.combinations.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        rows, cols = np.triu_indices(len(ids), k=1)
+        self.add_linear(ids, strength * (1 - 2 * k))
+        self.add_quadratic(ids[rows], ids[cols], 2 * strength)
+        self.offset += strength * k**2
+
+    def add_row_combinations(self, ids, k=1, strength=1.0):
+        """
+        add_combinations for every row of a 2D id matrix at once, e.g. one
+        one-hot constraint per node over the rows of a (node, color) matrix.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        rows, cols = np.triu_indices(ids.shape[1], k=1)
+        self.add_linear(ids.ravel(), strength * (1 - 2 * k))
+        self.add_quadratic(ids[:, rows].ravel(), ids[:, cols].ravel(), 2 * strength)
+        self.offset += strength * k**2 * len(ids)
+
+    def scale(self, factor):
+        """Multiply all terms added so far, like BinaryQuadraticModel.scale."""
+        self._linear = [(ids, biases * factor) for ids, biases in self._linear]
+        self._quadratic = [(rows, cols, biases * factor) for rows, cols, biases in self._quadratic]
+        self.offset *= factor
+
+    def _concatenate(self, terms, width):
+        if not terms:
+            return [np.zeros(0, dtype=np.int64)] * (width - 1) + [np.zeros(0)]
+        return [np.concatenate(column) for column in zip(*terms)]
+
+    def to_bqm(self):
+        """The binary model over all registered variables, labelled by their readable labels."""
+        linear_ids, linear_biases = self._concatenate(self._linear, 2)
+        rows, cols, quadratic_biases = self._concatenate(self._quadratic, 3)
+
+        # x * x = x for binary variables
+        diagonal = rows == cols
+        linear = np.zeros(len(self.registry))
+        np.add.at(linear, linear_ids, linear_biases)
+        np.add.at(linear, rows[diagonal], quadratic_biases[diagonal])
+        off_diagonal = ~diagonal
+        return dimod.BinaryQuadraticModel.from_numpy_vectors(
+            linear,
+            (rows[off_diagonal], cols[off_diagonal], quadratic_biases[off_diagonal]),
+            self.offset,
+            dimod.BINARY,
+            variable_order=self.registry.labels,
+        )
@@ -1,32 +1,34 @@
-import itertools
-import dimod
-from networkx import weisfeiler_lehman_graph_hash
+from collections import defaultdict
+
 import numpy as np
+from networkx import weisfeiler_lehman_graph_hash
 from networkx.readwrite import json_graph
-import networkx as nx
-
-def combinations_with_variables(list_of_vars, fixed_var):
-    linear = {}
-    quadratic = {}
-    linear[fixed_var] = 1
-    for var in list_of_vars:
-        if var not in linear:
-            linear[var] = 1
-        else:
-            linear[var] += 1
-        if (var, fixed_var) not in quadratic:
-            quadratic[(var, fixed_var)] = -2
-        else:
-            quadratic[(var, fixed_var)] -= 2
-
-    var_combs = itertools.combinations(list_of_vars, 2)
-    for var_comb in var_combs:
-        if var_comb not in quadratic:
-            quadratic[var_comb] = 2
-        else:
-            quadratic[var_comb] += 2
-            
-    return dimod.BinaryQuadraticModel(linear, quadratic, 0, dimod.BINARY)
+
+from src.algorithms.qubo_builder import QuboBuilder, VariableRegistry
+
+
+def variable_label(key):
+    # ("edge", (u, v), i) -> ("edge((u, v))", "level(i)"), ("node_y", v) -> ("node_y(v)",)
+    kind, element, *level = key
+    return (f"{kind}({element})",) + tuple(f"level({i})" for i in level)
+
+
+def combinations_with_variables(builder, keys, fixed_key):
+    # (sum_i x_i - y)^2 for the variables x_i and the fixed variable y, registered
+    # in the order of the dict based model: x_0, y and then the other x_i
+    registry = builder.registry
+    first_id = registry.ids(keys[:1])
+    fixed_id = registry.id(fixed_key)
+    ids = np.append(first_id, registry.ids(keys[1:]))
+    rows, cols = np.triu_indices(len(ids), k=1)
+    builder.add_linear(np.append(fixed_id, ids), 1)
+    builder.add_quadratic(ids, np.full(len(ids), fixed_id), -2)
+    builder.add_quadratic(ids[rows], ids[cols], 2)
+
+
+def steiner_tree_hash(graph, terminals):
+    # Same as SteinerTree.get_hash, without building the BQM
+    return weisfeiler_lehman_graph_hash(graph) + f"_{terminals}"
 
 
 class SteinerTree:
@@ -35,7 +37,10 @@ class SteinerTree:
         self.U = terminals
         self.optimal_weight = optimal_weight
         self.steiner_tree = steiner_tree
-        self.bqm = dimod.BinaryQuadraticModel.empty(dimod.BINARY)
+        # Variables are keyed by ("node", v, i), ("node_y", v), ("edge", (u, v), i)
+        # and ("edge_y", (u, v)), the readable labels are only built on registration
+        self.variables = VariableRegistry(variable_label)
+        self.builder = QuboBuilder(self.variables)
         self.depth = int(np.ceil(len(graph.nodes()) / 2))
         self.shape_constraint_0()
         self.shape_constraint_1()
@@ -43,164 +48,82 @@ class SteinerTree:
         self.shape_constraint_3()
         self.shape_constraint_4()
         self.shape_constraint_5()
-        self.bqm.scale(2)
+        self.builder.scale(2)
         self.weight_constraint_0()
-        
-        # Solve the problem with simulated annealing
-        sampler = dimod.SimulatedAnnealingSampler()
-        sampleset = sampler.sample(self.bqm, num_reads=1000)
-        # Get the best solution
-        best_sample = sampleset.first.sample
-        best_energy = sampleset.first.energy
-        #print("Best sample:")
-        #print(best_sample)
-        print("Best energy:")
-        print(best_energy)
-        # Print the solution
-        print("Steiner tree edges:")
-        steiner_tree = []
-        for i in range(1, self.depth):
-            for edge in self.graph.edges():
-                if best_sample[("edge(" + str(edge) + ")", "level(" + str(i) + ")")] == 1:
-                    steiner_tree.append(edge)
-                if best_sample[("edge_y(" + str(edge) + ")",)] == 1:
-                    steiner_tree.append(edge)
-        #print(steiner_tree)
-        if not nx.is_isomorphic(
-            self.steiner_tree, nx.Graph(steiner_tree)
-        ):
-            print("The solution is not isomorphic to the correct Steiner tree")
-            print(self.steiner_tree.edges())
-            print(steiner_tree)
+        self.bqm = self.builder.to_bqm()
 
     def shape_constraint_0(self):
         # Exactly one root node
-        H0 = dimod.generators.combinations(
-            [
-                ("node(" + str(node) + ")", "level(" + str(0) + ")")
-                for node in self.graph.nodes()
-            ],
+        self.builder.add_combinations(
+            self.variables.ids(("node", node, 0) for node in self.graph.nodes()),
             1,
             strength=1,
         )
-        self.bqm.update(H0)
 
     def shape_constraint_1(self):
         # Every node appears at exactly one level in the tree if it belongs to the set U
         for node in self.U:
-            H1 = dimod.generators.combinations(
-                [
-                    ("node(" + str(node) + ")", "level(" + str(i) + ")")
-                    for i in range(self.depth)
-                ],
+            self.builder.add_combinations(
+                self.variables.ids(("node", node, i) for i in range(self.depth)),
                 1,
                 strength=1,
             )
-            self.bqm.update(H1)
 
     def shape_constraint_2(self):
         # If the edge uv appears at the tree, then either u is closer to the root than v ($x_{uv, i} = 1$),
         # or v is closer to the root than u ($x_{vu, i} = 1$)
         for v in self.graph.nodes():
             if v not in self.U:
-                list_of_vars = [
-                    ("node(" + str(v) + ")", "level(" + str(i) + ")")
-                    for i in range(self.depth)
-                ]
-                H2 = combinations_with_variables(
-                    list_of_vars, ("node_y(" + str(v) + ")",)
+                combinations_with_variables(
+                    self.builder,
+                    [("node", v, i) for i in range(self.depth)],
+                    ("node_y", v),
                 )
-                self.bqm.update(H2)
 
     def shape_constraint_3(self):
         # If the node v appears at level i, then exactly one edge uv connects v to a node u at level i
+        incoming_edges = defaultdict(list)
+        for u, v in self.graph.edges():
+            incoming_edges[v].append((u, v))
         for node in self.graph.nodes():
             for i in range(1, self.depth):
-                list_of_vars = [
-                    ("edge(" + str((u, v)) + ")", "level(" + str(i) + ")")
-                    for (u, v) in self.graph.edges()
-                    if node == v
-                ]
-                H3 = combinations_with_variables(
-                    list_of_vars,
-                    ("node(" + str(node) + ")", "level(" + str(i) + ")"),
+                combinations_with_variables(
+                    self.builder,
+                    [("edge", edge, i) for edge in incoming_edges[node]],
+                    ("node", node, i),
                 )
-                self.bqm.update(H3)
 
     def shape_constraint_4(self):
-        # If the edge uv appears at the level i, then the node u appears at level i-1 and the node v appears at level i
-        for u, v in self.graph.edges():
+        # If the edge uv appears at the level i, then the node u appears at level i-1 and the node v appears at level i,
+        # for both orientations of every edge
+        edge_ids, parent_ids, child_ids = [], [], []
+        for u, v in list(self.graph.edges()) + [(v, u) for u, v in self.graph.edges()]:
             for i in range(1, self.depth):
-                linear = {}
-                quadratic = {}
-
-                x = ("edge(" + str((u, v)) + ")", "level(" + str(i) + ")")
-                
-                linear[x] = 2
-                
-                quadratic[
-                    (("node(" + str(u) + ")", "level(" + str(i - 1) + ")"), x)
-                ] = -1
-                
-                quadratic[
-                    (("node(" + str(v) + ")", "level(" + str(i) + ")"), x)
-                ] = -1
-
-                H5 = dimod.BinaryQuadraticModel(linear, quadratic, 0, dimod.BINARY)
-                self.bqm.update(H5)
-        
-        if True:
-            for v, u in self.graph.edges():
-                for i in range(1, self.depth):
-                    linear = {}
-                    quadratic = {}
-
-                    x = ("edge(" + str((u, v)) + ")", "level(" + str(i) + ")")
-                    
-                    linear[x] = 2
-                    
-                    quadratic[
-                        (("node(" + str(u) + ")", "level(" + str(i - 1) + ")"), x)
-                    ] = -1
-                    
-                    quadratic[
-                        (("node(" + str(v) + ")", "level(" + str(i) + ")"), x)
-                    ] = -1
+                parent_ids.append(self.variables.id(("node", u, i - 1)))
+                edge_ids.append(self.variables.id(("edge", (u, v), i)))
+                child_ids.append(self.variables.id(("node", v, i)))
+        self.builder.add_linear(edge_ids, 2)
+        self.builder.add_quadratic(parent_ids, edge_ids, -1)
+        self.builder.add_quadratic(child_ids, edge_ids, -1)
 
-                    H5 = dimod.BinaryQuadraticModel(linear, quadratic, 0, dimod.BINARY)
-                    self.bqm.update(H5)
-                
     def shape_constraint_5(self):
         for u, v in self.graph.edges():
-            list_of_vars = [
-                    ("edge(" + str((u, v)) + ")", "level(" + str(i) + ")")
-                    for i in range(self.depth)
-                ] + [
-                    ("edge(" + str((v, u)) + ")", "level(" + str(i) + ")") 
-                    for i in range(self.depth)
-                ]
-            H5 = combinations_with_variables(
-                list_of_vars, ("edge_y(" + str((u, v)) + ")",)
+            combinations_with_variables(
+                self.builder,
+                [("edge", (u, v), i) for i in range(self.depth)]
+                + [("edge", (v, u), i) for i in range(self.depth)],
+                ("edge_y", (u, v)),
             )
-            self.bqm.update(H5)
-            
 
     def weight_constraint_0(self):
         # Weight of a tree is the sum of the weights of all the selected edges in the tree
-        for u, v in self.graph.edges():
-            linear = {}
-            for i in range(1, self.depth):
-                linear[("edge(" + str((u, v)) + ")", "level(" + str(i) + ")")] = 1
-            H6 = dimod.BinaryQuadraticModel(linear, {}, 0, dimod.BINARY)
-            self.bqm.update(H6)
-            
-        if True:   
-            for v, u in self.graph.edges():
-                linear = {}
-                for i in range(1, self.depth):
-                    linear[("edge(" + str((u, v)) + ")", "level(" + str(i) + ")")] = 1
-                H6 = dimod.BinaryQuadraticModel(linear, {}, 0, dimod.BINARY)
-                self.bqm.update(H6)
+        edges = list(self.graph.edges()) + [(v, u) for u, v in self.graph.edges()]
+        self.builder.add_linear(
+            self.variables.ids(
+                ("edge", edge, i) for edge in edges for i in range(1, self.depth)
+            ),
+            1,
+        )
 
     def get_binary_polynomial(self):
         return self.bqm
@@ -211,17 +134,17 @@ class SteinerTree:
         variables_to_qubits = {v: k for k, v in qubits_to_variables.items()}
         for i in range(1, self.depth):
             for edge in self.graph.edges():
-                if bitstring[variables_to_qubits[("edge(" + str(edge) + ")", "level(" + str(i) + ")")]] == "1":
+                if bitstring[variables_to_qubits[self.variables.label(("edge", edge, i))]] == "1":
                     steiner_tree.append(edge)
                     
         steiner_nodes = []
         for i in range(self.depth):
             for node in self.graph.nodes():
-                if bitstring[variables_to_qubits[("node(" + str(node) + ")", "level(" + str(i) + ")")]] == "1":
+                if bitstring[variables_to_qubits[self.variables.label(("node", node, i))]] == "1":
                     steiner_nodes.append(node)
         auxiliary_nodes = []
         for edge in self.graph.edges():
-            if bitstring[variables_to_qubits[("edge_y(" + str(edge) + ")",)]] == "1":
+            if bitstring[variables_to_qubits[self.variables.label(("edge_y", edge))]] == "1":
                 auxiliary_nodes.append(edge)
         print("Steiner nodes:")
         print(steiner_nodes)
@@ -244,5 +167,16 @@ class SteinerTree:
             "terminals": self.U,
         }
     
+    def selected_edges(self, sample):
+        # Edges of the tree encoded by a sample of the BQM variables
+        edges = []
+        for i in range(1, self.depth):
+            for edge in self.graph.edges():
+                if sample[self.variables.label(("edge", edge, i))] == 1:
+                    edges.append(edge)
+                if sample[self.variables.label(("edge_y", edge))] == 1:
+                    edges.append(edge)
+        return edges
+
     def get_hash(self):
-        return weisfeiler_lehman_graph_hash(self.graph) + f"_{self.U}"
\ No newline at end of file
+        return steiner_tree_hash(self.graph, self.U)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Simulated annealing check of the Steiner tree QUBO.
+
+Every instance is sampled with dimod's SimulatedAnnealingSampler and the
+best sample is decoded into a tree, which should be isomorphic to the known
+optimal Steiner tree. This only validates the formulation, it is not needed
+to build the QUBO, and is run on demand over a whole data set, in a process
+pool since the reference sampler is pure Python. Results are cached per
+instance hash (SteinerTree.get_hash), optionally in a JSON file shared
+between runs.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Dict, List, Optional
+
+import dimod
+import networkx as nx
+
+from src.algorithms.steiner_tree.steiner_tree import SteinerTree, steiner_tree_hash
+from src.parallel import atomic_open, pool_map
+
+
+@dataclass
+class SimulatedAnnealingCheck:
+    """
+    Attributes:
+        signature (str): SteinerTree.get_hash of the instance.
+        num_reads (int): Simulated annealing reads.
+        best_energy (float): Lowest energy found.
+        edges (list): Tree edges decoded from the lowest energy sample.
+        isomorphic (bool): If the decoded tree is isomorphic to the optimal Steiner tree.
+    """
+
+    signature: str
+    num_reads: int
+    best_energy: float
+    edges: list
+    isomorphic: bool
+
+
+def check_steiner_tree(graph_data, num_reads: int = 1000) -> SimulatedAnnealingCheck:
+    """Sample the QUBO of a single (graph, terminals, steiner_tree, optimal_weight) instance."""
+    graph, terminals, steiner_tree, optimal_weight = graph_data
+    problem = SteinerTree(graph, terminals, steiner_tree, optimal_weight)
+    sampleset = dimod.SimulatedAnnealingSampler().sample(problem.bqm, num_reads=num_reads)
+    edges = problem.selected_edges(sampleset.first.sample)
+    return SimulatedAnnealingCheck(
+        signature=problem.get_hash(),
+        num_reads=num_reads,
+        best_energy=float(sampleset.first.energy),
+        edges=[list(edge) for edge in edges],
+        isomorphic=nx.is_isomorphic(steiner_tree, nx.Graph(edges)),
+    )
+
+
+def _load_cache(cache_path):
+    if cache_path is None or not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, "r", encoding="utf-8") as file:
+        return {
+            signature: SimulatedAnnealingCheck(**check)
+            for signature, check in json.load(file).items()
+        }
+
+
+def _save_cache(cache, cache_path):
+    with atomic_open(cache_path, "w", encoding="utf-8") as file:
+        json.dump({signature: asdict(check) for signature, check in cache.items()}, file)
+
+
+def check_steiner_trees(
+    graph_data: List,
+    num_reads: int = 1000,
+    n_workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+) -> Dict[str, SimulatedAnnealingCheck]:
+    """
+    Simulated annealing check of every instance, keyed by instance hash.
+
+    Instances with a cached check of at least num_reads reads are not
+    sampled again. The others are sampled with pool_map in n_workers
+    processes.
+    """
+    cache = _load_cache(cache_path)
+    signatures = [steiner_tree_hash(instance[0], instance[1]) for instance in graph_data]
+    pending = {}
+    for signature, instance in zip(signatures, graph_data):
+        cached = cache.get(signature)
+        if cached is None or cached.num_reads < num_reads:
+            pending[signature] = instance
+
+    checks = pool_map(
+        partial(check_steiner_tree, num_reads=num_reads), list(pending.values()), n_workers
+    )
+
+    for check in checks:
+        cache[check.signature] = check
+    if cache_path is not None and checks:
+        _save_cache(cache, cache_path)
+
+    return {signature: cache[signature] for signature in signatures}
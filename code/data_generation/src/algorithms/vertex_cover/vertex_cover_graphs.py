@@ -2,10 +2,11 @@ import pickle
 import networkx as nx
 import random
 import matplotlib.pyplot as plt
-from networkx import weisfeiler_lehman_graph_hash
 import itertools
 from networkx.algorithms import approximation
 
+from src.algorithms.graph_index import GraphIndex, index_path, load_data_set
+
 
 random.seed(0)
 
@@ -77,7 +78,7 @@ def find_minimum_vertex_cover(G):
     
     return min_cover, min_cover_size
 
-def generate_networks(max_nodes=14, num_networks=1000):
+def generate_networks(max_nodes=14, num_networks=1000, index=None):
     """
     Generate a collection of graphs with different properties.
     
@@ -85,24 +86,20 @@ def generate_networks(max_nodes=14, num_networks=1000):
     - The graph
     - Minimum vertex cover
     - Size of the minimum vertex cover
+
+    Graphs isomorphic to one in the GraphIndex are skipped, e.g. those of an
+    earlier run if its saved index is passed.
     """
     networks = []
-    generated_networks = set()
+    index = GraphIndex() if index is None else index
     
     for n_nodes in range(3, max_nodes + 1, 1):
-        for _ in range(num_networks):
-            edge_density = random.uniform(0.2, 0.5)
-            
-            G = generate_graph(n_nodes, edge_density)
-            
-            # Skip networks that have been generated before
-            h = weisfeiler_lehman_graph_hash(G)
-            
-            if h in generated_networks:
-                continue
-            
-            generated_networks.add(h)
-            
+        graphs = (
+            generate_graph(n_nodes, random.uniform(0.2, 0.5)) for _ in range(num_networks)
+        )
+
+        # Skip networks that have been generated before
+        for G in index.add_batched(graphs):
             # For small graphs, find the minimum vertex cover
             if n_nodes <= 14:  # Limit for brute force approach
                 vertex_cover, cover_size = find_minimum_vertex_cover(G)
@@ -224,8 +221,13 @@ def get_vertex_cover_problem(networks, idx=None):
     return problem
 
 if __name__ == "__main__":
-    networks = generate_networks(max_nodes=12, num_networks=300)
+    data_path = "algorithms/vertex_cover/vertex_cover_data.pkl"
+    # Graphs of earlier runs are skipped, the new ones extend their data set
+    index = GraphIndex(index_path(data_path))
+    saved = load_data_set(data_path, index)
+    networks = generate_networks(max_nodes=12, num_networks=300, index=index)
     print(f"Generated {len(networks)} graphs for the vertex cover problem")
+    networks = saved + networks
     
     # Verify the networks
     verification = verify_vertex_covers(networks)
@@ -236,7 +238,8 @@ if __name__ == "__main__":
     print(f"Network analysis: {analysis}")
     
     # Save and visualize
-    save_networks(networks, "algorithms/vertex_cover/vertex_cover_data.pkl")
+    save_networks(networks, data_path)
+    index.save()
     visualize_networks(networks, "algorithms/vertex_cover/figures")
     
     # Extract a sample vertex cover problem
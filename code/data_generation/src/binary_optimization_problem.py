@@ -1,34 +1,59 @@
+import copy
+from functools import partial
 from typing import Dict
 
 import dimod
-import jax
 import jax.numpy as jnp
-import optax
 import pennylane as qml
 from dimod import BinaryQuadraticModel, Vartype
 from pennylane import numpy as np
+from pennylane.optimize.adaptive import append_gate
 from pennylane.transforms import compile as qml_compile
-from qiskit import qasm3
 
+from src.adaptive_vqe import AdaptVQE
+from src.branch_and_bound import branch_and_bound_ground_states
 from src.data_classes import OptimizationType
+from src.energy import (
+    diagonal_energies,
+    enumerate_ground_states,
+    smallest_diagonal_eigenpairs,
+)
+from src.exact_solution_cache import ising_fingerprint
+from src.ising import IsingHamiltonian
 from src.optimization.ansatz import Ansatz
+from src.optimization.circuit_cache import CIRCUIT_CACHE
+from src.optimization.optimizer import VariationalOptimizer
+from src.product_form import ProductFormPolynomial
+from src.qaoa_qasm import QAOAQasmTemplate
+from src.qaoa_simulator import qaoa_expectation, qaoa_probs
 from src.solver import Solver
 from src.utils import (
     basis_vector_to_bitstring,
+    bitstring_to_basis_index,
     copy_circuit_with_new_measurement,
     int_to_bitstring,
-    pennylane_to_qiskit,
+    qasm_operations,
     replace_h_rz_h_with_rx,
     smallest_eigenpairs,
     smallest_sparse_eigenpairs,
+    tape_to_qasm,
 )
 
+# Above this many qubits the energy vector is enumerated in chunks
+# instead of being held in memory at once
+DIAGONAL_QUBIT_LIMIT = 22
+
 
 class BinaryOptimizationProblem(Solver):
     """
     Input
-    binary_polynomial: dimod.BinaryPolynomial, dimod.BinaryQuadraticModel, or qml.ops.op_math.LinearCombination
+    binary_polynomial: dimod.BinaryPolynomial, dimod.BinaryQuadraticModel, ProductFormPolynomial
+                       or qml.ops.op_math.LinearCombination
                     p: number of layers in the QAOA or VQE circuit
+         qaoa_backend: "statevector" simulates QAOA directly from the energy vector,
+                       "pennylane" runs the QNode. The QNode is always kept for QASM export.
+             n_starts: number of initializations optimized at once with vmap by QAOA and VQE,
+                       1 restarts the optimization sequentially instead
     """
 
     def __init__(
@@ -37,6 +62,8 @@ class BinaryOptimizationProblem(Solver):
         description: str,
         p=1,
         device_type="cpu",
+        qaoa_backend="statevector",
+        n_starts=1,
     ):
         self.description = description
         self.binary_polynomial = binary_polynomial
@@ -44,20 +71,26 @@ class BinaryOptimizationProblem(Solver):
 
         # Basic vars
         self.n_qubits = len(self.variables)
-        self.coeffs = []
+        self._coeffs = None
         self.observables = []
+        self._terms = None
+        self.ising_hamiltonian = None
+        self.cost_hamiltonian = None
+        self.energies = None
         self.p = p
         self.init_params = 0.01 * np.random.rand(2, p, requires_grad=True)
         self.smallest_bitstrings = []
-        self.qaoa_circuit = None
         self.vqe_circuit = None
         self.adaptive_vqe_circuit = None
         self.smallest_eigenvectors = None
         self.smallest_eigenvalues = None
         self.smallest_bitstrings = None
         self.adaptive_circuits = []
+        self.adaptive_operations = []
         self.adaptive_gradients = []
         self.device_type = device_type
+        self.qaoa_backend = qaoa_backend
+        self.n_starts = n_starts
 
         # This translates the binary polynomial to a spin Hamiltonian
         if isinstance(self.binary_polynomial, dimod.BinaryPolynomial):
@@ -72,7 +105,7 @@ class BinaryOptimizationProblem(Solver):
                 self.binary_polynomial = dimod.BinaryQuadraticModel(
                     linear, quadratic, offset, Vartype.SPIN
                 )
-        else:
+        elif not isinstance(self.binary_polynomial, ProductFormPolynomial):
             assert isinstance(self.binary_polynomial, qml.ops.op_math.LinearCombination)
 
         variables_to_qubits = {var: i for i, var in enumerate(self.variables)}
@@ -80,33 +113,134 @@ class BinaryOptimizationProblem(Solver):
         qubits_to_variables = {i: var for i, var in enumerate(self.variables)}
         self.qubits_to_variables = qubits_to_variables
 
-        self._construct_cost_hamiltonian()
-        self.qaoa_circuit, self.qaoa_probs_circuit = self.get_qaoa_circuits()
+        # Product form polynomials are only expanded into terms when needed
+        if not isinstance(self.binary_polynomial, ProductFormPolynomial):
+            self._construct_cost_hamiltonian()
+        self._qaoa_circuits = None
+        self.qaoa_qasm_template = None
 
     def _construct_cost_hamiltonian(self):
+        """
+        Build the term list and the compact Ising form of the cost Hamiltonian.
+        The PennyLane operator is only built when get_cost_hamiltonian is called.
+        """
         if isinstance(self.binary_polynomial, dimod.BinaryPolynomial):
+            self._coeffs = []
+            self._terms = []
             for var in self.binary_polynomial:
-                self.coeffs.append(self.binary_polynomial[var])
-                self.observables.append(
-                    qml.prod(*[qml.PauliZ(self.variables_to_qubits[w]) for w in var])
-                )
+                wires = tuple(self.variables_to_qubits[w] for w in var)
+                self._coeffs.append(self.binary_polynomial[var])
+                self._terms.append(wires)
+            self.ising_hamiltonian = IsingHamiltonian.from_terms(
+                self._coeffs, self._terms, self.n_qubits
+            )
+        elif isinstance(self.binary_polynomial, ProductFormPolynomial):
+            spin_terms = self.binary_polynomial.spin_terms()
+            self._coeffs = [bias for _, bias in spin_terms]
+            self._terms = [
+                tuple(sorted(self.variables_to_qubits[w] for w in var))
+                for var, _ in spin_terms
+            ]
+            self.ising_hamiltonian = IsingHamiltonian.from_terms(
+                self._coeffs, self._terms, self.n_qubits
+            )
         elif isinstance(self.binary_polynomial, dimod.BinaryQuadraticModel):
-            for var in self.binary_polynomial.quadratic:
-                self.coeffs.append(self.binary_polynomial.quadratic[var])
-                self.observables.append(
-                    qml.PauliZ(self.variables_to_qubits[var[0]])
-                    @ qml.PauliZ(self.variables_to_qubits[var[1]])
-                )
-            for var in self.binary_polynomial.linear:
-                self.coeffs.append(self.binary_polynomial.linear[var])
-                self.observables.append(qml.PauliZ(self.variables_to_qubits[var]))
-        self.cost_hamiltonian = qml.ops.op_math.LinearCombination(
-            self.coeffs, self.observables
-        )
+            linear, (rows, cols, quadratic), _ = self.binary_polynomial.to_numpy_vectors(
+                variable_order=self.variables
+            )
+            # Quadratic terms come first, in the order of bqm.quadratic, then
+            # the linear terms in the order of bqm.linear
+            linear_wires = np.array(
+                [self.variables_to_qubits[var] for var in self.binary_polynomial.variables],
+                dtype=int,
+            )
+            self._coeffs = np.concatenate([quadratic, linear[linear_wires]]).tolist()
+            self._terms = list(zip(rows.tolist(), cols.tolist())) + [
+                (wire,) for wire in linear_wires.tolist()
+            ]
+
+            # (term, wire) pairs, two per quadratic term and one per linear term
+            n_quadratic = len(quadratic)
+            term_indices = np.concatenate(
+                [
+                    np.repeat(np.arange(n_quadratic), 2),
+                    n_quadratic + np.arange(len(linear_wires)),
+                ]
+            )
+            wires = np.concatenate([np.stack([rows, cols], axis=1).ravel(), linear_wires])
+            self.ising_hamiltonian = IsingHamiltonian.from_index_arrays(
+                self._coeffs, term_indices, wires, self.n_qubits
+            )
+        else:
+            self._coeffs = []
+            self._terms = []
+            self.ising_hamiltonian = IsingHamiltonian.from_terms([], [], self.n_qubits)
+
+    @property
+    def coeffs(self):
+        """Coefficients of the cost Hamiltonian terms."""
+        if self._coeffs is None:
+            self._construct_cost_hamiltonian()
+        return self._coeffs
+
+    @property
+    def terms(self):
+        """Wires of the cost Hamiltonian terms, as tuples."""
+        if self._terms is None:
+            self._construct_cost_hamiltonian()
+        return self._terms
 
     def get_cost_hamiltonian(self):
+        if self.cost_hamiltonian is None:
+            self.observables = [
+                qml.prod(*[qml.PauliZ(w) for w in wires]) for wires in self.terms
+            ]
+            self.cost_hamiltonian = qml.ops.op_math.LinearCombination(
+                self.coeffs, self.observables
+            )
         return self.cost_hamiltonian
 
+    def get_cost_hamiltonian_string(self):
+        """str(get_cost_hamiltonian()), formatted from the terms without building the operator."""
+        if self.cost_hamiltonian is not None:
+            return str(self.cost_hamiltonian)
+        return " + ".join(
+            f"{coeff} * Z({wires[0]})"
+            if len(wires) == 1
+            else f"{coeff} * ({' @ '.join(f'Z({w})' for w in wires)})"
+            for coeff, wires in zip(self.coeffs, self.terms)
+        )
+
+    def get_ising_hamiltonian(self):
+        """Compact array form of the cost Hamiltonian, see src/ising.py."""
+        if self.ising_hamiltonian is None:
+            self._construct_cost_hamiltonian()
+        return self.ising_hamiltonian
+
+    def is_diagonal(self):
+        """The cost Hamiltonian is diagonal if every term is a PauliZ product."""
+        if isinstance(self.binary_polynomial, ProductFormPolynomial):
+            return True
+        return len(self.terms) == len(self.coeffs)
+
+    def get_fingerprint(self):
+        """Canonical hash of the cost Hamiltonian, used as exact solution cache key."""
+        return ising_fingerprint(self.coeffs, self.terms, self.n_qubits)
+
+    def get_energies(self):
+        """
+        Energy of every computational basis state, i.e. the diagonal of the
+        cost Hamiltonian, computed once from the term coefficients.
+        """
+        if self.energies is None:
+            if isinstance(self.binary_polynomial, ProductFormPolynomial):
+                self.energies = self.binary_polynomial.energies(
+                    self.variables_to_qubits, self.n_qubits
+                )
+            else:
+                self.energies = diagonal_energies(self.coeffs, self.terms, self.n_qubits)
+        return self.energies
+
     def _create_quantum_device(self, n_qubits: int):
         """Create appropriate quantum device based on available hardware"""
         if self.device_type == "gpu":
@@ -155,7 +289,156 @@ class BinaryOptimizationProblem(Solver):
 
         return qaoa_circuit, qaoa_probs_circuit
 
-    def solve_exactly(self):
+    @property
+    def qaoa_circuit(self):
+        """QAOA QNode, built on first use since it needs the PennyLane cost Hamiltonian."""
+        if self._qaoa_circuits is None:
+            self._qaoa_circuits = self.get_qaoa_circuits()
+        return self._qaoa_circuits[0]
+
+    @property
+    def qaoa_probs_circuit(self):
+        if self._qaoa_circuits is None:
+            self._qaoa_circuits = self.get_qaoa_circuits()
+        return self._qaoa_circuits[1]
+
+    def set_layers(self, p):
+        """
+        Change the number of QAOA and VQE layers, keeping the cost
+        Hamiltonian, its energies and the exact solution.
+        """
+        self.p = p
+        self.init_params = 0.01 * np.random.rand(2, p, requires_grad=True)
+        self._qaoa_circuits = None
+        self.qaoa_qasm_template = None
+
+    def get_qaoa_optimizer(self):
+        """
+        Return the QAOA optimizer and the Hamiltonian argument of its circuits.
+        The statevector simulator applies only to diagonal cost Hamiltonians
+        and is shared between instances through the circuit cache, otherwise
+        the QNodes of this instance are used.
+        """
+        if self.qaoa_backend == "statevector" and self.is_diagonal():
+
+            def build(cache):
+                return VariationalOptimizer(
+                    partial(qaoa_expectation, n_qubits=self.n_qubits),
+                    partial(qaoa_probs, n_qubits=self.n_qubits),
+                    cache=cache,
+                )
+
+            optimizer = CIRCUIT_CACHE.get(
+                OptimizationType.QAOA, None, self.n_qubits, self.p, build
+            )
+            return optimizer, jnp.asarray(self.get_energies())
+
+        optimizer = VariationalOptimizer(
+            lambda params, _: self.qaoa_circuit(params),
+            lambda params, _: self.qaoa_probs_circuit(params),
+        )
+        return optimizer, None
+
+    def solve_exactly(self, method="auto", n_workers=None, energy_file=None, cache=None):
+        """
+        Solve the problem exactly and return
+        (smallest_eigenvalues, smallest_bitstrings, first_excited_energy, smallest_eigenvectors).
+
+        If an ExactSolutionCache is given, a cached solution is returned when
+        available, with the eigenvectors as basis state indices, and new
+        solutions are stored in the cache.
+
+        method:
+            "diagonal": compute the energy vector of the diagonal cost Hamiltonian
+            "chunked": enumerate the energy vector in chunks over n_workers processes,
+                optionally writing it to energy_file. The eigenvectors are
+                returned as basis state indices, since dense vectors do not fit in memory.
+            "branch_and_bound": prune the search over spin assignments with bounds
+                from the local fields, see src/branch_and_bound.py. Only for
+                quadratic Hamiltonians, eigenvectors are returned as basis state indices.
+            "eigensolver": diagonalize the Hamiltonian matrix
+            "auto": "diagonal" or "chunked" whenever the cost Hamiltonian is diagonal
+        """
+        if cache is not None:
+            return self._solve_exactly_cached(method, n_workers, energy_file, cache)
+
+        if method == "auto":
+            if not self.is_diagonal():
+                method = "eigensolver"
+            elif self.n_qubits > DIAGONAL_QUBIT_LIMIT:
+                method = "chunked"
+            else:
+                method = "diagonal"
+
+        if method == "branch_and_bound":
+            (
+                smallest_eigenvalue,
+                ground_states,
+                first_excited_energy,
+            ) = branch_and_bound_ground_states(self.coeffs, self.terms, self.n_qubits)
+
+            # Spin +1 is the |0> state, which int_to_bitstring writes as "1"
+            self.smallest_eigenvalues = [smallest_eigenvalue] * len(ground_states)
+            self.smallest_bitstrings = [
+                "".join("1" if spin == 1 else "0" for spin in state)
+                for state in ground_states
+            ]
+            self.smallest_eigenvectors = [
+                bitstring_to_basis_index(bitstring)
+                for bitstring in self.smallest_bitstrings
+            ]
+            return (
+                self.smallest_eigenvalues,
+                self.smallest_bitstrings,
+                first_excited_energy,
+                self.smallest_eigenvectors,
+            )
+
+        if method == "chunked":
+            (
+                smallest_eigenvalue,
+                ground_indices,
+                first_excited_energy,
+            ) = enumerate_ground_states(
+                self.coeffs,
+                self.terms,
+                self.n_qubits,
+                n_workers=n_workers,
+                energy_file=energy_file,
+            )
+
+            self.smallest_eigenvalues = [smallest_eigenvalue] * len(ground_indices)
+            self.smallest_eigenvectors = list(ground_indices)
+            self.smallest_bitstrings = [
+                int_to_bitstring(int(i), self.n_qubits) for i in ground_indices
+            ]
+            return (
+                self.smallest_eigenvalues,
+                self.smallest_bitstrings,
+                first_excited_energy,
+                self.smallest_eigenvectors,
+            )
+
+        if method == "diagonal":
+            (
+                self.smallest_eigenvalues,
+                self.smallest_eigenvectors,
+                first_excited_energy,
+                first_excited_state,
+            ) = smallest_diagonal_eigenpairs(self.get_energies())
+
+            self.smallest_bitstrings = [
+                basis_vector_to_bitstring(v) for v in self.smallest_eigenvectors
+            ]
+            return (
+                self.smallest_eigenvalues,
+                self.smallest_bitstrings,
+                first_excited_energy,
+                self.smallest_eigenvectors,
+            )
+        elif method != "eigensolver":
+            raise ValueError(f"Unknown exact solver method {method}")
+
         # Solve normally if the number of qubits is less than 14
         if self.n_qubits < 14:
             cost_matrix = self.get_cost_hamiltonian().matrix(
@@ -201,54 +484,83 @@ class BinaryOptimizationProblem(Solver):
             self.smallest_eigenvectors,
         )
 
+    def _solve_exactly_cached(self, method, n_workers, energy_file, cache):
+        fingerprint = self.get_fingerprint()
+        cached = cache.get(fingerprint)
+        if cached is None:
+            (
+                smallest_eigenvalues,
+                smallest_bitstrings,
+                first_excited_energy,
+                smallest_eigenvectors,
+            ) = self.solve_exactly(method, n_workers, energy_file)
+            cache.put(
+                fingerprint,
+                self.n_qubits,
+                smallest_eigenvalues[0],
+                smallest_bitstrings,
+                first_excited_energy,
+            )
+            return (
+                smallest_eigenvalues,
+                smallest_bitstrings,
+                first_excited_energy,
+                smallest_eigenvectors,
+            )
+
+        smallest_eigenvalue, self.smallest_bitstrings, first_excited_energy = cached
+        self.smallest_eigenvalues = [smallest_eigenvalue] * len(self.smallest_bitstrings)
+        self.smallest_eigenvectors = [
+            bitstring_to_basis_index(bitstring)
+            for bitstring in self.smallest_bitstrings
+        ]
+        return (
+            self.smallest_eigenvalues,
+            self.smallest_bitstrings,
+            first_excited_energy,
+            self.smallest_eigenvectors,
+        )
+
     def set_smallest_bitrings(self, smallest_bitstrings):
         self.smallest_bitstrings = smallest_bitstrings
 
-    def solve_with_qaoa(self) -> Dict:
-        print("Solving with QAOA")
-        solver = optax.adamw(learning_rate=0.01)
+    def _optimize(self, optimizer, hamiltonian, params, new_params, max_attempts):
+        """
+        Optimize from params, restarting sequentially from new_params() up to
+        max_attempts times, or from n_starts initializations at once.
+        Returns (params, total_steps, success, probs, start).
+        """
+        if self.n_starts > 1:
+            params_batch = jnp.stack(
+                [params] + [new_params() for _ in range(self.n_starts - 1)]
+            )
+            return optimizer.optimize_multistart(
+                params_batch, self.smallest_bitstrings, self.n_qubits, hamiltonian
+            )
+        return optimizer.optimize(
+            params,
+            self.smallest_bitstrings,
+            self.n_qubits,
+            new_params,
+            max_attempts,
+            hamiltonian,
+        )
 
-        params = self.init_params.copy()
-        params = jnp.array(params)
+    def solve_with_qaoa(self, init_params=None) -> Dict:
+        print("Solving with QAOA")
+        if init_params is not None:
+            self.init_params = jnp.array(init_params)
+        params = jnp.array(self.init_params.copy())
+        optimizer, hamiltonian = self.get_qaoa_optimizer()
 
-        total_steps = 0
-        attempts = 0
-        limit_steps = 500
-        success = False
-        jit_circuit = jax.jit(self.qaoa_circuit)
-
-        while True:
-            steps = 10
-            opt_state = solver.init(params)
-            for _ in range(steps):
-                grad = jax.grad(jit_circuit)(params)
-                updates, opt_state = solver.update(grad, opt_state, params)
-                params = optax.apply_updates(params, updates)
-
-            total_steps += steps
-            probs = self.qaoa_probs_circuit(params)
-            most_probable_state = np.argsort(probs)[-1]
-            most_probable_state = int_to_bitstring(most_probable_state, self.n_qubits)
-
-            if most_probable_state in self.smallest_bitstrings:
-                success = True
-                break
-            if total_steps > limit_steps:
-                print("Optimization did not converge")
-                print("Trying with a new initialization")
-                self.init_params = jnp.array(0.01 * np.pi * np.random.rand(2, self.p))
-                params = self.init_params.copy()
-                total_steps = 0
-                attempts += 1
-            if attempts > 3:
-                print(
-                    "Optimization did not converge to the known optimal solution after ",
-                    attempts,
-                    " attempts.",
-                )
-                break
+        def new_params():
+            self.init_params = jnp.array(0.01 * np.pi * np.random.rand(2, self.p))
+            return self.init_params.copy()
 
-        expectation_value = self.qaoa_circuit(params)
+        params, total_steps, success, probs, start = self._optimize(
+            optimizer, hamiltonian, params, new_params, max_attempts=3
+        )
+        expectation_value = optimizer.expectation_value(params, hamiltonian)
         two_most_probable_states = np.argsort(probs)[-2:]
         states_probs = [probs[i] for i in two_most_probable_states]
 
@@ -263,9 +575,10 @@ class BinaryOptimizationProblem(Solver):
             "total_steps": total_steps,
             "states_probs": states_probs,
             "success": success,
+            "start": start,
         }
 
-    def solve_with_vqe(self, ansatz_id) -> Dict:
+    def solve_with_vqe(self, ansatz_id, init_params=None) -> Dict:
         print("Solving with VQE")
         ansatz = Ansatz(ansatz_id, self.n_qubits, self.p)
         circuit = ansatz.get_circuit()
@@ -289,22 +602,13 @@ class BinaryOptimizationProblem(Solver):
             params = jnp.concatenate(
                 [single_qubit_params.flatten(), two_qubit_params.flatten()]
             )
+        if init_params is not None:
+            params = jnp.array(init_params)
 
-        if two_qubit_params_shape is None:
-
-            @qml.qnode(dev, interface="jax")
-            def vqe_circuit(params):
-                circuit(params)
-                return qml.expval(cost_hamiltonian)
-
-            @qml.qnode(dev, interface="jax")
-            def vqe_probs_circuit(params):
+        def apply_ansatz(params):
+            if two_qubit_params_shape is None:
                 circuit(params)
-                return qml.probs()
-        else:
-
-            @qml.qnode(dev, interface="jax")
-            def vqe_circuit(params):
+            else:
                 single_qubit_params, two_qubit_params = jnp.split(
                     params, [single_qubit_params_size]
                 )
@@ -313,80 +617,54 @@ class BinaryOptimizationProblem(Solver):
                 )
                 two_qubit_params = two_qubit_params.reshape(two_qubit_params_shape)
                 circuit(single_qubit_params, two_qubit_params)
-                return qml.expval(cost_hamiltonian)
 
-            @qml.qnode(dev, interface="jax")
-            def vqe_probs_circuit(params):
-                single_qubit_params, two_qubit_params = jnp.split(
-                    params, [single_qubit_params_size]
-                )
-                single_qubit_params = single_qubit_params.reshape(
-                    single_qubit_params_shape
-                )
-                two_qubit_params = two_qubit_params.reshape(two_qubit_params_shape)
-                circuit(single_qubit_params, two_qubit_params)
-                return qml.probs()
+        @qml.qnode(dev, interface="jax")
+        def vqe_circuit(params):
+            apply_ansatz(params)
+            return qml.expval(cost_hamiltonian)
 
-        solver = optax.adamw(learning_rate=0.01)
-        probs = vqe_probs_circuit(params)
-        self.vqe_circuit = vqe_circuit
-        total_steps = 0
-        attempts = 0
-        limit_steps = 500
-        success = False
-        jit_circuit = jax.jit(self.vqe_circuit)
-
-        while True:
-            steps = 10
-            opt_state = solver.init(params)
-            for _ in range(steps):
-                grad = jax.grad(jit_circuit)(params)
-                updates, opt_state = solver.update(grad, opt_state, params)
-                params = optax.apply_updates(params, updates)
-
-            total_steps += steps
-            probs = vqe_probs_circuit(params)
-
-            most_probable_state = np.argsort(probs)[-1]
-            most_probable_state = int_to_bitstring(most_probable_state, self.n_qubits)
-
-            if most_probable_state in self.smallest_bitstrings:
-                success = True
-                break
+        @qml.qnode(dev, interface="jax")
+        def vqe_probs_circuit(params):
+            apply_ansatz(params)
+            return qml.probs()
 
-            if total_steps > limit_steps:
-                print("Optimization did not converge")
-                print("Trying with a new initialization")
-
-                if two_qubit_params_shape is None:
-                    params = jnp.array(
-                        0.01 * np.random.rand(*single_qubit_params_shape)
-                    )
-                else:
-                    single_qubit_params = jnp.array(
-                        0.01 * np.random.rand(*single_qubit_params_shape)
-                    )
-                    single_qubit_params_size = single_qubit_params.size
-                    two_qubit_params = jnp.array(
-                        0.01 * np.random.rand(*two_qubit_params_shape)
-                    )
-                    params = jnp.concatenate(
-                        [single_qubit_params.flatten(), two_qubit_params.flatten()]
-                    )
-
-                total_steps = 0
-                attempts += 1
-
-            if attempts > 2:
-                print(
-                    "Optimization did not converge to the known optimal solution after ",
-                    attempts,
-                    " attempts.",
+        self.vqe_circuit = vqe_circuit
+        if self.is_diagonal():
+            # The expectation value of a diagonal Hamiltonian follows from the
+            # probabilities, so the circuit does not depend on the instance
+            def build(cache):
+                return VariationalOptimizer(
+                    lambda params, energies: jnp.dot(vqe_probs_circuit(params), energies),
+                    lambda params, _: vqe_probs_circuit(params),
+                    cache=cache,
                 )
-                break
 
-        probs = vqe_probs_circuit(params)
-        expectation_value = self.vqe_circuit(params)
+            optimizer = CIRCUIT_CACHE.get(
+                OptimizationType.VQE, ansatz_id, self.n_qubits, self.p, build
+            )
+            hamiltonian = jnp.asarray(self.get_energies())
+        else:
+            optimizer = VariationalOptimizer(
+                lambda params, _: vqe_circuit(params),
+                lambda params, _: vqe_probs_circuit(params),
+            )
+            hamiltonian = None
+
+        def new_params():
+            if two_qubit_params_shape is None:
+                return jnp.array(0.01 * np.random.rand(*single_qubit_params_shape))
+            single_qubit_params = jnp.array(
+                0.01 * np.random.rand(*single_qubit_params_shape)
+            )
+            two_qubit_params = jnp.array(0.01 * np.random.rand(*two_qubit_params_shape))
+            return jnp.concatenate(
+                [single_qubit_params.flatten(), two_qubit_params.flatten()]
+            )
+
+        params, total_steps, success, probs, start = self._optimize(
+            optimizer, hamiltonian, params, new_params, max_attempts=2
+        )
+        expectation_value = optimizer.expectation_value(params, hamiltonian)
         two_most_probable_states = np.argsort(probs)[-2:]
         states_probs = [probs[i] for i in two_most_probable_states]
 
@@ -424,6 +702,7 @@ class BinaryOptimizationProblem(Solver):
             "total_steps": total_steps,
             "states_probs": states_probs,
             "success": success,
+            "start": start,
             "single_qubit_params": single_qubit_params,
             "two_qubit_params": two_qubit_params,
         }
@@ -443,20 +722,26 @@ class BinaryOptimizationProblem(Solver):
 
     def solve_with_adaptive_vqe(self) -> Dict:
         print("Solving with Adaptive VQE")
-        # Round initial operator parameters to 4 decimal places
-        operator_pool = [qml.RX(round(0.001, 4), i) for i in range(self.n_qubits)]
-        operator_pool += [qml.RY(round(0.001, 4), i) for i in range(self.n_qubits)]
-        operator_pool += [qml.RZ(round(0.001, 4), i) for i in range(self.n_qubits)]
+        # The pool gates are appended at angle 0, so that qml.AdaptiveOptimizer
+        # takes the same commutator gradients as AdaptVQE
+        operator_pool = [qml.RX(0.0, i) for i in range(self.n_qubits)]
+        operator_pool += [qml.RY(0.0, i) for i in range(self.n_qubits)]
+        operator_pool += [qml.RZ(0.0, i) for i in range(self.n_qubits)]
         for i in range(self.n_qubits):
             for j in range(self.n_qubits):
                 if i != j:
-                    operator_pool.append(qml.CRZ(round(0.001, 4), wires=[i, j]))
-                    operator_pool.append(qml.CRX(round(0.001, 4), wires=[i, j]))
-                    operator_pool.append(qml.CRY(round(0.001, 4), wires=[i, j]))
+                    operator_pool.append(qml.CRZ(0.0, wires=[i, j]))
+                    operator_pool.append(qml.CRX(0.0, wires=[i, j]))
+                    operator_pool.append(qml.CRY(0.0, wires=[i, j]))
 
         dev = self._create_quantum_device(self.n_qubits)
         opt = qml.AdaptiveOptimizer()
         cost_hamiltonian = self.get_cost_hamiltonian()
+        # For a diagonal Hamiltonian all pool gradients follow from the
+        # statevector, see src/adaptive_vqe.py
+        engine = (
+            AdaptVQE(self.get_energies(), self.n_qubits) if self.is_diagonal() else None
+        )
 
         adaptive_vqe_circuit = self.create_adaptive_circuit(
             self.n_qubits, cost_hamiltonian
@@ -464,44 +749,48 @@ class BinaryOptimizationProblem(Solver):
 
         total_steps = 0
         max_steps = 100
-        adaptive_circuits = []
+        # Only the added operator and its angle are recorded per step, the QASM
+        # of every step is produced on demand by get_adaptive_circuits
+        adaptive_operations = []
         for i in range(max_steps):
-            adaptive_vqe_circuit, energy, gradient = opt.step_and_cost(
-                adaptive_vqe_circuit, operator_pool, drain_pool=True
-            )
+            if engine is None:
+                adaptive_vqe_circuit, energy, gradient = opt.step_and_cost(
+                    adaptive_vqe_circuit, operator_pool, drain_pool=True
+                )
+                operation = qml.workflow.construct_tape(adaptive_vqe_circuit)().operations[-1]
+                adaptive_operations.append((operation, operation.data[0]))
+            else:
+                gate, theta, energy, gradient = engine.step(operator_pool)
+                adaptive_operations.append((gate, theta))
             print(
                 f"Step {i} for problem {self.description} qubits: {self.n_qubits}, Energy: {round(float(energy), 4)}, Gradient: {round(float(gradient), 4)}"
             )
 
-            # Store rounded values
-            circuit_qasm = qasm3.dumps(
-                pennylane_to_qiskit(
-                    adaptive_vqe_circuit,
-                    self.n_qubits,
-                    params=None,
-                    symbolic_params=False,
-                    adapt_vqe=True,
-                )
-            )
-            adaptive_circuits.append(circuit_qasm)
             self.adaptive_gradients.append(round(float(gradient), 4))
             total_steps += 1
             if float(gradient) < 3e-3:  # Compare with rounded gradient
                 break
 
-        self.adaptive_circuits = adaptive_circuits
+        self.adaptive_operations = adaptive_operations
+        self.adaptive_circuits = []
+        if engine is not None:
+            adaptive_vqe_circuit = self._adaptive_circuit(len(adaptive_operations))
 
         # fig, ax = qml.draw_mpl(adaptive_vqe_circuit)()
         # fig.savefig("adaptive_vqe_circuit.png")
 
         self.adaptive_vqe_circuit = adaptive_vqe_circuit
-        expectation_value = adaptive_vqe_circuit()
-        probs_circuit = copy_circuit_with_new_measurement(
-            adaptive_vqe_circuit, qml.probs
-        )
+        if engine is None:
+            expectation_value = adaptive_vqe_circuit()
+            probs_circuit = copy_circuit_with_new_measurement(
+                adaptive_vqe_circuit, qml.probs
+            )
 
-        # Run the QNode
-        probs = probs_circuit()
+            # Run the QNode
+            probs = probs_circuit()
+        else:
+            expectation_value = engine.energy()
+            probs = np.abs(engine.state) ** 2
         most_probable_states = np.argsort(probs)[-2:]
         most_probable_state = most_probable_states[-1]
         states_probs = [probs[i] for i in most_probable_states]
@@ -523,13 +812,7 @@ class BinaryOptimizationProblem(Solver):
     def get_circuits(self):
         return self.qaoa_circuit, self.vqe_circuit, self.adaptive_vqe_circuit
 
-    def circuit_to_qasm(
-        self,
-        optimization_type: OptimizationType,
-        params=None,
-        symbolic_params=True,
-        adapt_vqe=False,
-    ):
+    def _circuit(self, optimization_type: OptimizationType):
         circuit = None
         if optimization_type == OptimizationType.QAOA:
             circuit = self.qaoa_circuit
@@ -542,15 +825,44 @@ class BinaryOptimizationProblem(Solver):
             raise ValueError(
                 f"No circuit defined for optimization type {optimization_type}"
             )
+        return circuit
+
+    def get_qaoa_qasm_template(self):
+        """QASM template of the QAOA circuit, built on first use for the current layers."""
+        if self.qaoa_qasm_template is None:
+            self.qaoa_qasm_template = QAOAQasmTemplate(
+                self.coeffs, self.terms, self.n_qubits, self.p
+            )
+        return self.qaoa_qasm_template
 
-        qiskit_circuit = pennylane_to_qiskit(
-            circuit,
+    def _qasm(self, optimization_type, params, symbolic_params, adapt_vqe):
+        if optimization_type == OptimizationType.QAOA and params is not None:
+            return self.get_qaoa_qasm_template().qasm(params, symbolic_params)
+        return tape_to_qasm(
+            self._circuit(optimization_type),
             self.n_qubits,
             params=params,
             symbolic_params=symbolic_params,
             adapt_vqe=adapt_vqe,
         )
-        return qasm3.dumps(qiskit_circuit)
+
+    def circuit_to_qasm(
+        self,
+        optimization_type: OptimizationType,
+        params=None,
+        symbolic_params=True,
+        adapt_vqe=False,
+    ):
+        numeric, symbolic = self._qasm(
+            optimization_type, params, symbolic_params, adapt_vqe
+        )
+        return symbolic if symbolic_params else numeric
+
+    def circuits_to_qasm(
+        self, optimization_type: OptimizationType, params=None, adapt_vqe=False
+    ):
+        """QASM with numeric and with symbolic parameters."""
+        return self._qasm(optimization_type, params, True, adapt_vqe)
 
     def get_number_of_qubits(self):
         return self.n_qubits
@@ -561,15 +873,44 @@ class BinaryOptimizationProblem(Solver):
     def get_variables_to_qubits(self):
         return self.variables_to_qubits
 
+    def _adaptive_circuit(self, n_operations):
+        """Adaptive VQE QNode with the first n_operations recorded operators."""
+        circuit = self.create_adaptive_circuit(self.n_qubits, self.get_cost_hamiltonian())
+        if n_operations == 0:
+            return circuit
+        gates, angles = zip(*self.adaptive_operations[:n_operations])
+        qnode = copy.copy(circuit)
+        qnode.func = append_gate(circuit.func, list(angles), list(gates))
+        return qnode
+
     def get_adaptive_circuits(self):
-        adaptive_circuits_qasm = []
-        for circuit in self.adaptive_circuits:
-            qiskit_circuit = pennylane_to_qiskit(
-                circuit, self.n_qubits, params=None, symbolic_params=False
+        """
+        QASM of the adaptive VQE circuit after every step, materialized on first use.
+        Every step adds one gate, so the circuit of step k is the Hadamard
+        layer and the first k gates of the final circuit, whose tape is
+        expanded once and sliced.
+        """
+        if len(self.adaptive_circuits) == len(self.adaptive_operations):
+            return self.adaptive_circuits
+
+        n_steps = len(self.adaptive_operations)
+        operations = qasm_operations(self._adaptive_circuit(n_steps), None, self.n_qubits)
+        if operations is not None and len(operations) != self.n_qubits + n_steps:
+            # Some gate was decomposed, convert every step separately
+            operations = None
+
+        adaptive_circuits = []
+        for k in range(1, n_steps + 1):
+            circuit_with_params, _ = tape_to_qasm(
+                self._adaptive_circuit(k) if operations is None else None,
+                self.n_qubits,
+                symbolic_params=False,
+                adapt_vqe=True,
+                operations=None if operations is None else operations[: self.n_qubits + k],
             )
-            qasm = qasm3.dumps(qiskit_circuit)
-            adaptive_circuits_qasm.append(qasm)
-        return adaptive_circuits_qasm
+            adaptive_circuits.append(circuit_with_params)
+        self.adaptive_circuits = adaptive_circuits
+        return self.adaptive_circuits
 
     def get_adaptive_gradients(self):
         return self.adaptive_gradients
@@ -0,0 +1,252 @@
+"""
+Branch-and-bound exact solver for Ising cost Hamiltonians
+E(s) = sum_i h_i s_i + sum_{i<j} J_ij s_i s_j with s_i in {-1, 1}.
+
+The search fixes spins one at a time in order of decreasing coupling
+strength. When spins 0..k-1 are fixed, the energy of the remaining spins is
+bounded from below by the larger of
+
+    E_fixed + sum_{k <= i < j} min_{s_i, s_j} (J_ij s_i s_j + a_i s_i + a_j s_j)
+            - sum_{i >= k} |a_i|,
+    E_fixed + min_suffix(k) - sum_{i >= k} |f_i - h_i|,
+
+where f_i = h_i + sum_{j < k} J_ij s_j is the local field, a_i is f_i split
+evenly between spin i and its free couplings, and min_suffix(k) is the exact
+ground energy of the subproblem on spins k..n-1 alone. The first bound is a
+decomposition of the free part into independent couplings; it is never weaker
+than the linear relaxation bound -sum |f_i| - sum |J_ij|. The suffix
+minima are computed first, from the shortest suffix to the longest, each one
+pruned with the bounds of the shorter ones (Russian doll search).
+
+Subtrees whose bound exceeds the best known first excited energy cannot
+contain a ground state or a first excited state and are pruned. Once only
+leaf_bits spins are free, all completions are enumerated at once with NumPy.
+
+Unlike a plain optimizer, the search keeps every ground state and the first
+excited energy, which is what ExactSolution stores.
+"""
+
+import numpy as np
+
+from src.energy import diagonal_energies, lowest_energies
+
+
+class BranchAndBound:
+    def __init__(self, coeffs, terms, n_qubits, leaf_bits=12, atol=1e-8):
+        self.n_qubits = n_qubits
+        self.atol = atol
+
+        h = np.zeros(n_qubits)
+        J = np.zeros((n_qubits, n_qubits))
+        for coeff, wires in zip(coeffs, terms):
+            if len(wires) == 1:
+                h[wires[0]] += coeff
+            elif len(wires) == 2:
+                J[wires[0], wires[1]] += coeff
+                J[wires[1], wires[0]] += coeff
+            elif len(wires) > 2:
+                raise ValueError(
+                    "Branch and bound supports only linear and quadratic terms"
+                )
+
+        self.order = self._branching_order(h, J)
+        self.h = h[self.order]
+        self.J = J[np.ix_(self.order, self.order)]
+
+        # Couplings i < j sorted by i, so the couplings among spins k..n-1
+        # are the slice pair_start[k]: of the pair arrays
+        self.pair_i, self.pair_j = np.nonzero(np.triu(self.J, k=1))
+        self.pair_coupling = self.J[self.pair_i, self.pair_j]
+        self.pair_start = np.searchsorted(self.pair_i, np.arange(n_qubits + 1))
+        # free_degree[k, i] = number of couplings of spin i among spins k..n-1
+        self.free_degree = np.zeros((n_qubits + 1, n_qubits))
+        for k in range(n_qubits):
+            start = self.pair_start[k]
+            np.add.at(self.free_degree[k], self.pair_i[start:], 1)
+            np.add.at(self.free_degree[k], self.pair_j[start:], 1)
+
+        # The quadratic energy of the last leaf_bits spins does not depend on
+        # the fixed spins, so it is computed once for all leaves
+        self.leaf_bits = min(leaf_bits, n_qubits)
+        self.leaf_start = n_qubits - self.leaf_bits
+        leaf_terms = []
+        leaf_coeffs = []
+        for i in range(self.leaf_bits):
+            for j in range(i + 1, self.leaf_bits):
+                coupling = self.J[self.leaf_start + i, self.leaf_start + j]
+                if coupling != 0:
+                    leaf_terms.append((i, j))
+                    leaf_coeffs.append(coupling)
+        self.leaf_quadratic = diagonal_energies(leaf_coeffs, leaf_terms, self.leaf_bits)
+        indices = np.arange(2**self.leaf_bits)[:, None]
+        shifts = self.leaf_bits - 1 - np.arange(self.leaf_bits)[None, :]
+        self.leaf_spins = (1 - 2 * ((indices >> shifts) & 1)).astype(np.int8)
+
+        self.nodes = 0
+        self.suffix_minimum = None
+
+    @staticmethod
+    def _branching_order(h, J):
+        """
+        Start from the most strongly coupled spin and repeatedly take the spin
+        most strongly coupled to the ones already taken, so that fixing a
+        prefix determines as much of the energy as possible.
+        """
+        n_qubits = len(h)
+        strength = np.abs(h) + np.abs(J).sum(axis=1)
+        order = [int(np.argmax(strength))]
+        taken = np.zeros(n_qubits, dtype=bool)
+        taken[order[0]] = True
+        connection = np.abs(J[order[0]]).copy()
+        for _ in range(n_qubits - 1):
+            score = np.where(taken, -np.inf, connection + 1e-9 * strength)
+            spin = int(np.argmax(score))
+            order.append(spin)
+            taken[spin] = True
+            connection += np.abs(J[spin])
+        return np.array(order)
+
+    def solve(self):
+        """
+        Return (ground energy, ground states, first excited energy).
+        Ground states are spin arrays of shape (k, n_qubits) in wire order.
+        """
+        self.nodes = 0
+        self._compute_suffix_minima()
+
+        self.ground_energy = np.inf
+        self.ground_states = []
+        self.first_excited_energy = np.inf
+        spins = np.zeros(self.n_qubits, dtype=np.int8)
+        self._branch(0, 0.0, self.h.copy(), spins)
+
+        ground_states = np.zeros((len(self.ground_states), self.n_qubits), dtype=np.int8)
+        ground_states[:, self.order] = np.array(self.ground_states, dtype=np.int8)
+        first_excited_energy = (
+            None if np.isinf(self.first_excited_energy) else self.first_excited_energy
+        )
+        return self.ground_energy, ground_states, first_excited_energy
+
+    def _compute_suffix_minima(self):
+        self.suffix_minimum = np.full(self.n_qubits + 1, -np.inf)
+        self.suffix_minimum[self.n_qubits] = 0.0
+
+        # Suffixes inside the leaf block are small enough to enumerate
+        for k in range(self.leaf_start, self.n_qubits):
+            terms = [(i - k,) for i in range(k, self.n_qubits)]
+            coeffs = list(self.h[k:])
+            for i in range(k, self.n_qubits):
+                for j in range(i + 1, self.n_qubits):
+                    if self.J[i, j] != 0:
+                        terms.append((i - k, j - k))
+                        coeffs.append(self.J[i, j])
+            energies = diagonal_energies(coeffs, terms, self.n_qubits - k)
+            self.suffix_minimum[k] = np.min(energies)
+
+        for k in range(self.leaf_start - 1, -1, -1):
+            self.best_energy = np.inf
+            spins = np.zeros(self.n_qubits, dtype=np.int8)
+            self._minimize(k, k, 0.0, self.h.copy(), spins)
+            self.suffix_minimum[k] = self.best_energy
+
+    def _pair_bound(self, k, fields):
+        """
+        Lower bound of sum_{i >= k} f_i s_i + sum_{k <= i < j} J_ij s_i s_j.
+        Every field is split evenly between the spin itself and its couplings,
+        then each coupling is minimized exactly over its two spins.
+        """
+        shares = fields / (self.free_degree[k] + 1)
+        start = self.pair_start[k]
+        a = shares[self.pair_i[start:]]
+        b = shares[self.pair_j[start:]]
+        coupling = self.pair_coupling[start:]
+        pair_minimum = np.minimum(coupling - np.abs(a + b), -coupling - np.abs(a - b))
+        return pair_minimum.sum() - np.abs(shares[k:]).sum()
+
+    def _bound(self, k, fixed_energy, fields):
+        pair_bound = self._pair_bound(k, fields)
+        suffix_bound = self.suffix_minimum[k] - np.abs(fields[k:] - self.h[k:]).sum()
+        return fixed_energy + max(pair_bound, suffix_bound)
+
+    def _minimize(self, start, k, fixed_energy, fields, spins):
+        """Ground energy only, for the subproblem on spins start..n-1."""
+        self.nodes += 1
+        if k == self.leaf_start:
+            energies = (
+                fixed_energy
+                + self.leaf_spins @ fields[self.leaf_start :]
+                + self.leaf_quadratic
+            )
+            self.best_energy = min(self.best_energy, np.min(energies))
+            return
+
+        if k > start and self._bound(k, fixed_energy, fields) >= self.best_energy:
+            return
+
+        first = -1 if fields[k] > 0 else 1
+        for spin in (first, -first):
+            spins[k] = spin
+            self._minimize(
+                start,
+                k + 1,
+                fixed_energy + spin * fields[k],
+                fields + spin * self.J[k],
+                spins,
+            )
+        spins[k] = 0
+
+    def _branch(self, k, fixed_energy, fields, spins):
+        self.nodes += 1
+        if k == self.leaf_start:
+            self._enumerate_leaf(fixed_energy, fields, spins)
+            return
+
+        if self._bound(k, fixed_energy, fields) > self.first_excited_energy + self.atol:
+            return
+
+        # Try the locally better spin first to find good incumbents early
+        first = -1 if fields[k] > 0 else 1
+        for spin in (first, -first):
+            spins[k] = spin
+            self._branch(
+                k + 1,
+                fixed_energy + spin * fields[k],
+                fields + spin * self.J[k],
+                spins,
+            )
+        spins[k] = 0
+
+    def _enumerate_leaf(self, fixed_energy, fields, spins):
+        free_fields = fields[self.leaf_start :]
+        energies = fixed_energy + self.leaf_spins @ free_fields + self.leaf_quadratic
+        smallest_energy, ground_indices, first_excited_energy = lowest_energies(
+            energies, atol=self.atol
+        )
+
+        if smallest_energy < self.ground_energy - self.atol:
+            self.first_excited_energy = min(
+                self.first_excited_energy, self.ground_energy
+            )
+            self.ground_energy = smallest_energy
+            self.ground_states = []
+        elif smallest_energy > self.ground_energy + self.atol:
+            self.first_excited_energy = min(self.first_excited_energy, smallest_energy)
+            return
+
+        for index in ground_indices:
+            state = spins.copy()
+            state[self.leaf_start :] = self.leaf_spins[index]
+            self.ground_states.append(state)
+        if first_excited_energy is not None:
+            self.first_excited_energy = min(
+                self.first_excited_energy, first_excited_energy
+            )
+
+
+def branch_and_bound_ground_states(coeffs, terms, n_qubits, leaf_bits=12, atol=1e-8):
+    """
+    Return (ground energy, ground states, first excited energy) of the Ising
+    Hamiltonian sum_t c_t prod_{w in t} Z_w, see BranchAndBound.
+    """
+    solver = BranchAndBound(coeffs, terms, n_qubits, leaf_bits=leaf_bits, atol=atol)
+    return solver.solve()
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, List, Optional
 
@@ -130,6 +130,8 @@ class OptimizationProblem:
     signature: str
     graph: str
     cost_hamiltonian: str
+    # Lossless compact encoding of cost_hamiltonian, see IsingHamiltonian.to_dict
+    cost_hamiltonian_terms: Optional[dict]
     number_of_qubits: int
     number_of_layers: int
     ansatz_id: Optional[int]
@@ -139,3 +141,7 @@ class OptimizationProblem:
     circuit_with_params: Optional[str]
     circuit_with_symbols: Optional[str]
     problem_specific_attributes: Optional[CommunityDetectionAttributes]
+    # "reduced" if a higher order problem was reduced to a QUBO, see src/reduction.py
+    formulation: str = "native"
+    # Qubits of the ancilla variables of a reduced problem
+    ancilla_qubits: List[int] = field(default_factory=list)
@@ -2,6 +2,7 @@ import glob
 import itertools
 import json
 import multiprocessing
+import multiprocessing.util
 import os
 import random
 import time
@@ -10,6 +11,7 @@ from concurrent.futures import ProcessPoolExecutor
 from typing import List
 
 import jax.numpy as jnp
+import networkx as nx
 import pennylane as qml
 from networkx import weisfeiler_lehman_graph_hash
 from networkx.readwrite import json_graph
@@ -29,6 +31,7 @@ from src.algorithms.matching.matching import Matching
 from src.algorithms.max_flow.max_flow import MaxFlow
 from src.algorithms.min_cut.min_cut import MinCut
 from src.algorithms.steiner_tree.steiner_tree import SteinerTree
+from src.algorithms.steiner_tree.validation import check_steiner_trees
 from src.algorithms.vertex_cover.vertex_cover import VertexCover
 from src.binary_optimization_problem import (
     BinaryOptimizationProblem,
@@ -51,11 +54,25 @@ from src.data_classes import (
     QuantumSolution,
     SteinerTreeAttributes,
 )
+from src.exact_solution_cache import ExactSolutionCache
+from src.optimization.circuit_cache import CIRCUIT_CACHE
+from src.optimization.warm_start import extend_qaoa_params, extend_vqe_params
+from src.reduction import ancilla_variables, select_formulation
 from src.utils import DataclassJSONEncoder, get_qasm_circuits, int_to_bitstring
 
 multiprocessing.set_start_method("spawn", force=True)
+# Exact solving is cheap for diagonal Hamiltonians (see src/energy.py),
+# the limit only bounds the statevector simulation of the variational solvers.
 QUBIT_LIMIT = 16
 
+# Exact solver used for each problem type, see BinaryOptimizationProblem.solve_exactly.
+# Problem types that are not listed use "auto".
+EXACT_SOLVER_METHODS = {
+    OptimizationProblemType.GRAPH_ISOMORPHISM: "branch_and_bound",
+    OptimizationProblemType.HAMILTONIAN_PATH: "branch_and_bound",
+    OptimizationProblemType.STEINER_TREE: "branch_and_bound",
+}
+
 
 def _get_device_type():
     """Determine if GPU is available through JAX"""
@@ -69,10 +86,18 @@ def _get_device_type():
     return "cpu"
 
 
+def _report_circuit_cache():
+    print(f"Circuit cache: {CIRCUIT_CACHE.stats()}")
+
+
 def _worker_init():
     """Initialize JAX and PennyLane for each worker process"""
     import jax
 
+    # Every worker has its own circuit cache, reported once when it exits
+    if multiprocessing.parent_process() is not None:
+        multiprocessing.util.Finalize(None, _report_circuit_cache, exitpriority=0)
+
     device_type = _get_device_type()
 
     if device_type == "gpu":
@@ -94,13 +119,106 @@ def _process_task(args):
             generator.ansatz_template,
             (i, 1),
         )
-        if solution:
-            generator._save_solution(solution)
+        for problem_data in solution:
+            generator._save_solution(problem_data)
         return True
     except Exception as exc:
         print(f"Processing failed with exception: {exc}")
         traceback.print_exc()
         return False
+    finally:
+        # Workers get a copy of the generator per task, save its cache metrics
+        if generator.exact_cache is not None:
+            generator.exact_cache.close()
+
+
+def build_problem(problem: OptimizationProblemType, graph_data):
+    """
+    Construct the QUBO/HUBO formulation of a single problem instance.
+
+    Returns the graph, the problem object and the problem specific attributes.
+    """
+    graph = None
+    binary_polynomial = None
+    problem_specific_attributes = None
+    # --------- Parse the graph data and construct problem ---------
+    # The graph data is different for each optimization problem.
+    # Also build the probelem specific attributes for each problem.
+    if problem == OptimizationProblemType.COMMUNITY_DETECTION:
+        graph, n_communities, size_communities = graph_data
+        binary_polynomial = CommunityDetection(graph, n_communities)
+        problem_specific_attributes = CommunityDetectionAttributes(
+            communities_size=size_communities, number_of_communities=n_communities
+        )
+    elif problem == OptimizationProblemType.HYPERMAXCUT:
+        # If the problem is HyperMaxCut, graph_data is a hypergraph
+        graph = graph_data
+        binary_polynomial = HyperMaxCut(graph)
+    elif problem == OptimizationProblemType.CONNECTED_COMPONENTS:
+        graph, node, components = graph_data
+        binary_polynomial = ConnectedComponentContainingNode(graph, node)
+        problem_specific_attributes = ConnectedComponentAttributes(node=node)
+    elif problem == OptimizationProblemType.GRAPH_COLORING:
+        graph, n_colors, coloring = graph_data
+        binary_polynomial = GraphColoring(graph, n_colors)
+        problem_specific_attributes = GraphColoringAttributes(
+            number_of_colors=n_colors
+        )
+    elif problem == OptimizationProblemType.GRAPH_ISOMORPHISM:
+        if len(graph_data) == 2:
+            # The shipped data set stores only the graph and the automorphism
+            graph, automorphism = graph_data
+            graph_2 = nx.relabel_nodes(graph, automorphism)
+        else:
+            graph, graph_2, automorphism = graph_data
+        binary_polynomial = GraphIsomorphism(graph, graph_2, automorphism)
+        problem_specific_attributes = GraphIsomorphismAttributes(
+            autoisomorphic_graph=json_graph.node_link_data(graph_2, edges="edges")
+        )
+    elif problem == OptimizationProblemType.K_CLIQUE:
+        graph, complete_graph, k = graph_data
+        binary_polynomial = KClique(graph, k, complete_graph)
+        problem_specific_attributes = KCliqueAttributes(k=k)
+    elif problem == OptimizationProblemType.HAMILTONIAN_PATH:
+        graph, hamiltonian_path, start_node, end_node = graph_data
+        binary_polynomial = HamiltonianPath(
+            graph, hamiltonian_path, start_node, end_node
+        )
+        problem_specific_attributes = HamiltonianPathAttributes(
+            start_node=start_node, end_node=end_node
+        )
+    elif problem == OptimizationProblemType.MATCHING:
+        graph, graph_2, matching, extra = graph_data
+        binary_polynomial = Matching(graph, graph_2)
+        problem_specific_attributes = MatchingAttributes(
+            matching=matching, extra=json.dumps(extra)
+        )
+    elif problem == OptimizationProblemType.MAX_FLOW:
+        graph, source, sink, max_flow, flow_dict, cut_value, cut_edges = graph_data
+        binary_polynomial = MaxFlow(graph, source, sink, max_flow, flow_dict)
+        problem_specific_attributes = MaxFlowAttributes(source=source, sink=sink)
+    elif problem == OptimizationProblemType.MIN_CUT:
+        graph, source, sink, max_flow, flow_dict, cut_value, cut_edges = graph_data
+        binary_polynomial = MinCut(graph, source, sink, cut_value, cut_edges)
+        problem_specific_attributes = MinCutAttributes(source=source, sink=sink)
+    elif problem == OptimizationProblemType.STEINER_TREE:
+        graph, terminals, steiner_tree, optimal_weight = graph_data
+        binary_polynomial = SteinerTree(
+            graph, terminals, steiner_tree, optimal_weight
+        )
+        problem_specific_attributes = SteinerTreeAttributes(
+            terminal_nodes=terminals
+        )
+    elif problem == OptimizationProblemType.EDGE_COVER:
+        graph, edge_cover, cover_size = graph_data
+        binary_polynomial = EdgeCover(graph, edge_cover)
+    elif problem == OptimizationProblemType.VERTEX_COVER:
+        graph, vertex_cover, cover_size = graph_data
+        binary_polynomial = VertexCover(graph, vertex_cover)
+    else:
+        raise ValueError("Invalid optimization problem.")
+
+    return graph, binary_polynomial, problem_specific_attributes
 
 
 class DataGenerator:
@@ -114,6 +232,19 @@ class DataGenerator:
         ansatz_template (int): The template ID for the quantum circuit ansatz.
         layers (int): Number of layers in the quantum circuit.
         vqe (bool): Solve with VQE or other methods.
+        qubit_limit (int): Problems with more qubits than this are skipped.
+        exact_solver (str): Exact solver method, defaults to EXACT_SOLVER_METHODS for the problem.
+        exact_cache (str): Path of an SQLite file caching exact solutions between runs.
+        graph_index (str): Path of a GraphIndex file, graphs generated by earlier runs
+            with it are not generated again.
+        n_starts (int): Initializations optimized at once by QAOA and VQE.
+        warm_start (bool): Solve QAOA and VQE for 1..layers layers, seeding each from the previous one.
+        warm_start_schedule (str): QAOA parameter transfer, "interp" or "extrapolate".
+        sa_check_reads (int): Steiner tree only, check the QUBO of every instance
+            with this many simulated annealing reads before solving, 0 skips the check.
+        formulation (str): Higher order problems only, "native", "reduced" to a QUBO
+            with ancillas, or "auto" to choose per instance, see src/reduction.py.
+            The records store the formulation and the qubits of the ancillas.
     """
 
     def __init__(
@@ -123,6 +254,15 @@ class DataGenerator:
         ansatz_template: int,
         layers: int,
         vqe: bool = False,
+        qubit_limit: int = QUBIT_LIMIT,
+        exact_solver: str = None,
+        exact_cache: str = None,
+        graph_index: str = None,
+        n_starts: int = 1,
+        warm_start: bool = False,
+        warm_start_schedule: str = "interp",
+        sa_check_reads: int = 0,
+        formulation: str = "native",
     ):
         self.problem = problem
         self.output_path = output_path
@@ -130,6 +270,15 @@ class DataGenerator:
         self.layers = layers
         self.device_type = _get_device_type()
         self.vqe = vqe
+        self.qubit_limit = qubit_limit
+        self.exact_solver = exact_solver or EXACT_SOLVER_METHODS.get(problem, "auto")
+        self.exact_cache = ExactSolutionCache(exact_cache) if exact_cache else None
+        self.graph_index = graph_index
+        self.n_starts = n_starts
+        self.warm_start = warm_start
+        self.warm_start_schedule = warm_start_schedule
+        self.sa_check_reads = sa_check_reads
+        self.formulation = formulation
         print(f"Using device type: {self.device_type}")
 
     def generate_data(self) -> None:
@@ -137,196 +286,204 @@ class DataGenerator:
         Retrieves graph data, converts it into binary optimization problems,
         and processes each using all available optimization types.
         """
-        graph_data = get_problem_data(self.problem, generate_data=True)
+        graph_data = get_problem_data(
+            self.problem, generate_data=True, index_path=self.graph_index
+        )
+
+        if self.problem == OptimizationProblemType.STEINER_TREE and self.sa_check_reads:
+            self._check_steiner_trees(graph_data)
 
         # Process the binary problems for each optimization type.
         self._process_problems(graph_data, self.ansatz_template)
 
+    def _check_steiner_trees(self, graph_data: List) -> None:
+        """
+        Simulated annealing check of the Steiner tree QUBOs, cached per
+        instance in the output directory.
+        """
+        cache_path = (
+            os.path.join(self.output_path, "steiner_tree_sa_checks.json")
+            if self.output_path
+            else None
+        )
+        checks = check_steiner_trees(
+            graph_data, num_reads=self.sa_check_reads, cache_path=cache_path
+        )
+        failed = [check for check in checks.values() if not check.isomorphic]
+        print(
+            f"Simulated annealing check: {len(checks) - len(failed)}/{len(checks)} "
+            "instances solved to an isomorphic Steiner tree"
+        )
+        for check in failed:
+            print(
+                f"Instance {check.signature}: best energy {check.best_energy}, "
+                f"edges {check.edges} not isomorphic to the Steiner tree"
+            )
+
     def _process_problem(
         self,
         graph_data: str,
         optimization_type: OptimizationType,
         ansatz_template: int,
         iteration_info: tuple,
-    ) -> OptimizationProblem:
+    ) -> List[OptimizationProblem]:
         """
         Process a single binary optimization problem.
+        Returns one OptimizationProblem per solved number of layers.
         """
 
-        binary_polynomial = None
-        problem_specific_attributes = None
-        # --------- Parse the graph data and construct problem ---------
-        # The graph data is different for each optimization problem.
-        # Also build the probelem specific attributes for each problem.
-        if self.problem == OptimizationProblemType.COMMUNITY_DETECTION:
-            graph, n_communities, size_communities = graph_data
-            binary_polynomial = CommunityDetection(graph, n_communities)
-            problem_specific_attributes = CommunityDetectionAttributes(
-                communities_size=size_communities, number_of_communities=n_communities
-            )
-        elif self.problem == OptimizationProblemType.HYPERMAXCUT:
-            # If the problem is HyperMaxCut, graph_data is a hypergraph
-            graph = graph_data
-            binary_polynomial = HyperMaxCut(graph)
-        elif self.problem == OptimizationProblemType.CONNECTED_COMPONENTS:
-            graph, node, components = graph_data
-            binary_polynomial = ConnectedComponentContainingNode(graph, node)
-            problem_specific_attributes = ConnectedComponentAttributes(node=node)
-        elif self.problem == OptimizationProblemType.GRAPH_COLORING:
-            graph, n_colors, coloring = graph_data
-            binary_polynomial = GraphColoring(graph, n_colors)
-            problem_specific_attributes = GraphColoringAttributes(
-                number_of_colors=n_colors
-            )
-        elif self.problem == OptimizationProblemType.GRAPH_ISOMORPHISM:
-            graph, graph_2, automorphism = graph_data
-            binary_polynomial = GraphIsomorphism(graph, graph_2, automorphism)
-            problem_specific_attributes = GraphIsomorphismAttributes(
-                autoisomorphic_graph=json_graph.node_link_data(graph_2, edges="edges")
-            )
-        elif self.problem == OptimizationProblemType.K_CLIQUE:
-            graph, complete_graph, k = graph_data
-            binary_polynomial = KClique(graph, k, complete_graph)
-            problem_specific_attributes = KCliqueAttributes(k=k)
-        elif self.problem == OptimizationProblemType.HAMILTONIAN_PATH:
-            graph, hamiltonian_path, start_node, end_node = graph_data
-            binary_polynomial = HamiltonianPath(
-                graph, hamiltonian_path, start_node, end_node
-            )
-            problem_specific_attributes = HamiltonianPathAttributes(
-                start_node=start_node, end_node=end_node
-            )
-        elif self.problem == OptimizationProblemType.MATCHING:
-            graph, graph_2, matching, extra = graph_data
-            binary_polynomial = Matching(graph, graph_2)
-            problem_specific_attributes = MatchingAttributes(
-                matching=matching, extra=json.dumps(extra)
-            )
-        elif self.problem == OptimizationProblemType.MAX_FLOW:
-            graph, source, sink, max_flow, flow_dict, cut_value, cut_edges = graph_data
-            binary_polynomial = MaxFlow(graph, source, sink, max_flow, flow_dict)
-            problem_specific_attributes = MaxFlowAttributes(source=source, sink=sink)
-        elif self.problem == OptimizationProblemType.MIN_CUT:
-            graph, source, sink, max_flow, flow_dict, cut_value, cut_edges = graph_data
-            binary_polynomial = MinCut(graph, source, sink, cut_value, cut_edges)
-            problem_specific_attributes = MinCutAttributes(source=source, sink=sink)
-        elif self.problem == OptimizationProblemType.STEINER_TREE:
-            graph, terminals, steiner_tree, optimal_weight = graph_data
-            binary_polynomial = SteinerTree(
-                graph, terminals, steiner_tree, optimal_weight
-            )
-            problem_specific_attributes = SteinerTreeAttributes(
-                terminal_nodes=terminals
-            )
-        elif self.problem == OptimizationProblemType.EDGE_COVER:
-            graph, edge_cover, cover_size = graph_data
-            binary_polynomial = EdgeCover(graph, edge_cover)
-        elif self.problem == OptimizationProblemType.VERTEX_COVER:
-            graph, vertex_cover, cover_size = graph_data
-            binary_polynomial = VertexCover(graph, vertex_cover)
-        else:
-            raise ValueError("Invalid optimization problem.")
+        graph, binary_polynomial, problem_specific_attributes = build_problem(
+            self.problem, graph_data
+        )
 
         if graph is None:
             raise ValueError("Make sure graph is defined.")
 
+        # In warm start mode QAOA and VQE are solved for 1..layers layers in
+        # sequence, each one starting from the parameters of the previous one
+        if self.warm_start and optimization_type != OptimizationType.ADAPTIVE_VQE:
+            layers = list(range(1, self.layers + 1))
+        else:
+            layers = [self.layers]
+
+        # The reduced formulation only adds qubits, so a problem that is
+        # skipped natively is not reduced first
+        polynomial = binary_polynomial.get_binary_polynomial()
+        n_qubits = len(polynomial.variables)
+        if n_qubits > self.qubit_limit:
+            print(
+                f"Skipping problem with {n_qubits} qubits, the limit is {self.qubit_limit}"
+            )
+            return []
+
+        formulation = select_formulation(
+            polynomial, self.formulation, qubit_limit=self.qubit_limit
+        )
         problem = BinaryOptimizationProblem(
-            binary_polynomial=binary_polynomial.get_binary_polynomial(),
+            binary_polynomial=formulation,
             description=self.problem,
-            p=self.layers,
+            p=layers[0],
             device_type=self.device_type,
+            n_starts=self.n_starts,
         )
 
         # --------- Solve the problem using the specified optimization type ---------
         n_qubits = problem.get_number_of_qubits()
-        if n_qubits > QUBIT_LIMIT:
-            return []
+        ancilla_qubits = sorted(
+            problem.variables_to_qubits[v] for v in ancilla_variables(problem.variables)
+        )
 
         (
             smallest_eigenvalues,
             smallest_bitstrings,
             first_excited_energy,
             smallest_eigenvectors,
-        ) = problem.solve_exactly()
+        ) = problem.solve_exactly(method=self.exact_solver, cache=self.exact_cache)
 
         print(
             f"Processing {iteration_info[0] + 1}/{iteration_info[1]} for {n_qubits} qubits using {optimization_type}"
         )
 
-        solution = {}
-        start_time = time.time()
-        if optimization_type == OptimizationType.VQE:
-            solution = problem.solve_with_vqe(ansatz_template)
-        elif optimization_type == OptimizationType.QAOA:
-            solution = problem.solve_with_qaoa()
-        elif optimization_type == OptimizationType.ADAPTIVE_VQE:
-            solution = problem.solve_with_adaptive_vqe()
-        else:
-            raise ValueError("Invalid optimization type.")
-        optimization_time = time.time() - start_time
+        problems_data = []
+        init_params = None
+        for layer in layers:
+            if layer != problem.get_number_of_layers():
+                problem.set_layers(layer)
+
+            solution = {}
+            start_time = time.time()
+            if optimization_type == OptimizationType.VQE:
+                solution = problem.solve_with_vqe(ansatz_template, init_params)
+            elif optimization_type == OptimizationType.QAOA:
+                solution = problem.solve_with_qaoa(init_params)
+            elif optimization_type == OptimizationType.ADAPTIVE_VQE:
+                solution = problem.solve_with_adaptive_vqe()
+            else:
+                raise ValueError("Invalid optimization type.")
+            optimization_time = time.time() - start_time
+
+            if layer < layers[-1]:
+                init_params = self._next_layer_params(
+                    solution, optimization_type, ansatz_template, n_qubits, layer
+                )
 
-        # Check if a solution was found.
-        if not solution.get("success"):
-            print("No solution found for problem.")
-            return []
+            # Check if a solution was found.
+            if not solution.get("success"):
+                print(f"No solution found for problem with {layer} layers.")
+                continue
+            if "start" in solution:
+                print(
+                    f"Start {solution['start']} converged after {solution.get('total_steps')} steps"
+                )
 
-        bitstrings = [
-            int_to_bitstring(state, n_qubits)
-            for state in solution.get("two_most_probable_states", [])
-        ]
-        params = solution.get("params", None)
-
-        circuit = None
-        if optimization_type == OptimizationType.VQE:
-            circuit = problem.vqe_circuit
-        elif optimization_type == OptimizationType.ADAPTIVE_VQE:
-            circuit = problem.adaptive_vqe_circuit
-        elif optimization_type == OptimizationType.QAOA:
-            circuit = problem.qaoa_circuit
-
-        q_solution = QuantumSolution(
-            states=solution.get("two_most_probable_states"),
-            expectation_value=solution.get("expectation_value"),
-            params=params,
-            bitstrings=bitstrings,
-            total_optimization_steps=solution.get("total_steps"),
-            probabilities=solution.get("states_probs"),
-            optimization_time=optimization_time,
-        )
+            bitstrings = [
+                int_to_bitstring(state, n_qubits)
+                for state in solution.get("two_most_probable_states", [])
+            ]
+            params = solution.get("params", None)
+
+            q_solution = QuantumSolution(
+                states=solution.get("two_most_probable_states"),
+                expectation_value=solution.get("expectation_value"),
+                params=params,
+                bitstrings=bitstrings,
+                total_optimization_steps=solution.get("total_steps"),
+                probabilities=solution.get("states_probs"),
+                optimization_time=optimization_time,
+            )
 
-        circuit_with_params, circuit_with_symbols = get_qasm_circuits(
-            problem, optimization_type, params
-        )
+            circuit_with_params, circuit_with_symbols = get_qasm_circuits(
+                problem, optimization_type, params
+            )
 
-        problem_data = OptimizationProblem(
-            problem_type=self.problem,
-            optimization_type=optimization_type,
-            signature=weisfeiler_lehman_graph_hash(graph)
-            if self.problem != OptimizationProblemType.HYPERMAXCUT
-            else hash(graph),
-            graph=json_graph.node_link_data(graph, edges="edges")
-            if self.problem != OptimizationProblemType.HYPERMAXCUT
-            else graph.__dict__(),
-            cost_hamiltonian=str(problem.get_cost_hamiltonian()),
-            number_of_qubits=n_qubits,
-            number_of_layers=self.layers,
-            ansatz_id=ansatz_template,
-            exact_solution=ExactSolution(
-                smallest_eigenvalues=smallest_eigenvalues,
-                number_of_smallest_eigenvalues=len(smallest_bitstrings),
-                first_excited_energy=first_excited_energy,
-                smallest_bitstrings=smallest_bitstrings,
-            ),
-            solution=q_solution,
-            adaptive_process=AdaptiveProcess(
-                circuits=problem.adaptive_circuits, gradients=problem.adaptive_gradients
-            ),
-            circuit_with_params=circuit_with_params,
-            circuit_with_symbols=circuit_with_symbols,
-            problem_specific_attributes=problem_specific_attributes,
-        )
+            problem_data = OptimizationProblem(
+                problem_type=self.problem,
+                optimization_type=optimization_type,
+                signature=weisfeiler_lehman_graph_hash(graph)
+                if self.problem != OptimizationProblemType.HYPERMAXCUT
+                else hash(graph),
+                graph=json_graph.node_link_data(graph, edges="edges")
+                if self.problem != OptimizationProblemType.HYPERMAXCUT
+                else graph.__dict__(),
+                cost_hamiltonian=problem.get_cost_hamiltonian_string(),
+                cost_hamiltonian_terms=problem.get_ising_hamiltonian().to_dict(),
+                number_of_qubits=n_qubits,
+                number_of_layers=layer,
+                ansatz_id=ansatz_template,
+                exact_solution=ExactSolution(
+                    smallest_eigenvalues=smallest_eigenvalues,
+                    number_of_smallest_eigenvalues=len(smallest_bitstrings),
+                    first_excited_energy=first_excited_energy,
+                    smallest_bitstrings=smallest_bitstrings,
+                ),
+                solution=q_solution,
+                adaptive_process=AdaptiveProcess(
+                    circuits=problem.get_adaptive_circuits(),
+                    gradients=problem.adaptive_gradients,
+                ),
+                circuit_with_params=circuit_with_params,
+                circuit_with_symbols=circuit_with_symbols,
+                problem_specific_attributes=problem_specific_attributes,
+                formulation="native" if formulation is polynomial else "reduced",
+                ancilla_qubits=ancilla_qubits,
+            )
+            problems_data.append(problem_data)
 
-        return problem_data
+        return problems_data
+
+    def _next_layer_params(
+        self, solution, optimization_type, ansatz_template, n_qubits, layer
+    ):
+        """Initial parameters for layer + 1 layers from the solution with layer layers."""
+        if optimization_type == OptimizationType.QAOA:
+            return extend_qaoa_params(solution["params"], self.warm_start_schedule)
+        return extend_vqe_params(
+            solution["single_qubit_params"],
+            solution["two_qubit_params"],
+            ansatz_template,
+            n_qubits,
+            layer,
+        )
 
     def _solution_exists(
         self, signature: str, optimization_type: OptimizationType, n_qubits: int
@@ -390,6 +547,8 @@ class DataGenerator:
             _worker_init()
             for task in tasks:
                 _process_task((self, task))
+            _report_circuit_cache()
+            self._report_exact_cache()
             return
 
         # ---------- CPU execution: process tasks in parallel ----------
@@ -418,8 +577,18 @@ class DataGenerator:
                 _worker_init()
                 for task in tasks_other:
                     _process_task((self, task))
+                _report_circuit_cache()
         else:
             raise ValueError("No tasks to process...")
+        self._report_exact_cache()
+
+    def _report_exact_cache(self):
+        """
+        Print the hit/miss metrics of the exact solution cache.
+        Totals include worker processes and other runs sharing the cache file.
+        """
+        if self.exact_cache is not None:
+            print(f"Exact solution cache: {self.exact_cache.stats()}")
 
     def _save_solution(self, solution: OptimizationProblem):
         """
@@ -430,7 +599,7 @@ class DataGenerator:
 
         filename = (
             f"{self.problem}_{solution.optimization_type}_"
-            f"{solution.number_of_qubits}_{self.layers}_{solution.signature}.json"
+            f"{solution.number_of_qubits}_{solution.number_of_layers}_{solution.signature}.json"
         )
         print(f"Saving solution to {filename}")
         unique_path = os.path.join(self.output_path, filename)
@@ -0,0 +1,211 @@
+"""
+Energy vectors of diagonal (PauliZ only) cost Hamiltonians.
+
+All cost Hamiltonians built by BinaryOptimizationProblem are sums of PauliZ
+products, so the Hamiltonian is diagonal in the computational basis and its
+spectrum is just the energy of every basis state. Basis index i follows the
+PennyLane convention: wire 0 is the most significant bit.
+"""
+
+import numpy as np
+
+from src.parallel import pool_map
+
+
+def walsh_hadamard_transform(vector):
+    """
+    Unnormalized fast Walsh-Hadamard transform of a vector of length 2^n.
+    Entry i of the result is sum_m vector[m] * (-1)^popcount(i & m).
+    """
+    result = np.array(vector, dtype=np.float64, copy=True)
+    size = result.size
+    h = 1
+    while h < size:
+        blocks = result.reshape(-1, 2, h)
+        upper = blocks[:, 0, :].copy()
+        blocks[:, 0, :] += blocks[:, 1, :]
+        blocks[:, 1, :] = upper - blocks[:, 1, :]
+        h *= 2
+    return result
+
+
+def terms_to_masks(terms, n_qubits):
+    """
+    Convert PauliZ product terms, given as tuples of wires, to bitmasks over
+    the basis index.
+    """
+    masks = np.zeros(len(terms), dtype=np.int64)
+    for i, wires in enumerate(terms):
+        mask = 0
+        for wire in wires:
+            mask ^= 1 << (n_qubits - 1 - wire)
+        masks[i] = mask
+    return masks
+
+
+def diagonal_energies(coeffs, terms, n_qubits):
+    """
+    Return the energy of every computational basis state of sum_t c_t prod Z.
+
+    The coefficients are scattered to the positions given by their bitmasks,
+    after which a single Walsh-Hadamard transform gives all 2^n energies in
+    O(n * 2^n) time and O(2^n) memory.
+    """
+    return diagonal_energies_from_masks(coeffs, terms_to_masks(terms, n_qubits), n_qubits)
+
+
+def diagonal_energies_from_masks(coeffs, masks, n_qubits):
+    """diagonal_energies for terms already given as bitmasks over the basis index."""
+    spectrum = np.zeros(2**n_qubits, dtype=np.float64)
+    np.add.at(spectrum, masks, np.asarray(coeffs, dtype=np.float64))
+    return walsh_hadamard_transform(spectrum)
+
+
+def basis_vector(index, n_qubits):
+    vector = np.zeros(2**n_qubits)
+    vector[index] = 1.0
+    return vector
+
+
+def smallest_diagonal_eigenpairs(energies, atol=1e-8):
+    """
+    Return the smallest eigenvalues and eigenvectors of a diagonal Hamiltonian
+    in the same format as utils.smallest_eigenpairs.
+    Every degenerate ground state is returned, and energies within atol of
+    the minimum are treated as degenerate.
+    """
+    n_qubits = int(np.log2(len(energies)))
+    smallest_eigenvalue = np.min(energies)
+    is_ground = np.isclose(energies, smallest_eigenvalue, rtol=0, atol=atol)
+    ground_indices = np.flatnonzero(is_ground)
+
+    smallest_eigenvalues = [energies[i] for i in ground_indices]
+    smallest_eigenvectors = [basis_vector(i, n_qubits) for i in ground_indices]
+
+    first_excited_energy = None
+    first_excited_state = None
+    if len(ground_indices) < len(energies):
+        first_excited_index = np.argmin(np.where(is_ground, np.inf, energies))
+        first_excited_energy = energies[first_excited_index]
+        first_excited_state = basis_vector(first_excited_index, n_qubits)
+
+    return (
+        smallest_eigenvalues,
+        smallest_eigenvectors,
+        first_excited_energy,
+        first_excited_state,
+    )
+
+
+def chunk_energies(coeffs, masks, n_qubits, chunk_bits, chunk_index):
+    """
+    Energies of the basis states chunk_index * 2^chunk_bits, ..., (chunk_index + 1) * 2^chunk_bits - 1.
+
+    Inside an aligned chunk only the low chunk_bits bits of the index change,
+    so every term splits into a sign fixed by the high bits and a PauliZ
+    product on the low bits. The chunk is then one Walsh-Hadamard transform
+    of size 2^chunk_bits, independent of the other chunks.
+    """
+    chunk_bits = min(chunk_bits, n_qubits)
+    low = (1 << chunk_bits) - 1
+    high_bits = masks & (chunk_index << chunk_bits)
+
+    # Parity of the high bits decides the sign of every term in this chunk
+    parity = np.zeros(len(masks), dtype=np.int64)
+    for shift in range(chunk_bits, n_qubits):
+        parity ^= (high_bits >> shift) & 1
+    signs = 1 - 2 * parity
+
+    spectrum = np.zeros(1 << chunk_bits, dtype=np.float64)
+    np.add.at(spectrum, masks & low, coeffs * signs)
+    return walsh_hadamard_transform(spectrum)
+
+
+def lowest_energies(energies, offset=0, atol=1e-8):
+    """
+    Return (ground energy, ground state indices, first excited energy) of an
+    energy vector whose first entry is the basis state with index offset.
+    """
+    smallest_energy = np.min(energies)
+    is_ground = np.isclose(energies, smallest_energy, rtol=0, atol=atol)
+    ground_indices = np.flatnonzero(is_ground) + offset
+
+    first_excited_energy = None
+    if len(ground_indices) < len(energies):
+        first_excited_energy = np.min(energies[~is_ground])
+
+    return smallest_energy, ground_indices, first_excited_energy
+
+
+def _enumerate_chunk(args):
+    coeffs, masks, n_qubits, chunk_bits, chunk_index, energy_file, atol = args
+    energies = chunk_energies(coeffs, masks, n_qubits, chunk_bits, chunk_index)
+    offset = chunk_index << chunk_bits
+
+    if energy_file is not None:
+        energy_map = np.memmap(energy_file, dtype=np.float64, mode="r+")
+        energy_map[offset : offset + len(energies)] = energies
+        energy_map.flush()
+        del energy_map
+
+    return lowest_energies(energies, offset=offset, atol=atol)
+
+
+def merge_lowest_energies(chunk_results, atol=1e-8):
+    """
+    Merge per-chunk (ground energy, ground indices, first excited energy)
+    results into the same triple for the whole state space.
+    """
+    smallest_energy = min(result[0] for result in chunk_results)
+
+    ground_indices = []
+    excited_candidates = []
+    for chunk_smallest, chunk_ground_indices, chunk_excited in chunk_results:
+        if np.isclose(chunk_smallest, smallest_energy, rtol=0, atol=atol):
+            ground_indices.append(chunk_ground_indices)
+        else:
+            excited_candidates.append(chunk_smallest)
+        if chunk_excited is not None:
+            excited_candidates.append(chunk_excited)
+
+    first_excited_energy = min(excited_candidates) if excited_candidates else None
+    return smallest_energy, np.concatenate(ground_indices), first_excited_energy
+
+
+def enumerate_ground_states(
+    coeffs,
+    terms,
+    n_qubits,
+    chunk_bits=20,
+    n_workers=None,
+    energy_file=None,
+    atol=1e-8,
+):
+    """
+    Exhaustively enumerate all 2^n basis states of a diagonal Hamiltonian in
+    chunks of 2^chunk_bits states and return
+    (ground energy, all ground state indices, first excited energy).
+
+    Chunks are evaluated with pool_map in n_workers processes. Memory per
+    worker is bounded by the chunk size. If energy_file is given, the full
+    energy vector is also written to that file as a float64 memory map, which
+    can be opened later with np.memmap(energy_file, dtype=np.float64).
+    """
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+    masks = terms_to_masks(terms, n_qubits)
+    chunk_bits = min(chunk_bits, n_qubits)
+    n_chunks = 1 << (n_qubits - chunk_bits)
+
+    if energy_file is not None:
+        energy_map = np.memmap(
+            energy_file, dtype=np.float64, mode="w+", shape=(1 << n_qubits,)
+        )
+        del energy_map
+
+    args = [
+        (coeffs, masks, n_qubits, chunk_bits, chunk_index, energy_file, atol)
+        for chunk_index in range(n_chunks)
+    ]
+
+    chunk_results = pool_map(_enumerate_chunk, args, n_workers)
+    return merge_lowest_energies(chunk_results, atol=atol)
@@ -0,0 +1,175 @@
+"""
+Persistent cache of exact solutions shared between data generation processes.
+
+The same problem instance is solved exactly once for every optimization type,
+ansatz and layer count, often in different SLURM array tasks. The cache stores
+the ground energy, all ground bitstrings and the first excited energy in a
+SQLite file, keyed by a fingerprint of the spin-form cost Hamiltonian.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections import Counter
+
+
+def ising_fingerprint(coeffs, terms, n_qubits, decimals=10):
+    """
+    Canonical hash of the Hamiltonian sum_t c_t prod_{w in t} Z_w.
+
+    Terms are given as tuples of wires, i.e. after the variables have been
+    ordered. Wires inside a term are sorted, duplicate terms are merged,
+    coefficients are rounded and zero terms dropped before hashing, so the
+    fingerprint does not depend on the order in which the terms were built.
+    """
+    canonical = {}
+    for coeff, wires in zip(coeffs, terms):
+        key = tuple(sorted(int(w) for w in wires))
+        canonical[key] = canonical.get(key, 0.0) + float(coeff)
+
+    canonical_terms = sorted(
+        (list(key), round(coeff, decimals) + 0.0)
+        for key, coeff in canonical.items()
+        if round(coeff, decimals) != 0
+    )
+    payload = json.dumps([n_qubits, canonical_terms], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ExactSolutionCache:
+    """
+    SQLite backed cache, safe to share between concurrent processes, also on
+    different nodes of a shared file system. It uses the default rollback
+    journal, WAL needs shared memory on one host, and waits up to timeout
+    seconds for a lock held by another process.
+    The connection is opened lazily so the cache can be pickled to worker processes.
+    Hits and misses are counted in memory and only added to the metrics table
+    by close or stats, so that lookups never write.
+
+    Attributes:
+        path (str): Path of the SQLite file.
+        hits (int): Cache hits in this process.
+        misses (int): Cache misses in this process.
+    """
+
+    def __init__(self, path: str, timeout: float = 60.0):
+        self.path = path
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = Counter()
+        self._connection = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        # The counts of this process are saved by its own close
+        state["_unsaved"] = Counter()
+        return state
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout)
+            with self._connection:
+                self._connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS exact_solutions (
+                        fingerprint TEXT PRIMARY KEY,
+                        n_qubits INTEGER,
+                        smallest_eigenvalue REAL,
+                        smallest_bitstrings TEXT,
+                        first_excited_energy REAL
+                    )
+                    """
+                )
+                self._connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS metrics (
+                        name TEXT PRIMARY KEY,
+                        value INTEGER
+                    )
+                    """
+                )
+        return self._connection
+
+    def get(self, fingerprint):
+        """
+        Return (smallest_eigenvalue, smallest_bitstrings, first_excited_energy)
+        or None if the fingerprint is not cached.
+        """
+        row = (
+            self._connect()
+            .execute(
+                "SELECT smallest_eigenvalue, smallest_bitstrings, first_excited_energy "
+                "FROM exact_solutions WHERE fingerprint = ?",
+                (fingerprint,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            self.misses += 1
+            self._unsaved["misses"] += 1
+            return None
+
+        self.hits += 1
+        self._unsaved["hits"] += 1
+        smallest_eigenvalue, smallest_bitstrings, first_excited_energy = row
+        return smallest_eigenvalue, json.loads(smallest_bitstrings), first_excited_energy
+
+    def put(
+        self,
+        fingerprint,
+        n_qubits,
+        smallest_eigenvalue,
+        smallest_bitstrings,
+        first_excited_energy,
+    ):
+        first_excited_energy = (
+            None if first_excited_energy is None else float(first_excited_energy)
+        )
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO exact_solutions VALUES (?, ?, ?, ?, ?)",
+                (
+                    fingerprint,
+                    n_qubits,
+                    float(smallest_eigenvalue),
+                    json.dumps(list(smallest_bitstrings)),
+                    first_excited_energy,
+                ),
+            )
+
+    def close(self):
+        """Add the hits and misses since the last close to the metrics table and close the connection."""
+        if self._unsaved:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT INTO metrics (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    self._unsaved.items(),
+                )
+            self._unsaved.clear()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def stats(self):
+        """
+        Hits and misses of this process and of all processes sharing the file.
+        The counts of this process are added to the metrics table first, and
+        the connection is closed again afterwards, like by close.
+        """
+        self.close()
+        try:
+            connection = self._connect()
+            totals = dict(connection.execute("SELECT name, value FROM metrics").fetchall())
+            entries = connection.execute("SELECT COUNT(*) FROM exact_solutions").fetchone()[0]
+        finally:
+            self.close()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+            "entries": entries,
+        }
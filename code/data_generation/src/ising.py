@@ -0,0 +1,126 @@
+"""
+Compact array representation of Ising cost Hamiltonians sum_t c_t prod_{w in t} Z_w.
+
+Every term is a bitmask over the wires, stored as int64 words (bit w % 64 of
+word w // 64 is set if Z acts on wire w, so instances with more than 64
+qubits need more than one word), next to a float64 coefficient array. The
+arrays are encoded losslessly as base64 in a JSON-serializable dict, stored
+with every generated sample next to the human-readable str(cost_hamiltonian),
+so consumers rebuild the operator without parsing the string.
+
+The converters build a PennyLane LinearCombination, a Qiskit SparsePauliOp
+or the dense diagonal (the energy of every basis state). Wires follow the
+PennyLane convention, wire 0 is the most significant bit of the basis
+index. In the SparsePauliOp wire w is the w-th character of the Pauli label
+from the left, i.e. Qiskit qubit n_qubits - 1 - w, as in the string parser
+construct_qiskit_hamiltonian of the evaluation.
+"""
+
+import base64
+
+import numpy as np
+import pennylane as qml
+from qiskit.quantum_info import PauliList, SparsePauliOp
+
+from src.energy import diagonal_energies_from_masks
+
+WORD_BITS = 64
+
+
+def _encode(array, dtype):
+    return base64.b64encode(np.ascontiguousarray(array, dtype=dtype).tobytes()).decode()
+
+
+def _decode(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype)
+
+
+class IsingHamiltonian:
+    """
+    Attributes:
+        coeffs: float64 coefficient of every term.
+        masks: int64 array of shape (n_terms, n_words), the wires of every term.
+        n_qubits (int): Number of qubits.
+    """
+
+    def __init__(self, coeffs, masks, n_qubits):
+        self.coeffs = np.asarray(coeffs, dtype=np.float64)
+        self.masks = np.asarray(masks, dtype=np.int64).reshape(
+            len(self.coeffs), self.n_words(n_qubits)
+        )
+        self.n_qubits = n_qubits
+
+    @staticmethod
+    def n_words(n_qubits):
+        return max(1, -(-n_qubits // WORD_BITS))
+
+    @classmethod
+    def from_index_arrays(cls, coeffs, term_indices, wires, n_qubits):
+        """
+        From coefficients and the (term, wire) pairs of all terms as two
+        integer arrays, e.g. the quadratic and linear indices of a BQM.
+        """
+        term_indices = np.asarray(term_indices, dtype=np.int64)
+        wires = np.asarray(wires, dtype=np.int64)
+        masks = np.zeros((len(coeffs), cls.n_words(n_qubits)), dtype=np.uint64)
+        np.bitwise_xor.at(
+            masks,
+            (term_indices, wires // WORD_BITS),
+            np.left_shift(np.uint64(1), (wires % WORD_BITS).astype(np.uint64)),
+        )
+        return cls(coeffs, masks.view(np.int64), n_qubits)
+
+    @classmethod
+    def from_terms(cls, coeffs, terms, n_qubits):
+        """From coefficients and terms given as tuples of wires."""
+        masks = np.zeros((len(terms), cls.n_words(n_qubits)), dtype=np.uint64)
+        for i, wires in enumerate(terms):
+            for wire in wires:
+                masks[i, wire // WORD_BITS] ^= np.uint64(1) << np.uint64(wire % WORD_BITS)
+        return cls(coeffs, masks.view(np.int64), n_qubits)
+
+    def wire_matrix(self):
+        """Boolean (n_terms, n_qubits) matrix, True where Z acts on a wire."""
+        words = self.masks.view(np.uint64)
+        bits = (words[:, :, None] >> np.arange(WORD_BITS, dtype=np.uint64)) & np.uint64(1)
+        bits = bits.reshape(len(self.coeffs), self.masks.shape[1] * WORD_BITS)
+        return bits[:, : self.n_qubits].astype(bool)
+
+    def terms(self):
+        """Wires of every term as sorted tuples."""
+        return [tuple(np.flatnonzero(row).tolist()) for row in self.wire_matrix()]
+
+    def to_dict(self):
+        """Lossless JSON-serializable encoding."""
+        return {
+            "n_qubits": self.n_qubits,
+            "coeffs": _encode(self.coeffs, "<f8"),
+            "masks": _encode(self.masks, "<i8"),
+        }
+
+    @classmethod
+    def from_dict(cls, encoding):
+        return cls(
+            _decode(encoding["coeffs"], "<f8"),
+            _decode(encoding["masks"], "<i8"),
+            encoding["n_qubits"],
+        )
+
+    def to_pennylane(self):
+        observables = [qml.prod(*[qml.PauliZ(w) for w in wires]) for wires in self.terms()]
+        return qml.ops.op_math.LinearCombination(self.coeffs.tolist(), observables)
+
+    def to_sparse_pauli_op(self):
+        # Qiskit orders the symplectic columns by qubit, i.e. by reversed wire
+        z = self.wire_matrix()[:, ::-1]
+        paulis = PauliList.from_symplectic(z, np.zeros_like(z))
+        return SparsePauliOp(paulis, self.coeffs.astype(complex))
+
+    def basis_masks(self):
+        """Bitmask of every term over the basis index, in which wire 0 is the most significant bit."""
+        weights = np.left_shift(1, self.n_qubits - 1 - np.arange(self.n_qubits, dtype=np.int64))
+        return self.wire_matrix() @ weights
+
+    def diagonal(self):
+        """Energy of every computational basis state."""
+        return diagonal_energies_from_masks(self.coeffs, self.basis_masks(), self.n_qubits)
@@ -2,7 +2,7 @@ import argparse
 import warnings
 
 
-from src.data_generator import DataGenerator
+from src.data_generator import QUBIT_LIMIT, DataGenerator
 from src.data_classes import OptimizationProblemType
 
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -30,6 +30,66 @@ if __name__ == "__main__":
         help="Choose one of the available Ansatz templates for VQE",
     )
     parser.add_argument('--vqe', action=argparse.BooleanOptionalAction)
+    parser.add_argument(
+        "--qubit_limit",
+        type=int,
+        default=QUBIT_LIMIT,
+        help="Skip problems with more qubits than this",
+    )
+    parser.add_argument(
+        "--exact_solver",
+        type=str,
+        required=False,
+        choices=["auto", "diagonal", "chunked", "branch_and_bound", "eigensolver"],
+        help="Exact solver method, by default chosen per problem type",
+    )
+    parser.add_argument(
+        "--exact_cache",
+        type=str,
+        required=False,
+        help="SQLite file caching exact solutions between runs",
+    )
+    parser.add_argument(
+        "--graph_index",
+        type=str,
+        required=False,
+        help="GraphIndex file, graphs generated by earlier runs with it are not generated again",
+    )
+
+    parser.add_argument(
+        "--n_starts",
+        type=int,
+        default=1,
+        help="Initializations optimized at once by QAOA and VQE, 1 restarts sequentially",
+    )
+
+    parser.add_argument(
+        "--warm_start",
+        action=argparse.BooleanOptionalAction,
+        help="Solve QAOA and VQE for 1..layers layers, seeding each from the previous one",
+    )
+    parser.add_argument(
+        "--warm_start_schedule",
+        type=str,
+        default="interp",
+        choices=["interp", "extrapolate"],
+        help="QAOA parameter transfer between layers in warm start mode",
+    )
+
+    parser.add_argument(
+        "--sa_check_reads",
+        type=int,
+        default=0,
+        help="Steiner tree only, check every QUBO with this many simulated annealing reads",
+    )
+
+    parser.add_argument(
+        "--formulation",
+        type=str,
+        default="native",
+        choices=["auto", "native", "reduced"],
+        help="Higher order problems only, solve the polynomial as is, reduced to a QUBO, or choose per instance",
+    )
 
     args = parser.parse_args()
 
@@ -40,5 +100,14 @@ if __name__ == "__main__":
         ansatz_template=args.ansatz_template,
         layers=args.layers,
         vqe=args.vqe,
+        qubit_limit=args.qubit_limit,
+        exact_solver=args.exact_solver,
+        exact_cache=args.exact_cache,
+        graph_index=args.graph_index,
+        n_starts=args.n_starts,
+        warm_start=bool(args.warm_start),
+        warm_start_schedule=args.warm_start_schedule,
+        sa_check_reads=args.sa_check_reads,
+        formulation=args.formulation,
     )
     generator.generate_data()
@@ -0,0 +1,57 @@
+"""
+Process-wide cache of compiled variational circuits.
+
+Building the QNodes and jitting the optimization loop costs far more than
+optimizing a small instance. For diagonal cost Hamiltonians the circuits
+only depend on the optimization type, the ansatz, the qubit count and the
+layer count, with the energy vector passed at runtime, so the optimizer
+built for one instance is reused for every later instance of the same shape.
+"""
+
+
+class CircuitCache:
+    """
+    Attributes:
+        hits (int): Lookups that reused a cached optimizer.
+        misses (int): Lookups that built a new optimizer.
+        compilations (int): Executables compiled by cached optimizers.
+        compile_time (float): Seconds spent compiling them.
+    """
+
+    def __init__(self):
+        self._optimizers = {}
+        self.hits = 0
+        self.misses = 0
+        self.compilations = 0
+        self.compile_time = 0.0
+
+    def get(self, optimization_type, ansatz_id, n_qubits, p, build):
+        """
+        Return the optimizer cached for (optimization_type, ansatz_id, n_qubits, p),
+        calling build(cache) to create it on a miss.
+        """
+        key = (optimization_type, ansatz_id, n_qubits, p)
+        optimizer = self._optimizers.get(key)
+        if optimizer is None:
+            self.misses += 1
+            optimizer = build(self)
+            self._optimizers[key] = optimizer
+        else:
+            self.hits += 1
+        return optimizer
+
+    def record_compilation(self, seconds):
+        self.compilations += 1
+        self.compile_time += seconds
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._optimizers),
+            "compilations": self.compilations,
+            "compile_time": round(self.compile_time, 3),
+        }
+
+
+CIRCUIT_CACHE = CircuitCache()
@@ -0,0 +1,226 @@
+"""
+Optimization driver shared by the QAOA and VQE solvers.
+
+The parameters are optimized with AdamW in blocks of steps_per_check steps.
+After every block the most probable basis state is compared against the
+known ground states, and the optimization stops on success or once
+limit_steps steps have been taken. The blocks, the probability read-out and
+the success test all run inside one jitted lax.while_loop, so an attempt
+costs a single dispatch and no per-step Python work.
+
+In multi-start mode a batch of initial parameters is optimized at once with
+vmap, and the loop stops as soon as any member of the batch succeeds. This
+replaces sequential restarts by one wider vectorized run.
+
+The circuit functions take the Hamiltonian as a runtime argument, e.g. the
+energy vector of a diagonal cost Hamiltonian, so one optimizer and its
+compiled executables serve every problem instance of the same shape.
+"""
+
+import time
+
+import jax
+import jax.numpy as jnp
+import optax
+
+from src.utils import bitstring_to_basis_index
+
+
+def target_mask(bitstrings, n_qubits):
+    """Boolean vector over the basis states that is True at the given bitstrings."""
+    mask = jnp.zeros(2**n_qubits, dtype=bool)
+    indices = jnp.array([bitstring_to_basis_index(b) for b in bitstrings], dtype=int)
+    return mask.at[indices].set(True)
+
+
+def most_probable_state(probs):
+    """Index of the largest probability, the last one among ties like np.argsort."""
+    return probs.shape[0] - 1 - jnp.argmax(probs[::-1])
+
+
+class VariationalOptimizer:
+    """
+    Attributes:
+        expectation: Function of (params, hamiltonian) returning the cost expectation value.
+        probs: Function of (params, hamiltonian) returning the basis state probabilities.
+        learning_rate (float): AdamW learning rate.
+        steps_per_check (int): Optimization steps between two success checks.
+        limit_steps (int): Steps after which an attempt is given up.
+        cache: Optional CircuitCache recording the compilations of this optimizer.
+    """
+
+    def __init__(
+        self,
+        expectation,
+        probs,
+        learning_rate=0.01,
+        steps_per_check=10,
+        limit_steps=500,
+        cache=None,
+    ):
+        self.expectation = expectation
+        self.probs = probs
+        self.solver = optax.adamw(learning_rate=learning_rate)
+        self.steps_per_check = steps_per_check
+        self.limit_steps = limit_steps
+        self.cache = cache
+        self._functions = {
+            "run": jax.jit(self._run),
+            "run_batch": jax.jit(self._run_batch),
+            "expectation": jax.jit(expectation),
+            "probs": jax.jit(probs),
+        }
+        self._executables = {}
+
+    def _call(self, name, *args):
+        """
+        Call a jitted function through its executable for the shapes of args,
+        compiling it ahead of time on first use.
+        """
+        signature = (name,) + tuple(
+            (leaf.shape, leaf.dtype) for leaf in jax.tree_util.tree_leaves(args)
+        )
+        executable = self._executables.get(signature)
+        if executable is None:
+            start_time = time.perf_counter()
+            executable = self._functions[name].lower(*args).compile()
+            if self.cache is not None:
+                self.cache.record_compilation(time.perf_counter() - start_time)
+            self._executables[signature] = executable
+        return executable(*args)
+
+    def expectation_value(self, params, hamiltonian=None):
+        return self._call("expectation", params, hamiltonian)
+
+    def _optimize_block(self, params, hamiltonian):
+        # The optimizer state is reset at the start of every block
+        def step(carry, _):
+            params, opt_state = carry
+            grad = jax.grad(self.expectation)(params, hamiltonian)
+            updates, opt_state = self.solver.update(grad, opt_state, params)
+            return (optax.apply_updates(params, updates), opt_state), None
+
+        (params, _), _ = jax.lax.scan(
+            step, (params, self.solver.init(params)), None, length=self.steps_per_check
+        )
+        return params
+
+    def _run(self, params, is_target, hamiltonian):
+        """
+        Optimize from params until the most probable state is a target state
+        or limit_steps is exceeded. Returns (params, total_steps, success, probs).
+        """
+
+        def not_done(carry):
+            _, total_steps, success, _ = carry
+            return ~success & (total_steps <= self.limit_steps)
+
+        def block(carry):
+            params, total_steps, _, _ = carry
+            params = self._optimize_block(params, hamiltonian)
+            probs = self.probs(params, hamiltonian)
+            success = is_target[most_probable_state(probs)]
+            return params, total_steps + self.steps_per_check, success, probs
+
+        probs = self.probs(params, hamiltonian)
+        return jax.lax.while_loop(
+            not_done, block, (params, 0, jnp.array(False), probs)
+        )
+
+    def _run_batch(self, params_batch, is_target, hamiltonian):
+        """
+        Optimize every member of params_batch in lockstep until any member's
+        most probable state is a target state or limit_steps is exceeded.
+        Returns (params_batch, total_steps, success per member, probs_batch).
+        """
+        optimize_block = jax.vmap(self._optimize_block, in_axes=(0, None))
+        batch_probs = jax.vmap(self.probs, in_axes=(0, None))
+
+        def not_done(carry):
+            _, total_steps, success, _ = carry
+            return ~jnp.any(success) & (total_steps <= self.limit_steps)
+
+        def block(carry):
+            params_batch, total_steps, _, _ = carry
+            params_batch = optimize_block(params_batch, hamiltonian)
+            probs_batch = batch_probs(params_batch, hamiltonian)
+            success = is_target[jax.vmap(most_probable_state)(probs_batch)]
+            return params_batch, total_steps + self.steps_per_check, success, probs_batch
+
+        probs_batch = batch_probs(params_batch, hamiltonian)
+        success = jnp.zeros(params_batch.shape[0], dtype=bool)
+        return jax.lax.while_loop(
+            not_done, block, (params_batch, 0, success, probs_batch)
+        )
+
+    def optimize_multistart(
+        self, params_batch, smallest_bitstrings, n_qubits, hamiltonian=None
+    ):
+        """
+        Optimize all starts of params_batch at once. The first successful start
+        is returned, or the one with the lowest expectation value if none succeeds.
+
+        Returns (params, total_steps, success, probs, start).
+        """
+        is_target = target_mask(smallest_bitstrings, n_qubits)
+        params_batch, total_steps, success, probs_batch = self._call(
+            "run_batch", params_batch, is_target, hamiltonian
+        )
+        if jnp.any(success):
+            start = int(jnp.argmax(success))
+        else:
+            print(
+                "Optimization did not converge to the known optimal solution from any of ",
+                params_batch.shape[0],
+                " starts.",
+            )
+            expectation_values = [
+                self.expectation_value(params, hamiltonian) for params in params_batch
+            ]
+            start = int(jnp.argmin(jnp.array(expectation_values)))
+        return (
+            params_batch[start],
+            int(total_steps),
+            bool(success[start]),
+            probs_batch[start],
+            start,
+        )
+
+    def optimize(
+        self,
+        params,
+        smallest_bitstrings,
+        n_qubits,
+        new_params,
+        max_attempts,
+        hamiltonian=None,
+    ):
+        """
+        Run attempts from params and then from new_params() until one succeeds
+        or max_attempts restarts have failed. If no attempt succeeds, the
+        parameters drawn after the last one are returned with total_steps 0.
+
+        Returns (params, total_steps, success, probs, start), where start
+        is the number of the successful attempt.
+        """
+        is_target = target_mask(smallest_bitstrings, n_qubits)
+        attempts = 0
+        while True:
+            params, total_steps, success, probs = self._call(
+                "run", params, is_target, hamiltonian
+            )
+            if success:
+                return params, int(total_steps), True, probs, attempts
+
+            print("Optimization did not converge")
+            print("Trying with a new initialization")
+            params = new_params()
+            attempts += 1
+            if attempts > max_attempts:
+                print(
+                    "Optimization did not converge to the known optimal solution after ",
+                    attempts,
+                    " attempts.",
+                )
+                probs = self._call("probs", params, hamiltonian)
+                return params, 0, False, probs, attempts
@@ -0,0 +1,74 @@
+"""
+Parameter transfer from a circuit with p layers to one with p + 1 layers.
+
+Optimized QAOA angles change smoothly with the layer index, so the angles
+for p + 1 layers are interpolated from the optimized p layer angles (the
+INTERP heuristic of Zhou et al., PRX 10, 021067) or extrapolated by one
+layer. The Sim ansatzes get the optimized layers followed by a new layer
+with all angles zero.
+"""
+
+import jax.numpy as jnp
+import numpy as np
+
+from src.optimization.ansatz import Ansatz
+
+
+def interpolate_qaoa_params(params):
+    """
+    Angles for p + 1 layers from the (2, p) optimized angles,
+    x_{p+1}[i] = (i / p) x_p[i - 1] + ((p - i) / p) x_p[i] for i = 0..p,
+    with x_p[-1] = x_p[p] = 0.
+    """
+    params = np.asarray(params)
+    p = params.shape[1]
+    padded = np.pad(params, ((0, 0), (1, 1)))
+    i = np.arange(p + 1)
+    return (i / p) * padded[:, i] + ((p - i) / p) * padded[:, i + 1]
+
+
+def extrapolate_qaoa_params(params):
+    """Angles for p + 1 layers, continuing the last step of the (2, p) angles."""
+    params = np.asarray(params)
+    if params.shape[1] == 1:
+        return np.concatenate([params, params], axis=1)
+    last_layer = 2 * params[:, -1:] - params[:, -2:-1]
+    return np.concatenate([params, last_layer], axis=1)
+
+
+QAOA_SCHEDULES = {
+    "interp": interpolate_qaoa_params,
+    "extrapolate": extrapolate_qaoa_params,
+}
+
+
+def extend_qaoa_params(params, schedule="interp"):
+    return jnp.array(QAOA_SCHEDULES[schedule](params))
+
+
+def _pad_layers(params, shape):
+    """Zero pad params along the layer axis to shape."""
+    padded = np.zeros(shape)
+    padded[: params.shape[0]] = params
+    return padded
+
+
+def extend_vqe_params(single_qubit_params, two_qubit_params, ansatz_id, n_qubits, p):
+    """
+    Flat parameter vector of the ansatz with p + 1 layers, as used by
+    solve_with_vqe, from the parameters optimized with p layers. The new
+    layer has all angles zero. This is the identity for ansatzes made of
+    parametrized rotations only; fixed gates such as CNOT or Hadamard in
+    the new layer make it a nearby, not identical, circuit.
+    """
+    single_qubit_shape, two_qubit_shape = Ansatz(
+        ansatz_id, n_qubits, p + 1
+    ).get_parameter_shapes()
+    single_qubit_params = _pad_layers(np.asarray(single_qubit_params), single_qubit_shape)
+    if two_qubit_shape is None:
+        return jnp.array(single_qubit_params)
+
+    two_qubit_params = _pad_layers(np.asarray(two_qubit_params), two_qubit_shape)
+    return jnp.concatenate(
+        [jnp.array(single_qubit_params).flatten(), jnp.array(two_qubit_params).flatten()]
+    )
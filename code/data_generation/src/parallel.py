@@ -0,0 +1,48 @@
+"""
+Process pool and file helpers shared by the data set generators, the exact
+solvers and the validation of the data sets.
+"""
+
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence
+
+
+def pool_map(
+    function: Callable, tasks: Sequence, n_workers: Optional[int] = None
+) -> List:
+    """
+    [function(task) for task in tasks], in a pool of n_workers processes, all
+    CPUs by default. The tasks run in this process if n_workers is 1, if there
+    is at most one task, or if this is a worker process already, e.g. of the
+    DataGenerator pool, whose workers share the CPUs with each other.
+    """
+    tasks = list(tasks)
+    if n_workers is None:
+        n_workers = multiprocessing.cpu_count()
+    if n_workers <= 1 or len(tasks) <= 1 or multiprocessing.parent_process() is not None:
+        return [function(task) for task in tasks]
+    n_workers = min(n_workers, len(tasks))
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return list(
+            executor.map(function, tasks, chunksize=max(1, len(tasks) // (4 * n_workers)))
+        )
+
+
+@contextlib.contextmanager
+def atomic_open(path: str, mode: str = "w", **kwargs) -> Iterator:
+    """
+    open(path, mode) for writing. The file is written to a temporary file
+    first, which replaces path once it is complete, so that concurrent
+    readers never see a partial file.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, mode, **kwargs) as file:
+            yield file
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
@@ -0,0 +1,129 @@
+"""
+Binary polynomials with "at least one" penalties kept in product form.
+
+The penalty c * prod_{v in S} (1 - x_v) is c if none of the variables in S
+is 1 and 0 otherwise. Expanded into monomials it has 2^|S| terms,
+sum_{U subset of S} (-1)^|U| c x_U, and its spin form has a term for every
+subset of S as well. Products of the variables themselves,
+c * prod_{v in S} x_v, are a single monomial but have the same spin form up
+to the signs, and are kept in product form too. ProductFormPolynomial stores every penalty as its
+coefficient and variables, so building a formulation costs O(|S|) per
+constraint. The energy of every basis state is evaluated from the products
+directly, which is all the diagonal exact solver and the statevector QAOA
+need. The spin terms, i.e. the Pauli terms of the cost Hamiltonian, are only
+expanded on demand, e.g. for the QASM export, and then in closed form in
+time proportional to the number of terms.
+"""
+
+import itertools
+
+import dimod
+import numpy as np
+
+
+class ProductFormPolynomial:
+    """
+    Binary polynomial offset + sum_v a_v x_v + sum_k c_k prod_{v in S_k} l_v,
+    where the literal l_v is 1 - x_v for a negated product and x_v otherwise.
+
+    Attributes:
+        linear (dict): Linear bias a_v of every variable.
+        products (list): (c_k, S_k, negated) triples, S_k a tuple of distinct
+            variables. (c_k, S_k) pairs are negated products.
+        offset (float): Constant term.
+        vartype: Always dimod.BINARY.
+    """
+
+    vartype = dimod.BINARY
+
+    def __init__(self, linear, products, offset=0):
+        self.linear = dict(linear)
+        self.products = [
+            (product[0], tuple(product[1]), product[2] if len(product) > 2 else True)
+            for product in products
+        ]
+        self.offset = offset
+
+    @property
+    def variables(self):
+        variables = {v: None for _, product, _ in self.products for v in product}
+        variables.update(dict.fromkeys(self.linear))
+        return list(variables)
+
+    def _monomials(self):
+        # Products first, their subsets by size, then the linear terms
+        for coeff, product, negated in self.products:
+            if not negated:
+                yield tuple(sorted(product)), coeff
+                continue
+            for size in range(1, len(product) + 1):
+                for subset in itertools.combinations(product, size):
+                    yield tuple(sorted(subset)), (-1) ** size * coeff
+        for v, bias in self.linear.items():
+            yield (v,), bias
+
+    def to_binary_polynomial(self):
+        """Monomial expansion as a dimod.BinaryPolynomial, without the constant term."""
+        return dimod.BinaryPolynomial(self._monomials(), dimod.BINARY)
+
+    def spin_terms(self):
+        """
+        Non-constant terms of the spin form, x = (s + 1) / 2, as (variables, bias) pairs.
+
+        The bias of a subset T of S_k is (-1)^|T| c_k / 2^|S_k| for a negated
+        product and c_k / 2^|S_k| otherwise, summed over all products, plus
+        a_v / 2 for the linear terms. Terms whose biases cancel exactly are
+        left out, e.g. the odd subsets of a hyperedge of HyperMaxCut with its
+        products of both the variables and their complements. Terms of two
+        or more variables come first, in order of first appearance, then the
+        single variable terms.
+        The variables of every term are sorted by their string, the order in
+        which BinaryOptimizationProblem assigns them to qubits.
+        """
+        biases = {}
+        for coeff, product, negated in self.products:
+            scale = coeff / 2 ** len(product)
+            product = sorted(product, key=str)
+            for size in range(1, len(product) + 1):
+                bias = (-1) ** size * scale if negated else scale
+                for term in itertools.combinations(product, size):
+                    biases[term] = biases.get(term, 0) + bias
+        for v, bias in self.linear.items():
+            biases[(v,)] = biases.get((v,), 0) + bias / 2
+
+        biases = {term: bias for term, bias in biases.items() if bias != 0}
+        multi = [(term, bias) for term, bias in biases.items() if len(term) > 1]
+        single = [(term, bias) for term, bias in biases.items() if len(term) == 1]
+        return multi + single
+
+    def spin_offset(self):
+        """Constant term of the spin form."""
+        return (
+            self.offset
+            + sum(self.linear.values()) / 2
+            + sum(coeff / 2 ** len(product) for coeff, product, _ in self.products)
+        )
+
+    def energies(self, variables_to_qubits, n_qubits):
+        """
+        Energy of every computational basis state under the spin form
+        without its constant, i.e. the diagonal of the cost Hamiltonian.
+        Spin +1 (x = 1) is the |0> state and wire 0 the most significant bit.
+        """
+        energies = np.full(2**n_qubits, float(self.offset - self.spin_offset()))
+        # Axis w of the grid is the bit of wire w, every term is added to the
+        # block of basis states in which it is nonzero
+        grid = energies.reshape((2,) * n_qubits)
+
+        # x_v = 1 - bit of v, so a_v x_v is a_v where the bit of v is 0
+        for v, bias in self.linear.items():
+            grid[(slice(None),) * variables_to_qubits[v] + (0,)] += bias
+
+        # prod (1 - x_v) = prod bit_v is 1 where all bits of the product are 1,
+        # prod x_v where they are all 0
+        for coeff, product, negated in self.products:
+            block = [slice(None)] * n_qubits
+            for v in product:
+                block[variables_to_qubits[v]] = int(negated)
+            grid[tuple(block)] += coeff
+        return energies
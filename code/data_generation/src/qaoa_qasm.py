@@ -0,0 +1,126 @@
+"""
+QASM export of QAOA circuits from a precompiled gate template.
+
+The gates of BinaryOptimizationProblem.qaoa_circuit, as written by
+tape_to_qasm, only depend on the cost Hamiltonian's Pauli words and the
+number of layers: the Hadamard layer, then per layer a CNOT ladder around
+an RZ for every cost term and H RZ H for every mixer term. Only the RZ
+angles change with the parameters, 2 * gamma * coefficient for a cost term
+and 2 * alpha for a mixer term. The gate lines are therefore built once per
+Hamiltonian and layer count as a format string with one slot per angle, and
+the QASM of given parameters is a string substitution.
+
+The angles are computed in the same order of operations as the
+ApproxTimeEvolution decomposition, so the rounded angles, the parameter
+sharing and thereby the QASM text are identical to tape_to_qasm.
+"""
+
+import jax.numpy as jnp
+import numpy as np
+from qiskit.circuit.tools import pi_check
+
+from src.utils import qasm_header, qasm_measurements
+
+
+def _pauli_rotation_lines(word):
+    """
+    Gate lines of PauliRot(theta, word) with a slot for theta, decomposed as
+    by PennyLane: H on X wires, the MultiRZ CNOT ladder and H again.
+    """
+    wires = list(word.keys())
+    if any(pauli not in ("X", "Z") for pauli in word.values()):
+        raise ValueError(f"Pauli word {word} is not made of X and Z only")
+
+    basis_change = [f"h q[{wire}];\n" for wire, pauli in word.items() if pauli == "X"]
+    ladder = [
+        f"cx q[{control}], q[{target}];\n"
+        for control, target in zip(wires[~0:0:-1], wires[~1::-1])
+    ]
+    return (
+        basis_change
+        + ladder
+        + [f"rz({{}}) q[{wires[0]}];\n"]
+        + ladder[::-1]
+        + basis_change
+    )
+
+
+class QAOAQasmTemplate:
+    """
+    Attributes:
+        n_qubits (int): Number of qubits.
+        p (int): Number of QAOA layers.
+        template (str): Gate lines with a {} slot for every RZ angle.
+        slots (list): Index of the distinct angle filling every slot.
+        rows: Parameter row of every distinct angle, 0 for gamma and 1 for alpha.
+        layers: Layer of every distinct angle.
+        coefficients: Hamiltonian coefficient of every distinct angle.
+    """
+
+    def __init__(self, coeffs, terms, n_qubits, p):
+        self.n_qubits = n_qubits
+        self.p = p
+        # The Pauli words and coefficients of the cost Hamiltonian, given as
+        # wire tuples, and of the X mixer, in the order of their pauli_rep
+        cost_words = [
+            ({wire: "Z" for wire in wires}, coeff) for wires, coeff in zip(terms, coeffs)
+        ]
+        mixer_words = [({wire: "X"}, 1.0) for wire in range(n_qubits)]
+
+        lines = [f"h q[{wire}];\n" for wire in range(n_qubits)]
+        # Terms with equal coefficients share their angle, which is computed
+        # and formatted once. Angles are numbered by first occurrence.
+        angles = {}
+        self.slots = []
+        for layer in range(p):
+            for row, words in enumerate((cost_words, mixer_words)):
+                for word, coefficient in words:
+                    # Identity terms only add a global phase
+                    if len(word) == 0:
+                        continue
+                    lines += _pauli_rotation_lines(word)
+                    key = (row, layer, float(coefficient))
+                    self.slots.append(angles.setdefault(key, len(angles)))
+
+        self.template = "".join(lines)
+        rows, layers, coefficients = zip(*angles) if angles else ((), (), ())
+        self.rows = np.array(rows, dtype=int)
+        self.layers = np.array(layers, dtype=int)
+        self.coefficients = np.array(coefficients, dtype=float)
+
+    def angles(self, params):
+        """
+        Distinct RZ angles, 2 * time * coefficient as in ApproxTimeEvolution,
+        in the precision of params.
+        """
+        params = np.asarray(params)
+        coefficients = self.coefficients.astype(params.dtype)
+        return (2 * params[self.rows, self.layers] * coefficients).tolist()
+
+    def _fill(self, angles, symbolic_params):
+        values = [round(angle, 4) for angle in angles]
+        if symbolic_params:
+            # Parameters are shared by rounded value and numbered by first occurrence
+            names = {value: f"x{i}" for i, value in enumerate(dict.fromkeys(values))}
+            header = qasm_header(self.n_qubits, names.values())
+        else:
+            names = {value: pi_check(value, output="qasm") for value in set(values)}
+            header = qasm_header(self.n_qubits)
+        arguments = [names[value] for value in values]
+        return (
+            header
+            + self.template.format(*[arguments[slot] for slot in self.slots])
+            + qasm_measurements(self.n_qubits)
+        )
+
+    def qasm(self, params, symbolic_params=True):
+        """
+        QASM of the circuit with the given (2, p) parameters. Returns a
+        (numeric, symbolic) pair like tape_to_qasm, the numeric circuit
+        built from the parameters rounded to 4 decimals.
+        """
+        params = jnp.asarray(params)
+        numeric = self._fill(self.angles(jnp.round(params, decimals=4)), False)
+        if not symbolic_params:
+            return numeric, None
+        return numeric, self._fill(self.angles(params), True)
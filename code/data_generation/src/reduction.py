@@ -0,0 +1,278 @@
+"""
+Exact reduction of higher order binary polynomials to quadratic models.
+
+A higher order term is reduced by substituting an ancilla y for the product
+of two of its literals a b, a literal being a variable x or its complement
+1 - x. The Rosenberg penalty
+
+    M * (a b - 2 a y - 2 b y + 3 y)
+
+is 0 if y = a b and at least M otherwise. With M larger than the sum of the
+absolute biases of the terms y was substituted into, no assignment with
+y != a b is optimal. The minimum of the reduced model over the ancillas
+therefore is the original polynomial, and its ground states are the ground
+states of the original polynomial with the ancillas set to their products.
+The pair to substitute is always the one shared by most of the remaining
+higher order terms, so one ancilla serves all terms containing the pair.
+Terms over the same three variables are first expanded into monomials, in
+which the cubic ones may cancel. The hyperedge term of HyperMaxCut,
+a b c + (1 - a)(1 - b)(1 - c), is quadratic, for example.
+
+Both formulations can be solved by BinaryOptimizationProblem. The native
+one needs fewer qubits, but its cost Hamiltonian has a Pauli Z product for
+every subset of every term, each compiled to a CNOT ladder around an RZ.
+The reduced one only has one and two qubit terms. select_formulation picks
+one of the two per instance from an estimate of the qubits and the depth of
+a QAOA cost layer.
+"""
+
+import itertools
+from collections import Counter
+from dataclasses import dataclass
+
+import dimod
+
+from src.algorithms.qubo_builder import QuboBuilder
+from src.product_form import ProductFormPolynomial
+
+# Depth of a cost layer that an additional qubit is worth
+QUBIT_WEIGHT = 8
+
+# Ancillas are labelled (ANCILLA, i)
+ANCILLA = "ancilla"
+
+
+@dataclass
+class FormulationCost:
+    """
+    Estimated size of a QAOA cost layer exp(-i gamma H_C).
+
+    Attributes:
+        n_qubits (int): Number of qubits.
+        n_terms (int): Number of Pauli Z product terms.
+        depth (int): Gate layers, at least the summed depth of the terms on
+            the busiest qubit. A term on k qubits takes a CNOT ladder of k - 1
+            gates, an RZ and the ladder back, 2k - 1 layers.
+    """
+
+    n_qubits: int
+    n_terms: int
+    depth: int
+
+    def score(self, qubit_weight=QUBIT_WEIGHT):
+        return self.depth + qubit_weight * self.n_qubits
+
+
+@dataclass
+class QuadraticReduction:
+    """
+    Attributes:
+        bqm (dimod.BinaryQuadraticModel): Reduced model over the variables and the ancillas.
+        ancillas (dict): Ancilla label -> the pair of literals (variable, negated) it stands for.
+    """
+
+    bqm: dimod.BinaryQuadraticModel
+    ancillas: dict
+
+
+def literal_terms(polynomial):
+    """
+    Terms of a binary polynomial as a dict from frozensets of literals
+    (variable, negated) to biases, the constant term and the variables.
+    """
+    terms = {}
+    offset = 0
+
+    def add(literals, bias):
+        literals = frozenset(literals)
+        terms[literals] = terms.get(literals, 0) + bias
+
+    if isinstance(polynomial, ProductFormPolynomial):
+        offset += polynomial.offset
+        for v, bias in polynomial.linear.items():
+            add([(v, False)], bias)
+        for coeff, product, negated in polynomial.products:
+            add([(v, negated) for v in product], coeff)
+    elif isinstance(polynomial, dimod.BinaryPolynomial):
+        if polynomial.vartype is dimod.SPIN:
+            polynomial = polynomial.to_binary()
+        for term, bias in polynomial.items():
+            if len(term) == 0:
+                offset += bias
+            else:
+                add([(v, False) for v in term], bias)
+    else:
+        raise TypeError(f"Cannot reduce {type(polynomial).__name__}")
+
+    return terms, offset, list(polynomial.variables)
+
+
+def spin_supports(polynomial):
+    """
+    Variables of the non-constant terms of the spin form of a
+    ProductFormPolynomial or dimod.BinaryPolynomial whose biases do not
+    cancel, the Pauli Z products of its cost Hamiltonian.
+    """
+    if isinstance(polynomial, ProductFormPolynomial):
+        return [frozenset(term) for term, _ in polynomial.spin_terms()]
+    if isinstance(polynomial, dimod.BinaryPolynomial):
+        if polynomial.vartype is dimod.BINARY:
+            polynomial = polynomial.to_spin()
+        return [frozenset(term) for term, bias in polynomial.items() if term and bias != 0]
+    raise TypeError(f"Cannot reduce {type(polynomial).__name__}")
+
+
+def degree(polynomial):
+    """
+    Highest number of variables in a term of a ProductFormPolynomial or
+    dimod.BinaryPolynomial after cancellation, the same in binary and spin form.
+    """
+    return max(map(len, spin_supports(polynomial)), default=0)
+
+
+def _sorted_literals(literals):
+    return sorted(literals, key=str)
+
+
+def _expand_cubic_supports(terms):
+    """
+    Expand the terms over the same two or three variables into monomials,
+    dropping the ones that cancel. Returns the new terms and the constant.
+    """
+    supports = Counter(frozenset(v for v, _ in literals) for literals in terms)
+    expanded = {}
+    offset = 0
+    for literals, bias in terms.items():
+        if len(literals) > 3 or supports[frozenset(v for v, _ in literals)] == 1:
+            expanded[literals] = expanded.get(literals, 0) + bias
+            continue
+        # The product of the complements, (1 - x) factors, over all their subsets
+        negated = [v for v, is_negated in literals if is_negated]
+        positive = [(v, False) for v, is_negated in literals if not is_negated]
+        for size in range(len(negated) + 1):
+            for subset in itertools.combinations(negated, size):
+                monomial = frozenset(positive + [(v, False) for v in subset])
+                if monomial:
+                    expanded[monomial] = expanded.get(monomial, 0) + (-1) ** size * bias
+                else:
+                    offset += bias
+    return {literals: bias for literals, bias in expanded.items() if bias != 0}, offset
+
+
+def reduce_to_quadratic(polynomial):
+    """Exact reduction of a ProductFormPolynomial or dimod.BinaryPolynomial to a BQM."""
+    terms, offset, variables = literal_terms(polynomial)
+    terms, expanded_offset = _expand_cubic_supports(terms)
+    offset += expanded_offset
+    ancillas = {}
+
+    while True:
+        # The pair of literals shared by most higher order terms, first seen first
+        pairs = Counter(
+            pair
+            for literals in terms
+            if len(literals) > 2
+            for pair in itertools.combinations(_sorted_literals(literals), 2)
+        )
+        if not pairs:
+            break
+        (a, b), _ = pairs.most_common(1)[0]
+
+        y = (ANCILLA, len(ancillas))
+        ancillas[y] = (a, b)
+        substituted = {}
+        strength = 1
+        for literals, bias in terms.items():
+            if len(literals) > 2 and a in literals and b in literals:
+                literals = literals - {a, b} | {(y, False)}
+                strength += abs(bias)
+            substituted[literals] = substituted.get(literals, 0) + bias
+        terms = substituted
+
+        # Rosenberg penalty, 0 exactly if y = a b
+        for literals, bias in (
+            ((a, b), strength),
+            ((a, (y, False)), -2 * strength),
+            ((b, (y, False)), -2 * strength),
+            (((y, False),), 3 * strength),
+        ):
+            literals = frozenset(literals)
+            terms[literals] = terms.get(literals, 0) + bias
+
+    builder = QuboBuilder()
+    builder.registry.ids(variables)
+    builder.registry.ids(ancillas)
+    builder.offset = offset
+    for literals, bias in terms.items():
+        # A literal is (0, 1) * x for a variable and (1, -1) * x for its complement
+        factors = [
+            ((1, None), (-1, v)) if negated else ((1, v),) for v, negated in literals
+        ]
+        for expansion in itertools.product(*factors):
+            coeff = bias
+            for factor, _ in expansion:
+                coeff *= factor
+            product = [v for _, v in expansion if v is not None]
+            if len(product) == 0:
+                builder.offset += coeff
+            elif len(product) == 1:
+                builder.add_linear(builder.registry.ids(product), coeff)
+            else:
+                ids = builder.registry.ids(product)
+                builder.add_quadratic(ids[:1], ids[1:], coeff)
+    return QuadraticReduction(builder.to_bqm(), ancillas)
+
+
+def ancilla_variables(variables):
+    """The ancillas among the variables of a reduced model."""
+    return [v for v in variables if isinstance(v, tuple) and len(v) == 2 and v[0] == ANCILLA]
+
+
+def _cost(supports, n_qubits):
+    load = Counter()
+    for support in supports:
+        for v in support:
+            load[v] += 2 * len(support) - 1
+    return FormulationCost(n_qubits, len(supports), max(load.values(), default=0))
+
+
+def native_cost(polynomial):
+    """Cost of the spin form of a higher order polynomial, without the terms that cancel."""
+    return _cost(spin_supports(polynomial), len(polynomial.variables))
+
+
+def quadratic_cost(bqm):
+    supports = [(v,) for v in bqm.variables] + list(bqm.quadratic)
+    return _cost(supports, bqm.num_variables)
+
+
+def select_formulation(polynomial, method="auto", qubit_limit=None, qubit_weight=QUBIT_WEIGHT):
+    """
+    The formulation of a problem handed to BinaryOptimizationProblem.
+
+    Quadratic models are returned as they are. For higher order polynomials
+    method "native" keeps the polynomial, "reduced" reduces it to a BQM and
+    "auto" takes the one with the lower FormulationCost.score among those
+    with at most qubit_limit qubits, the native one if there is a tie or
+    neither fits.
+    """
+    if method not in ("auto", "native", "reduced"):
+        raise ValueError(f"Unknown formulation {method}")
+    if (
+        method == "native"
+        or not isinstance(polynomial, (ProductFormPolynomial, dimod.BinaryPolynomial))
+        or degree(polynomial) <= 2
+    ):
+        return polynomial
+
+    reduced = reduce_to_quadratic(polynomial).bqm
+    if method == "reduced":
+        return reduced
+
+    native_score = native_cost(polynomial).score(qubit_weight)
+    reduced_cost = quadratic_cost(reduced)
+    if qubit_limit is not None and reduced_cost.n_qubits > qubit_limit:
+        return polynomial
+    if reduced_cost.score(qubit_weight) < native_score:
+        return reduced
+    return polynomial
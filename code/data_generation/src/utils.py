@@ -10,8 +10,10 @@ from networkx import weisfeiler_lehman_graph_hash
 from pennylane import numpy as np
 from pennylane.ops.op_math import LinearCombination
 from pennylane_qiskit import AerDevice
-from qiskit import QuantumCircuit
+from pennylane_qiskit.qiskit_device_legacy import QISKIT_OPERATION_MAP
+from qiskit import QuantumCircuit, qasm3
 from qiskit.circuit import Parameter
+from qiskit.circuit.tools import pi_check
 from jax import numpy as jnp
 
 from src.data_classes import OptimizationType
@@ -198,6 +200,11 @@ def int_to_bitstring(int_sample, n_qubits):
     return "".join([str(i) for i in bits])
 
 
+def bitstring_to_basis_index(bitstring):
+    """Inverse of int_to_bitstring, the computational basis index of a bitstring."""
+    return int(bitstring.translate(str.maketrans("01", "10")), 2)
+
+
 def basis_vector_to_bitstring(basis_vector):
     index = np.argmax(basis_vector)
     num_qubits = int(np.log2(len(basis_vector)))
@@ -207,25 +214,16 @@ def basis_vector_to_bitstring(basis_vector):
 
 
 def get_qasm_circuits(problem, optimization_type: OptimizationType, params=None):
-    circuit_with_params = None
-    circuit_without_params = None
-
-    circuit_with_params = problem.circuit_to_qasm(
-        optimization_type=optimization_type,
-        params=params,
-        symbolic_params=False,
-        adapt_vqe=optimization_type == OptimizationType.ADAPTIVE_VQE,
-    )
-
-    if optimization_type != OptimizationType.ADAPTIVE_VQE:
-        circuit_without_params = problem.circuit_to_qasm(
+    if optimization_type == OptimizationType.ADAPTIVE_VQE:
+        circuit_with_params = problem.circuit_to_qasm(
             optimization_type=optimization_type,
             params=params,
-            symbolic_params=True,
-            adapt_vqe=optimization_type == OptimizationType.ADAPTIVE_VQE,
+            symbolic_params=False,
+            adapt_vqe=True,
         )
+        return circuit_with_params, None
 
-    return circuit_with_params, circuit_without_params
+    return problem.circuits_to_qasm(optimization_type=optimization_type, params=params)
 
 
 def pennylane_to_qiskit(
@@ -292,6 +290,155 @@ def pennylane_to_qiskit(
     return new_qc
 
 
+# PennyLane operations written directly by tape_to_qasm and their names in
+# the OpenQASM 3 standard library, as exported by Qiskit
+QASM_GATES = {
+    "Identity": "id",
+    "Hadamard": "h",
+    "PauliX": "x",
+    "PauliY": "y",
+    "PauliZ": "z",
+    "S": "s",
+    "T": "t",
+    "SX": "sx",
+    "CNOT": "cx",
+    "CY": "cy",
+    "CZ": "cz",
+    "SWAP": "swap",
+    "Toffoli": "ccx",
+    "RX": "rx",
+    "RY": "ry",
+    "RZ": "rz",
+    "PhaseShift": "p",
+    "CRX": "crx",
+    "CRY": "cry",
+    "CRZ": "crz",
+}
+
+ZERO_ROTATIONS = ("rx", "ry", "rz", "crx", "cry", "crz")
+
+
+def _measures_in_computational_basis(tape):
+    """True if no measurement needs basis rotations, e.g. probs or Z-only observables."""
+    for measurement in tape.measurements:
+        if measurement.obs is None:
+            continue
+        pauli_rep = measurement.obs.pauli_rep
+        if pauli_rep is None or any(
+            pauli != "Z" for word in pauli_rep for pauli in word.values()
+        ):
+            return False
+    return True
+
+
+def qasm_operations(circuit, params, n_qubits):
+    """
+    Operations of the circuit as executed by the Aer device, or None if
+    the tape cannot be written directly, e.g. because it needs basis
+    rotations before the measurements.
+    """
+    args = () if params is None else (params,)
+    tape = qml.tape.make_qscript(circuit.func)(*args)
+    # The Aer device decomposes every operation it has no Qiskit gate for
+    tape = tape.expand(depth=10, stop_at=lambda op: op.name in QISKIT_OPERATION_MAP)
+    if not _measures_in_computational_basis(tape) or any(
+        wire not in range(n_qubits) for wire in tape.wires
+    ):
+        return None
+    if any(op.name not in QASM_GATES for op in tape.operations):
+        return None
+    return tape.operations
+
+
+def qasm_header(n_qubits, parameter_names=()):
+    """QASM up to the first gate, declaring the symbolic parameters and registers."""
+    lines = ['OPENQASM 3.0;\ninclude "stdgates.inc";\n']
+    # Qiskit declares the parameters sorted by name
+    lines += [f"input float[64] {name};\n" for name in sorted(parameter_names)]
+    lines.append(f"bit[{n_qubits}] c;\nqubit[{n_qubits}] q;\n")
+    return "".join(lines)
+
+
+def qasm_measurements(n_qubits):
+    return "".join(f"c[{i}] = measure q[{i}];\n" for i in range(n_qubits))
+
+
+def _qasm_text(operations, n_qubits, symbolic_params, adapt_vqe):
+    """
+    OpenQASM 3 text of the operations followed by a measurement of every
+    qubit, identical to qasm3.dumps of the circuit built by pennylane_to_qiskit.
+    """
+    param_mapping = {}
+    gates = []
+    for op in operations:
+        name = QASM_GATES[op.name]
+        values = [round(float(param), 4) for param in op.parameters]
+        if adapt_vqe and name in ZERO_ROTATIONS and np.isclose(values[0], 0, atol=1e-10):
+            continue
+        if symbolic_params:
+            for value in values:
+                if value not in param_mapping:
+                    param_mapping[value] = f"x{len(param_mapping)}"
+            arguments = [param_mapping[value] for value in values]
+        else:
+            arguments = [pi_check(value, output="qasm") for value in values]
+        qubits = ", ".join(f"q[{wire}]" for wire in op.wires)
+        if arguments:
+            gates.append(f"{name}({', '.join(arguments)}) {qubits};\n")
+        else:
+            gates.append(f"{name} {qubits};\n")
+
+    return (
+        qasm_header(n_qubits, param_mapping.values())
+        + "".join(gates)
+        + qasm_measurements(n_qubits)
+    )
+
+
+def tape_to_qasm(
+    circuit, n_qubits, params=None, symbolic_params=True, adapt_vqe=False, operations=None
+):
+    """
+    OpenQASM 3 text of a QNode, written directly from its tape with the same
+    output as qasm3.dumps(pennylane_to_qiskit(...)) but without executing
+    the circuit on an Aer device. Returns a (numeric, symbolic) pair, with
+    symbolic None unless symbolic_params is set. Circuits the tape cannot
+    be written for directly go through pennylane_to_qiskit.
+
+    operations optionally replaces the operations of the tape, e.g. by a
+    prefix of the operations returned by qasm_operations.
+    """
+    if isinstance(params, list):
+        params = jnp.asarray(params)
+    # The numeric circuit is built from the rounded parameters
+    rounded = None if params is None else jnp.round(params, decimals=4)
+    if operations is None:
+        operations = qasm_operations(circuit, rounded, n_qubits)
+    if operations is None:
+        numeric = qasm3.dumps(
+            pennylane_to_qiskit(
+                circuit, n_qubits, params, symbolic_params=False, adapt_vqe=adapt_vqe
+            )
+        )
+        symbolic = (
+            qasm3.dumps(
+                pennylane_to_qiskit(
+                    circuit, n_qubits, params, symbolic_params=True, adapt_vqe=adapt_vqe
+                )
+            )
+            if symbolic_params
+            else None
+        )
+        return numeric, symbolic
+
+    numeric = _qasm_text(operations, n_qubits, False, adapt_vqe)
+    if not symbolic_params:
+        return numeric, None
+    if params is not None and not jnp.array_equal(rounded, params):
+        operations = qasm_operations(circuit, params, n_qubits)
+    return numeric, _qasm_text(operations, n_qubits, True, adapt_vqe)
+
+
 def parametrize_qiskit_circuit(circuit):
     """
     Input: A qiskit.QuantumCircuit object with constant values inside parameterized gates
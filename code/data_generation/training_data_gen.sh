@@ -29,6 +29,14 @@ ANSATZ_OPTIONS=(1 3 4 5 6 7 9 10 11 12 13 14 15 16 18)
 LAYERS=(1 2 3 4)
 
 VQE=true
+# With WARM_START every task solves 1..4 layers in sequence,
+# seeding each layer count from the optimized parameters of the previous one
+WARM_START=false
+warm_start_flag=""
+if [ "$WARM_START" = true ]; then
+    LAYERS=(4)
+    warm_start_flag="--warm_start"
+fi
 
 NUM_PROBLEMS=${#PROBLEMS[@]}
 NUM_ANSATZ=${#ANSATZ_OPTIONS[@]}
@@ -69,6 +77,8 @@ fi
 echo "Running ${SELECTED_PROBLEM} | Ansatz ${SELECTED_ANSATZ} | Layers ${SELECTED_LAYER} | VQE=${VQE}"
 
 output_dir="out/"
+# Exact solutions are shared between all array tasks
+exact_cache="${output_dir}exact_solutions.sqlite"
 
 if [ "$VQE" = true ]; then
     python3 -u -m src.main \
@@ -76,11 +86,15 @@ if [ "$VQE" = true ]; then
         --layers "${SELECTED_LAYER}" \
         --ansatz_template "${SELECTED_ANSATZ}" \
         --output_path "${output_dir}" \
+        --exact_cache "${exact_cache}" \
+        ${warm_start_flag} \
         --vqe
 else
     python3 -u -m src.main \
         --problem "${SELECTED_PROBLEM}" \
         --layers "${SELECTED_LAYER}" \
         --ansatz_template "${SELECTED_ANSATZ}" \
-        --output_path "${output_dir}"
+        --output_path "${output_dir}" \
+        --exact_cache "${exact_cache}" \
+        ${warm_start_flag}
 fi
@@ -0,0 +1,143 @@
+"""
+Check the QASM written directly from the PennyLane tape (tape_to_qasm)
+against the Aer device round-trip (pennylane_to_qiskit + qasm3.dumps) on
+the shipped *_data.pkl instance sets.
+
+Every instance is solved with QAOA, VQE with the given ansatzes and
+adaptive VQE, the numeric and symbolic QASM of the solution circuits and the
+adaptive VQE circuit of every step are compared byte for byte, and the
+average export times of both routes are reported.
+
+Usage (from code/data_generation):
+    python validate_qasm_export.py --problem vertex_cover --ansatzes 1 5 13
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+import jax
+import numpy as np
+from qiskit import qasm3
+
+from src.algorithms.factory import get_problem_data
+from src.binary_optimization_problem import BinaryOptimizationProblem
+from src.data_classes import OptimizationProblemType, OptimizationType
+from src.data_generator import build_problem
+from src.utils import get_qasm_circuits, pennylane_to_qiskit
+
+jax.config.update("jax_enable_x64", True)
+
+
+def legacy_qasm_circuits(problem, optimization_type, params):
+    circuit = problem._circuit(optimization_type)
+    adapt_vqe = optimization_type == OptimizationType.ADAPTIVE_VQE
+    circuit_with_params = qasm3.dumps(
+        pennylane_to_qiskit(
+            circuit,
+            problem.n_qubits,
+            params=params,
+            symbolic_params=False,
+            adapt_vqe=adapt_vqe,
+        )
+    )
+    circuit_with_symbols = None
+    if not adapt_vqe:
+        circuit_with_symbols = qasm3.dumps(
+            pennylane_to_qiskit(circuit, problem.n_qubits, params=params)
+        )
+    return circuit_with_params, circuit_with_symbols
+
+
+def legacy_adaptive_circuits(problem):
+    return [
+        qasm3.dumps(
+            pennylane_to_qiskit(
+                problem._adaptive_circuit(k),
+                problem.n_qubits,
+                symbolic_params=False,
+                adapt_vqe=True,
+            )
+        )
+        for k in range(1, len(problem.adaptive_operations) + 1)
+    ]
+
+
+def compare(label, timings, legacy, direct):
+    start_time = time.perf_counter()
+    legacy_result = legacy()
+    timings["legacy"].append(time.perf_counter() - start_time)
+    start_time = time.perf_counter()
+    direct_result = direct()
+    timings["direct"].append(time.perf_counter() - start_time)
+    if legacy_result != direct_result:
+        print(f"{label}: QASM differs")
+        return 1
+    return 0
+
+
+def validate(problem_type, ansatzes, layers, limit, max_qubits):
+    graph_data = list(get_problem_data(problem_type))[:limit]
+    timings = defaultdict(lambda: defaultdict(list))
+    mismatches = 0
+
+    for i, instance in enumerate(graph_data):
+        _, qubo, _ = build_problem(problem_type, instance)
+        problem = BinaryOptimizationProblem(
+            qubo.get_binary_polynomial(), description=problem_type, p=layers
+        )
+        if problem.get_number_of_qubits() > max_qubits:
+            continue
+        problem.solve_exactly()
+
+        solutions = [("qaoa", OptimizationType.QAOA, problem.solve_with_qaoa)]
+        solutions += [
+            (f"vqe {ansatz}", OptimizationType.VQE, lambda a=ansatz: problem.solve_with_vqe(a))
+            for ansatz in ansatzes
+        ]
+        solutions.append(
+            ("adaptive_vqe", OptimizationType.ADAPTIVE_VQE, problem.solve_with_adaptive_vqe)
+        )
+        for name, optimization_type, solve in solutions:
+            params = solve().get("params", None)
+            mismatches += compare(
+                f"Instance {i} {name}",
+                timings[name],
+                lambda: legacy_qasm_circuits(problem, optimization_type, params),
+                lambda: get_qasm_circuits(problem, optimization_type, params),
+            )
+        mismatches += compare(
+            f"Instance {i} adaptive_vqe steps",
+            timings["adaptive_vqe steps"],
+            lambda: legacy_adaptive_circuits(problem),
+            problem.get_adaptive_circuits,
+        )
+
+    print(f"Problem: {problem_type}, instances: {len(graph_data)}, mismatches: {mismatches}")
+    print(f"{'circuit':>20}  {'legacy':>12}  {'direct':>12}")
+    for name, row in timings.items():
+        print(
+            f"{name:>20}  {np.mean(row['legacy']) * 1000:>9.2f} ms"
+            f"  {np.mean(row['direct']) * 1000:>9.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the direct QASM export.")
+    parser.add_argument(
+        "--problem",
+        type=str,
+        required=True,
+        choices=list(OptimizationProblemType),
+    )
+    parser.add_argument(
+        "--ansatzes", nargs="+", type=int, default=[1, 5, 13], help="VQE ansatz ids"
+    )
+    parser.add_argument("--layers", type=int, default=2, help="Circuit layers")
+    parser.add_argument("--limit", type=int, default=10, help="Number of instances")
+    parser.add_argument(
+        "--max_qubits", type=int, default=10, help="Skip larger instances"
+    )
+    args = parser.parse_args()
+
+    validate(args.problem, args.ansatzes, args.layers, args.limit, args.max_qubits)
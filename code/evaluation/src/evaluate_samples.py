@@ -9,12 +9,15 @@ import re
 import pennylane as qml
 
 from qiskit import transpile, QuantumCircuit
-from qiskit.quantum_info import Statevector
+from qiskit.quantum_info import SparsePauliOp, Statevector
 from qiskit_aer import AerSimulator
 from qiskit_qasm3_import import parse
 
 from computations import compute_relative_entropy
-from util import construct_qiskit_hamiltonian
+from util import (
+    construct_qiskit_hamiltonian,
+    construct_qiskit_hamiltonian_from_terms,
+)
 
 ASSISTANT_START_STRING = "<|im_start|>assistant"
 ASSISTANS_END_STRING = "<|im_end|>"
@@ -29,7 +32,7 @@ def int_to_bitstring(i: int, n_qubits: int) -> str:
 
 
 def get_probability_distribution_and_expectation_value(
-    circuit: QuantumCircuit, simulator: AerSimulator, hamiltonian: str
+    circuit: QuantumCircuit, simulator: AerSimulator, hamiltonian: SparsePauliOp
 ):
     sim_circuit = circuit.remove_final_measurements(inplace=False)
     sim_circuit.save_statevector()
@@ -38,14 +41,12 @@ def get_probability_distribution_and_expectation_value(
     statevector = result.get_statevector(experiment=sim_circuit)
 
     probs = statevector.probabilities().tolist()
-    oper = construct_qiskit_hamiltonian(hamiltonian)
-
-    expectation_value = statevector.expectation_value(oper)
+    expectation_value = statevector.expectation_value(hamiltonian)
     return probs, expectation_value
 
 
 def evaluate_qiskit_circuit(
-    circuit: QuantumCircuit, hamiltonian: str, simulator: AerSimulator
+    circuit: QuantumCircuit, hamiltonian: SparsePauliOp, simulator: AerSimulator
 ):
     probs, expectation_value = get_probability_distribution_and_expectation_value(
         circuit, simulator, hamiltonian
@@ -201,7 +202,16 @@ def process_circuits(
         )
 
         generated_qasm = sample.get("generated_circuit", "")
-        hamiltonian = sample["dataset_metrics"]["cost_hamiltonian"]
+        # Built once per sample, samples with the compact encoding skip the string parsing
+        hamiltonian_terms = sample["dataset_metrics"].get("cost_hamiltonian_terms")
+        if hamiltonian_terms:
+            if isinstance(hamiltonian_terms, str):
+                hamiltonian_terms = json.loads(hamiltonian_terms)
+            hamiltonian = construct_qiskit_hamiltonian_from_terms(hamiltonian_terms)
+        else:
+            hamiltonian = construct_qiskit_hamiltonian(
+                sample["dataset_metrics"]["cost_hamiltonian"]
+            )
         solution_expectation_value = sample["dataset_metrics"]["solution"]["expectation_value"]
 
         # ---- Init new params ----
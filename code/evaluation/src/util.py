@@ -1,7 +1,8 @@
+import base64
 import re
 
 from pennylane import numpy as np
-from qiskit.quantum_info import SparsePauliOp
+from qiskit.quantum_info import PauliList, SparsePauliOp
 
 
 def construct_qiskit_hamiltonian(expression):
@@ -74,3 +75,21 @@ def construct_qiskit_hamiltonian(expression):
         coeffs.append(term["coefficient"])
 
     return SparsePauliOp(paulis, coeffs)
+
+
+def construct_qiskit_hamiltonian_from_terms(encoding):
+    """
+    Construct a Qiskit Hamiltonian from the compact cost_hamiltonian_terms
+    encoding of a sample (see data_generation/src/ising.py), with the same
+    qubit order as construct_qiskit_hamiltonian.
+    """
+    n_qubits = encoding["n_qubits"]
+    coeffs = np.frombuffer(base64.b64decode(encoding["coeffs"]), dtype="<f8")
+    words = np.frombuffer(base64.b64decode(encoding["masks"]), dtype="<u8")
+    words = words.reshape(len(coeffs), max(1, -(-n_qubits // 64)))
+
+    # Bit w % 64 of word w // 64 is set if Z acts on wire w
+    bits = (words[:, :, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    z = bits.reshape(len(coeffs), words.shape[1] * 64)[:, :n_qubits].astype(bool)[:, ::-1]
+    paulis = PauliList.from_symplectic(z, np.zeros_like(z))
+    return SparsePauliOp(paulis, coeffs.astype(complex))
@@ -182,6 +182,7 @@ def main():
                 ),
                 "optimal_circuit": sample.get("circuit_with_params"),
                 "cost_hamiltonian": sample.get("cost_hamiltonian"),
+                "cost_hamiltonian_terms": sample.get("cost_hamiltonian_terms"),
                 "solution": sample.get("solution"),
                 "exact_solution": sample.get("exact_solution"),
             },
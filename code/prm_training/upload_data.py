@@ -27,6 +27,7 @@ class QuantumCase:
     graph: Dict
     solution: Dict
     cost_hamiltonian: Optional[str] = None
+    cost_hamiltonian_terms: Optional[Dict] = None
     ansatz_id: Optional[int] = None
     number_of_qubits: Optional[int] = None
     number_of_layers: Optional[int] = None
@@ -82,6 +83,7 @@ def create_quantum_cases(data: Any) -> List[QuantumCase]:
             optimization_type=item.get("optimization_type"),
             graph=item.get("graph", {}),
             cost_hamiltonian=item.get("cost_hamiltonian"),
+            cost_hamiltonian_terms=item.get("cost_hamiltonian_terms"),
             ansatz_id=item.get("ansatz_id"),
             number_of_qubits=item.get("number_of_qubits"),
             number_of_layers=item.get("number_of_layers"),
@@ -125,6 +127,7 @@ def main():
             "graph": Value("string"),
             "solution": Value("string"),
             "cost_hamiltonian": Value("string"),
+            "cost_hamiltonian_terms": Value("string"),
             "ansatz_id": Value("int64"),
             "number_of_qubits": Value("int64"),
             "number_of_layers": Value("int64"),
@@ -140,6 +143,7 @@ def main():
         for field_key in [
             "graph",
             "solution",
+            "cost_hamiltonian_terms",
             "exact_solution",
             "problem_specific_attributes",
             "adaptive_process",